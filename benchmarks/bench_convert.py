@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+End-to-end throughput benchmark for HDFCConverter
+
+Generates synthetic statements of several sizes, converts each one in a
+fresh subprocess (so peak RSS is per run) and reports pages/sec, rows/sec
+and peak RSS per engine and mode.
+
+Modes:
+  files   HDFCConverter(path).convert(), writing every output file
+  memory  HDFCConverter.from_bytes(...).convert_to_memory(), no outputs
+
+Usage:
+  python benchmarks/bench_convert.py
+  python benchmarks/bench_convert.py --sizes 1 10 50 500 --modes memory --json results.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR))
+sys.path.insert(0, str(BENCH_DIR.parent / 'src'))
+
+from synthetic_statement import write_statement
+
+MODES = ('files', 'memory')
+
+
+def peak_rss_bytes():
+    """Peak resident set size of this process, or None if unavailable."""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset
+        except Exception:
+            return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def engine_name():
+    try:
+        import camelot
+        return f"camelot-{camelot.__version__}"
+    except Exception:
+        return 'camelot-unavailable'
+
+
+def run_child(mode, pdf_path):
+    """Convert one PDF in this process and return the measurements."""
+    import logging
+    logging.basicConfig(level=logging.WARNING)
+    from hdfc_converter import HDFCConverter
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        start = time.perf_counter()
+        cpu_start = time.process_time()
+        if mode == 'files':
+            result = HDFCConverter(pdf_path, output_dir).convert()
+        else:
+            with open(pdf_path, 'rb') as f:
+                result = HDFCConverter.from_bytes(f.read(), name=Path(pdf_path).name).convert_to_memory()
+        wall = time.perf_counter() - start
+        cpu = time.process_time() - cpu_start
+
+    return {
+        'success': result['success'],
+        'error': result.get('error'),
+        'wall_seconds': wall,
+        'cpu_seconds': cpu,
+        'rows': len(result.get('transactions', [])) if result['success'] else 0,
+        'peak_rss_bytes': peak_rss_bytes(),
+        'engine': engine_name(),
+        'stages': result.get('timings', {}).get('stages', {}),
+    }
+
+
+def run_case(mode, pdf_path):
+    """Run one benchmark case in a fresh interpreter."""
+    completed = subprocess.run(
+        [sys.executable, str(Path(__file__).resolve()), '--child', mode, str(pdf_path)],
+        capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Benchmark child failed:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end HDFCConverter throughput benchmark")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 10, 50],
+                        help='Statement sizes in transaction pages (default: 1 10 50)')
+    parser.add_argument('--rows-per-page', type=int, default=25, help='Rows per page (default: 25)')
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES),
+                        help='Conversion modes to run (default: all)')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per case; the fastest is kept')
+    parser.add_argument('--pdf-dir', help='Keep generated PDFs in this directory')
+    parser.add_argument('--json', dest='json_path', help='Also write results as JSON to this file')
+    parser.add_argument('--child', nargs=2, metavar=('MODE', 'PDF'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(*args.child)))
+        return 0
+
+    pdf_dir = Path(args.pdf_dir) if args.pdf_dir else Path(tempfile.mkdtemp(prefix='hdfc_bench_'))
+    pdf_dir.mkdir(parents=True, exist_ok=True)
+
+    results = []
+    print(f"{'pages':>6} {'mode':<7} {'engine':<16} {'rows':>7} {'wall s':>8} "
+          f"{'pages/s':>8} {'rows/s':>9} {'peak RSS MB':>12}")
+    for size in args.sizes:
+        pdf_path = pdf_dir / f"synthetic_{size}p_{args.rows_per_page}r.pdf"
+        if not pdf_path.exists():
+            info = write_statement(pdf_path, pages=size, rows_per_page=args.rows_per_page)
+        else:
+            info = None
+        total_pages = info['pages'] if info else None
+
+        for mode in args.modes:
+            runs = [run_case(mode, pdf_path) for _ in range(args.repeat)]
+            best = min(runs, key=lambda run: run['wall_seconds'])
+            if not best['success']:
+                print(f"{size:>6} {mode:<7} FAILED: {best['error']}")
+                continue
+            best.update({
+                'pages': size,
+                'document_pages': total_pages,
+                'mode': mode,
+                'pages_per_second': size / best['wall_seconds'],
+                'rows_per_second': best['rows'] / best['wall_seconds'],
+            })
+            results.append(best)
+            rss = best['peak_rss_bytes'] / 2 ** 20 if best['peak_rss_bytes'] else float('nan')
+            print(f"{size:>6} {mode:<7} {best['engine']:<16} {best['rows']:>7} {best['wall_seconds']:>8.2f} "
+                  f"{best['pages_per_second']:>8.2f} {best['rows_per_second']:>9.1f} {rss:>12.1f}")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({'rows_per_page': args.rows_per_page, 'results': results}, f, indent=2)
+        print(f"Wrote {args.json_path}")
+    if not args.pdf_dir:
+        for pdf in pdf_dir.glob('*.pdf'):
+            pdf.unlink()
+        os.rmdir(pdf_dir)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the pure-Python conversion stages
+
+Times the row parser, concatenated-row splitter, categorizer, summary,
+writers and markdown report on synthetic camelot-shaped tables, and
+compares the results against the committed baseline (baseline.json).
+
+Timings are normalised by a fixed pure-Python calibration workload, so a
+baseline recorded on one machine is meaningful on another; the absolute
+seconds are stored too, for reference.
+
+Usage:
+  python benchmarks/bench_stages.py                     # run and print
+  python benchmarks/bench_stages.py --check             # fail if a stage regressed
+  python benchmarks/bench_stages.py --update-baseline   # record a new baseline
+"""
+
+import argparse
+import json
+import logging
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR))
+sys.path.insert(0, str(BENCH_DIR.parent / 'src'))
+
+from synthetic_statement import StatementData
+
+BASELINE_FILE = BENCH_DIR / 'baseline.json'
+DEFAULT_ROWS = 2000
+DEFAULT_REPEAT = 5
+DEFAULT_TOLERANCE = 0.5
+
+
+def calibrate():
+    """Time a fixed mix of dict, string and float work, as a unit of machine speed."""
+    def workload():
+        rows = []
+        for i in range(20000):
+            text = f"UPI-MERCHANT{i % 97}-{i:012d}@okaxis"
+            rows.append({'n': text.lower(), 'a': float(f"{i * 1.5:.2f}"), 'k': 'upi' in text.lower()})
+        return sorted(rows, key=lambda row: row['a'], reverse=True)
+
+    return best_of(workload, DEFAULT_REPEAT)
+
+
+def best_of(func, repeat):
+    """Return the fastest wall time of `repeat` calls to func, after one warm-up call."""
+    func()
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def camelot_rows(count, seed=0):
+    """Rows shaped like camelot table.df output: 7 string columns, wrapped narrations joined by newlines."""
+    data = StatementData(seed=seed)
+    rows = []
+    for _ in range(count):
+        cells = data.next_transaction()
+        cells[1] = '\n'.join(cells[1])
+        rows.append(cells)
+    return rows
+
+
+def build_cases(rows):
+    """Return {stage name: zero-argument callable} for every benchmarked stage."""
+    import pandas as pd
+    from hdfc_converter import HDFCConverter
+
+    converter = HDFCConverter.from_bytes(b'%PDF-1.4 benchmark', name='benchmark.pdf')
+    table = pd.DataFrame(camelot_rows(rows))
+    series_rows = [row for _, row in table.iterrows()]
+    concatenated = pd.Series(['\n'.join(table[column]) for column in table.columns])
+
+    transactions = [converter._parse_transaction_row(row, 1) for row in series_rows]
+    categorized = converter.categorize_transactions([dict(t) for t in transactions])
+    summary = converter.generate_summary(categorized)
+    page_stats = [{'Page': 1, 'Rows_Processed': rows, 'Valid_Transactions': rows}]
+    output_dir = tempfile.mkdtemp(prefix='hdfc_bench_stages_')
+    converter.output_dir = Path(output_dir)
+
+    return {
+        'parse_transaction_row': lambda: [converter._parse_transaction_row(row, 1) for row in series_rows],
+        'split_concatenated_rows': lambda: converter._split_concatenated_rows(concatenated, 1),
+        'categorize_transactions': lambda: converter.categorize_transactions([dict(t) for t in transactions]),
+        'generate_summary': lambda: converter.generate_summary(categorized),
+        'save_results': lambda: converter.save_results(categorized, page_stats, summary),
+        'generate_markdown_report': lambda: converter._generate_markdown_report(summary, 'benchmark'),
+    }, output_dir
+
+
+def run(rows=DEFAULT_ROWS, repeat=DEFAULT_REPEAT):
+    """Run every stage and return the results document."""
+    import shutil
+
+    cases, output_dir = build_cases(rows)
+    try:
+        calibration = calibrate()
+        stages = {}
+        for name, func in cases.items():
+            seconds = best_of(func, repeat)
+            stages[name] = {'seconds': seconds, 'relative': seconds / calibration}
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    return {
+        'rows': rows,
+        'repeat': repeat,
+        'calibration_seconds': calibration,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'stages': stages,
+    }
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compare normalised stage timings against a baseline.
+
+    Returns:
+        list: (stage, baseline relative, current relative, change) for every
+        stage slower than the baseline by more than `tolerance`
+    """
+    regressions = []
+    for name, base in baseline['stages'].items():
+        current = results['stages'].get(name)
+        if current is None:
+            continue
+        change = current['relative'] / base['relative'] - 1
+        if change > tolerance:
+            regressions.append((name, base['relative'], current['relative'], change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for HDFCConverter stages")
+    parser.add_argument('--rows', type=int, default=DEFAULT_ROWS, help=f'Rows per table (default: {DEFAULT_ROWS})')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help=f'Runs per stage; the fastest is kept (default: {DEFAULT_REPEAT})')
+    parser.add_argument('--baseline', default=str(BASELINE_FILE), help='Baseline JSON file')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help=f'Allowed slowdown before --check fails, as a fraction (default: {DEFAULT_TOLERANCE})')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--check', action='store_true', help='Exit 1 if any stage regressed past the tolerance')
+    group.add_argument('--update-baseline', action='store_true', help='Write the results as the new baseline')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    results = run(args.rows, args.repeat)
+
+    baseline = None
+    if Path(args.baseline).exists():
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('rows') != args.rows:
+            print(f"Warning: baseline was recorded with {baseline.get('rows')} rows, not {args.rows}")
+
+    print(f"{'stage':<26} {'ms':>9} {'relative':>9} {'baseline':>9} {'change':>8}")
+    for name, stage in results['stages'].items():
+        base = baseline['stages'].get(name) if baseline else None
+        change = f"{stage['relative'] / base['relative'] - 1:+.1%}" if base else ''
+        base_relative = f"{base['relative']:.3f}" if base else ''
+        print(f"{name:<26} {stage['seconds'] * 1000:>9.2f} {stage['relative']:>9.3f} {base_relative:>9} {change:>8}")
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+        print(f"Wrote baseline to {args.baseline}")
+        return 0
+
+    if args.check:
+        if baseline is None:
+            print(f"No baseline at {args.baseline}; run with --update-baseline first")
+            return 1
+        regressions = compare(results, baseline, args.tolerance)
+        for name, base, current, change in regressions:
+            print(f"REGRESSION: {name} is {change:.0%} slower than baseline ({base:.3f} -> {current:.3f})")
+        if regressions:
+            return 1
+        print(f"All stages within {args.tolerance:.0%} of baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""
+Synthetic HDFC Bank statement generator
+
+Writes realistic HDFC-layout statement PDFs (ruled transaction tables,
+multi-line narrations, statement summary and terms pages) using only the
+standard library, so tests and benchmarks can run without real statements
+or network access.
+
+Usage:
+  python benchmarks/synthetic_statement.py statement.pdf --pages 50
+  python benchmarks/synthetic_statement.py big.pdf --pages 500 --rows-per-page 30 --seed 7
+"""
+
+import argparse
+import random
+import sys
+import zlib
+from datetime import date, timedelta
+
+# A4 portrait, in points
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+MARGIN_LEFT = 25
+MARGIN_BOTTOM = 50
+
+FONT_SIZE = 6.5
+LINE_HEIGHT = 8
+CELL_PADDING = 3
+
+# HDFC statement columns: (header, width in points, right aligned)
+COLUMNS = [
+    ('Date', 42, False),
+    ('Narration', 190, False),
+    ('Chq./Ref.No.', 80, False),
+    ('Value Dt', 42, False),
+    ('Withdrawal Amt.', 62, True),
+    ('Deposit Amt.', 62, True),
+    ('Closing Balance', 67, True),
+]
+
+# Characters per narration line before wrapping
+NARRATION_WIDTH = 52
+
+MERCHANTS = [
+    'SWIGGY', 'ZOMATO', 'AMAZON PAY', 'FLIPKART', 'BIGBASKET', 'UBER INDIA',
+    'OLA CABS', 'RELIANCE RETAIL', 'DMART', 'APOLLO PHARMACY', 'IRCTC', 'MAKEMYTRIP'
+]
+PEOPLE = [
+    'RAMESH KUMAR', 'PRIYA SHARMA', 'ANAND IYER', 'LAKSHMI NARAYANAN', 'SURESH BABU',
+    'KAVYA REDDY', 'ARJUN MEHTA', 'DEEPA MENON'
+]
+BANKS = ['okhdfcbank', 'okicici', 'okaxis', 'oksbi', 'ybl', 'paytm']
+IFSC = ['HDFC0000001', 'ICIC0000104', 'SBIN0001234', 'UTIB0000553', 'KKBK0000958']
+
+# Payments that repeat on a fixed schedule: (narration, amount, interval in days)
+RECURRING = [
+    ('ACH D- TP ACH HDFCMF-SIP 582043', 5000.00, 30),
+    ('EMI 48213567 CHQ S48213567 0523', 18450.00, 30),
+    ('NEFT DR-SBIN0001234-SUNDARAM PROPERTIES-NETBANK RENT', 25000.00, 30),
+    ('POS 416021XXXXXX4821 NETFLIX.COM', 649.00, 30),
+    ('UPI-NAMMA METRO-metro@okaxis-UTIB0000553-TOPUP', 500.00, 7),
+]
+
+TERMS = [
+    'STATEMENT SUMMARY AND IMPORTANT INFORMATION',
+    '',
+    'Contents of this statement will be considered correct if no error is reported within 30 days',
+    'of receipt of statement. The address on this statement is that on record with the Bank as at',
+    'the day of requesting this statement.',
+    '',
+    'State account branch GSTN: 33AAACH2702H1Z6',
+    'HDFC Bank GSTIN number details are available at https://www.hdfcbank.com/personal/making-payments/',
+    'Registered Office Address: HDFC Bank House, Senapati Bapat Marg, Lower Parel, Mumbai 400013',
+    '',
+    '*Closing balance includes funds earmarked for hold and uncleared funds.',
+    'This is a computer generated statement and does not require signature.',
+]
+
+
+def format_amount(amount):
+    """Format an amount the way HDFC statements do (Indian grouping is not used)."""
+    return f"{amount:,.2f}"
+
+
+def wrap(text, width):
+    """Split text into lines of at most `width` characters, preferring '-' and ' ' breaks."""
+    lines = []
+    while len(text) > width:
+        cut = max(text.rfind('-', 0, width), text.rfind(' ', 0, width))
+        cut = cut + 1 if cut > width // 2 else width
+        lines.append(text[:cut].rstrip())
+        text = text[cut:].lstrip()
+    lines.append(text)
+    return lines
+
+
+class StatementData:
+    """Deterministic stream of HDFC-style transactions."""
+
+    def __init__(self, seed=0, start=date(2023, 4, 1), opening_balance=250000.00,
+                 multiline_ratio=0.35):
+        self.rng = random.Random(seed)
+        self.day = start
+        self.balance = opening_balance
+        self.opening_balance = opening_balance
+        self.multiline_ratio = multiline_ratio
+        self.sequence = 0
+        self.debits = 0
+        self.credits = 0
+        self.total_debits = 0.0
+        self.total_credits = 0.0
+        self.next_recurring = [start + timedelta(days=i * 3) for i in range(len(RECURRING))]
+        # Row generated for a page it did not fit on; it opens the next page
+        self.pending = None
+        self._snapshot = None
+
+    def _narration(self):
+        rng = self.rng
+        kind = rng.random()
+        ref = f"{rng.randrange(10 ** 11, 10 ** 12)}"
+        if kind < 0.45:
+            name = rng.choice(MERCHANTS + PEOPLE)
+            vpa = name.lower().replace(' ', '') + '@' + rng.choice(BANKS)
+            note = rng.choice(['PAYMENT FROM PHONE', 'UPI', 'SENT USING PAYTM UPI', 'COLLECT REQUEST'])
+            return f"UPI-{name}-{vpa}-{rng.choice(IFSC)}-{ref}-{note}", False
+        if kind < 0.60:
+            return f"NEFT CR-{rng.choice(IFSC)}-{rng.choice(PEOPLE)}-{rng.choice(PEOPLE)}-{ref}", True
+        if kind < 0.70:
+            return f"IMPS-{ref}-{rng.choice(PEOPLE)}-{rng.choice(IFSC)[:4]}-XXXXXXXX{rng.randrange(1000, 9999)}-TRANSFER", rng.random() < 0.5
+        if kind < 0.80:
+            return f"POS 416021XXXXXX4821 {rng.choice(MERCHANTS)} {rng.choice(['BANGALORE', 'CHENNAI', 'MUMBAI'])}", False
+        if kind < 0.86:
+            return f"ATW-416021XXXXXX4821-S1ACBL{rng.randrange(100, 999)}-{rng.choice(['CHENNAI', 'PUNE'])}", False
+        if kind < 0.90:
+            return f"CHQ PAID-MICR CTS-CH-{rng.choice(PEOPLE)}", False
+        if kind < 0.94:
+            return f"SALARY-{rng.choice(['ACME TECHNOLOGIES PVT LTD', 'BETTERPLACE SAFETY SOLUTIONS'])}-{self.day:%b%Y}".upper(), True
+        if kind < 0.97:
+            return f"INTEREST PAID TILL {self.day:%d-%b-%Y}".upper(), True
+        return f"CONSOLIDATED CHARGES FOR A/C {rng.choice(['SMS ALERTS', 'DEBIT CARD ANNUAL FEE'])}", False
+
+    def take(self):
+        """Return the pending row if there is one, else a new transaction."""
+        cells, self.pending = self.pending, None
+        return cells or self.next_transaction()
+
+    def rollback(self):
+        """Forget the pending row, restoring the totals from before it was generated."""
+        if self.pending is not None:
+            (self.balance, self.debits, self.credits,
+             self.total_debits, self.total_credits) = self._snapshot
+            self.pending = None
+
+    def next_transaction(self):
+        """Return the cells of the next transaction row (the narration as a list of lines)."""
+        rng = self.rng
+        self.sequence += 1
+        self._snapshot = (self.balance, self.debits, self.credits, self.total_debits, self.total_credits)
+        if rng.random() < 0.6:
+            self.day += timedelta(days=1)
+
+        narration, is_credit = None, False
+        for i, due in enumerate(self.next_recurring):
+            if due <= self.day:
+                narration, amount, interval = RECURRING[i]
+                self.next_recurring[i] = due + timedelta(days=interval)
+                break
+        if narration is None:
+            narration, is_credit = self._narration()
+            amount = round(rng.lognormvariate(7.0, 1.3), 2) if not narration.startswith('SALARY') else 85000.00
+            if narration.startswith('INTEREST'):
+                amount = round(rng.uniform(50, 900), 2)
+
+        if rng.random() < self.multiline_ratio:
+            narration = f"{narration}-{rng.choice(['MONTHLY', 'ONLINE', 'BILLPAY'])} REF {rng.randrange(10 ** 9, 10 ** 10)}"
+
+        if is_credit:
+            self.balance += amount
+            self.credits += 1
+            self.total_credits += amount
+        else:
+            self.balance -= amount
+            self.debits += 1
+            self.total_debits += amount
+
+        value_day = self.day + timedelta(days=1 if rng.random() < 0.05 else 0)
+        cells = [
+            f"{self.day:%d/%m/%y}",
+            wrap(narration, NARRATION_WIDTH),
+            f"{rng.randrange(10 ** 15, 10 ** 16):016d}",
+            f"{value_day:%d/%m/%y}",
+            '' if is_credit else format_amount(amount),
+            format_amount(amount) if is_credit else '',
+            format_amount(self.balance),
+        ]
+        return cells
+
+
+class PDFWriter:
+    """Minimal PDF 1.4 writer: pages of Helvetica text and stroked lines."""
+
+    def __init__(self):
+        self.pages = []
+
+    def add_page(self, operations):
+        self.pages.append('\n'.join(operations).encode('latin-1'))
+
+    def to_bytes(self):
+        objects = {}
+        # 1: catalog, 2: pages tree, 3/4: fonts, then a (page, content) pair per page
+        page_ids = [5 + 2 * i for i in range(len(self.pages))]
+        objects[1] = b"<< /Type /Catalog /Pages 2 0 R >>"
+        objects[2] = (
+            f"<< /Type /Pages /Count {len(self.pages)} /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] >>"
+        ).encode()
+        objects[3] = b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"
+        objects[4] = b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>"
+        for page_id, content in zip(page_ids, self.pages):
+            objects[page_id] = (
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+                f"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {page_id + 1} 0 R >>"
+            ).encode()
+            stream = zlib.compress(content)
+            objects[page_id + 1] = (
+                f"<< /Length {len(stream)} /Filter /FlateDecode >>\nstream\n".encode() + stream + b"\nendstream"
+            )
+
+        out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        offsets = {}
+        for number in sorted(objects):
+            offsets[number] = len(out)
+            out += f"{number} 0 obj\n".encode() + objects[number] + b"\nendobj\n"
+        xref = len(out)
+        count = max(objects) + 1
+        out += f"xref\n0 {count}\n0000000000 65535 f \n".encode()
+        for number in range(1, count):
+            out += f"{offsets[number]:010d} 00000 n \n".encode()
+        out += f"trailer\n<< /Size {count} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+        return bytes(out)
+
+
+def _escape(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def _text(x, y, text, bold=False, size=FONT_SIZE):
+    return f"BT /{'F2' if bold else 'F1'} {size} Tf {x:.2f} {y:.2f} Td ({_escape(text)}) Tj ET"
+
+
+def _text_width(text, size=FONT_SIZE):
+    # Helvetica digits and most capitals are ~0.556-0.667 em; close enough for alignment
+    return len(text) * size * 0.56
+
+
+def _line(x1, y1, x2, y2):
+    return f"{x1:.2f} {y1:.2f} m {x2:.2f} {y2:.2f} l S"
+
+
+def _header_block(page_number, account_number, period):
+    ops = [
+        _text(MARGIN_LEFT, 805, 'HDFC BANK LIMITED', bold=True, size=11),
+        _text(PAGE_WIDTH - 120, 805, f"Page No .: {page_number}", size=7),
+    ]
+    if page_number == 1:
+        ops += [
+            _text(MARGIN_LEFT, 785, 'MR. SYNTHETIC ACCOUNT HOLDER', bold=True, size=8),
+            _text(MARGIN_LEFT, 775, 'NO 12, EXAMPLE STREET, ANNA NAGAR', size=7),
+            _text(MARGIN_LEFT, 766, 'CHENNAI 600040 TAMIL NADU INDIA', size=7),
+            _text(330, 785, f"Account No : {account_number}   SAVINGS", size=7),
+            _text(330, 776, 'Account Branch : ANNA NAGAR CHENNAI', size=7),
+            _text(330, 767, 'RTGS/NEFT IFSC : HDFC0000001   MICR : 600240002', size=7),
+            _text(330, 758, f"Statement From : {period}", size=7),
+        ]
+    return ops
+
+
+def _table(rows, top):
+    """Draw a ruled table; rows are lists of cells (str or list of lines)."""
+    ops = ['0.5 w']
+    x_positions = [MARGIN_LEFT]
+    for _, width, _ in COLUMNS:
+        x_positions.append(x_positions[-1] + width)
+    right = x_positions[-1]
+
+    y = top
+    ops.append(_line(MARGIN_LEFT, y, right, y))
+    for row, bold in rows:
+        lines = max(len(cell) if isinstance(cell, list) else 1 for cell in row)
+        height = lines * LINE_HEIGHT + 2 * CELL_PADDING
+        for (cell, (x, (_, width, right_aligned))) in zip(row, zip(x_positions, COLUMNS)):
+            cell_lines = cell if isinstance(cell, list) else [cell]
+            for i, text in enumerate(cell_lines):
+                if not text:
+                    continue
+                tx = x + width - CELL_PADDING - _text_width(text) if right_aligned else x + CELL_PADDING
+                ty = y - CELL_PADDING - (i + 1) * LINE_HEIGHT + 2
+                ops.append(_text(tx, ty, text, bold=bold))
+        y -= height
+        ops.append(_line(MARGIN_LEFT, y, right, y))
+    for x in x_positions:
+        ops.append(_line(x, top, x, y))
+    return ops, y
+
+
+def _row_height(row):
+    lines = max(len(cell) if isinstance(cell, list) else 1 for cell in row)
+    return lines * LINE_HEIGHT + 2 * CELL_PADDING
+
+
+def build_statement(pages=10, rows_per_page=25, multiline_ratio=0.35, seed=0,
+                    cover_pages=0, trailer_pages=1, start=date(2023, 4, 1)):
+    """
+    Build a synthetic HDFC statement PDF.
+
+    Args:
+        pages (int): Number of pages carrying transaction tables (1-500)
+        rows_per_page (int): Target transaction rows per page; fewer are
+            placed when multi-line narrations fill the page
+        multiline_ratio (float): Fraction of narrations long enough to wrap
+        seed (int): Random seed; the same arguments always give the same PDF
+        cover_pages (int): Text-only pages before the first transaction page
+        trailer_pages (int): Statement summary / terms pages after the last one
+        start (date): Date of the first transaction
+
+    Returns:
+        tuple: (pdf bytes, info dict with transaction and page counts)
+    """
+    if not 1 <= pages <= 500:
+        raise ValueError("pages must be between 1 and 500")
+
+    data = StatementData(seed=seed, start=start, multiline_ratio=multiline_ratio)
+    writer = PDFWriter()
+    account_number = f"50100{seed % 10 ** 9:09d}"
+    header = [[name for name, _, _ in COLUMNS], True]
+    transaction_pages = []
+    total_rows = 0
+    page_number = 0
+
+    for _ in range(cover_pages):
+        page_number += 1
+        ops = _header_block(page_number, account_number, '')
+        ops.append(_text(MARGIN_LEFT, 700, 'Important messages for our customers', bold=True, size=9))
+        for i, line in enumerate(TERMS[2:]):
+            ops.append(_text(MARGIN_LEFT, 680 - i * 12, line, size=7))
+        writer.add_page(ops)
+
+    period_start = start
+    for _ in range(pages):
+        page_number += 1
+        top = 740 if page_number == 1 else 790
+        rows = [(header[0], True)]
+        available = top - MARGIN_BOTTOM - _row_height(header[0])
+        placed = 0
+        while placed < rows_per_page:
+            cells = data.take()
+            height = _row_height(cells)
+            if height > available and placed:
+                # The row opens the next page instead
+                data.pending = cells
+                break
+            rows.append((cells, False))
+            available -= height
+            placed += 1
+        ops = _header_block(page_number, account_number, f"{period_start:%d/%m/%Y}")
+        table_ops, _ = _table(rows, top)
+        writer.add_page(ops + table_ops)
+        transaction_pages.append(page_number)
+        total_rows += placed
+
+    data.rollback()
+    for i in range(trailer_pages):
+        page_number += 1
+        ops = _header_block(page_number, account_number, '')
+        if i == 0:
+            summary_rows = [
+                (['Opening Balance', 'Dr Count', 'Cr Count', 'Debits', 'Credits', 'Closing Bal', ''], True),
+                ([format_amount(data.opening_balance), str(data.debits), str(data.credits),
+                  format_amount(data.total_debits), format_amount(data.total_credits),
+                  format_amount(data.balance), ''], False),
+            ]
+            table_ops, y = _table(summary_rows, 780)
+            ops += table_ops
+        else:
+            y = 780
+        for j, line in enumerate(TERMS):
+            ops.append(_text(MARGIN_LEFT, y - 20 - j * 12, line, bold=(j == 0), size=7))
+        writer.add_page(ops)
+
+    info = {
+        'pages': page_number,
+        'transaction_pages': transaction_pages,
+        'transactions': total_rows,
+        'closing_balance': round(data.balance, 2),
+    }
+    return writer.to_bytes(), info
+
+
+def write_statement(path, **kwargs):
+    """Write a synthetic statement to `path`; see build_statement() for options."""
+    pdf, info = build_statement(**kwargs)
+    with open(path, 'wb') as f:
+        f.write(pdf)
+    return info
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic HDFC Bank statement PDF for tests and benchmarks"
+    )
+    parser.add_argument('output', help='Path of the PDF to write')
+    parser.add_argument('--pages', type=int, default=10, help='Transaction pages, 1-500 (default: 10)')
+    parser.add_argument('--rows-per-page', type=int, default=25, help='Target rows per page (default: 25)')
+    parser.add_argument('--multiline-ratio', type=float, default=0.35,
+                        help='Fraction of wrapped narrations (default: 0.35)')
+    parser.add_argument('--cover-pages', type=int, default=0, help='Text-only pages before the table')
+    parser.add_argument('--trailer-pages', type=int, default=1, help='Summary/terms pages at the end')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    args = parser.parse_args()
+
+    info = write_statement(
+        args.output, pages=args.pages, rows_per_page=args.rows_per_page,
+        multiline_ratio=args.multiline_ratio, cover_pages=args.cover_pages,
+        trailer_pages=args.trailer_pages, seed=args.seed
+    )
+    print(f"Wrote {args.output}: {info['pages']} pages, {info['transactions']} transactions")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -50,7 +50,7 @@ setup(
         "Operating System :: OS Independent",
     ],
     packages=find_packages(),
-    py_modules=["hdfc_converter"],
+    py_modules=["hdfc_converter", "hdfc_ledger", "hdfc_shard"],
     python_requires=">=3.8",
     install_requires=read_requirements(),
     entry_points={
@@ -12,149 +12,1832 @@ Repository: https://github.com/vishwaraja/hdfc-pdf-converter
 """
 
 import argparse
+import atexit
+import contextvars
+import csv
+import functools
+import gc
+import hashlib
+import inspect
+import io
+import json
+import queue
+import shutil
 import sys
 import os
-import pandas as pd
-import camelot
+import re
+import tempfile
+import threading
+import time
+from contextlib import closing, contextmanager
 from datetime import datetime
 import logging
+import logging.handlers
+import uuid
 from pathlib import Path
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('hdfc_conversion.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+# pandas and camelot (which pulls in OpenCV and pdfminer) are imported inside
+# the stages that need them, so importing this module stays cheap and has no
+# side effects. Logging is configured by main(), never at import time.
 logger = logging.getLogger(__name__)
 
+# Log file written by command line runs, as JSON lines
+LOG_FILE = 'hdfc_conversion.log'
+
+# Id of the conversion the current thread works for; stamped on log records
+JOB_ID = contextvars.ContextVar('job_id', default=None)
+
+# Output artifacts: format -> filename template
+ARTIFACT_FILES = {
+    'csv': 'hdfc_transactions_{timestamp}.csv',
+    'excel': 'hdfc_transactions_{timestamp}.xlsx',
+    'stats': 'extraction_stats_{timestamp}.csv',
+    'summary': 'summary_{timestamp}.csv',
+    'monthly': 'monthly_summary_{timestamp}.csv',
+    'recurring': 'recurring_payments_{timestamp}.csv',
+    'report': 'EXTRACTION_REPORT_{timestamp}.md',
+    'timings': 'stage_timings_{timestamp}.csv',
+}
+
+# Text-layer signs of a transaction page: the table header, or a line that
+# starts with a date and carries an amount
+TRANSACTION_HEADER_PATTERN = re.compile(r'Narration.*(?:Withdrawal|Closing\s+Balance)', re.IGNORECASE)
+TRANSACTION_LINE_PATTERN = re.compile(r'^\s*\d{2}/\d{2}/\d{2,4}\b.*\d\.\d{2}\b', re.MULTILINE)
+
+# Transaction rows start a text-layer line with their date; the page index
+# reads each page's first and last transaction date from them
+TRANSACTION_DATE_PATTERN = re.compile(r'^\s*(\d{2}/\d{2}/\d{2,4})\s', re.MULTILINE)
+
+# Text-layer signs of an HDFC Bank statement: the bank's name or one of its
+# IFSC codes. preflight() looks for them (or the table header) on the first pages
+HDFC_MARKER_PATTERN = re.compile(r'HDFC\s*BANK|\bHDFC0\w{6}\b', re.IGNORECASE)
+PREFLIGHT_TEXT_PAGES = 2
+
+# Items (tables, or pages of transactions) allowed in flight between pipeline
+# stages; a full queue blocks the stage feeding it, which bounds memory
+PIPELINE_QUEUE_SIZE = 2
+
+# camelot options per flavor. split_text, flag_size and copy_text keep
+# camelot's memory use down on dense pages; copy_text only applies to
+# lattice (ruled) tables, and camelot rejects it for stream
+LATTICE_OPTIONS = {'line_scale': 40, 'split_text': True, 'flag_size': True, 'copy_text': ['v']}
+STREAM_OPTIONS = {'split_text': True, 'flag_size': True}
+
+# Resumable conversions: checkpoint directory (under the output directory
+# unless given) and the format version, bumped whenever parsing changes what
+# a page's saved results would contain
+CHECKPOINT_DIR = '.checkpoints'
+CHECKPOINT_VERSION = 1
+
+# Page -> transaction date range indexes, cached per PDF hash under the
+# output directory; the version is bumped whenever the index format changes
+PAGE_INDEX_DIR = '.page_index'
+PAGE_INDEX_VERSION = 1
+
+# Statement dates (DD/MM/YY, DD/MM/YYYY) and ISO dates given on the command line or in API filters
+DATE_FORMATS = ('%d/%m/%y', '%d/%m/%Y', '%Y-%m-%d')
+
+# Low-cardinality transaction columns held as pandas categoricals
+CATEGORICAL_COLUMNS = ('Category', 'Page_Number', 'Counterparty')
+
+# Month label for transactions whose date could not be parsed
+UNDATED_MONTH = 'undated'
+
+# Recurring payment detection: accepted gaps in days per frequency, the
+# share of gaps that must fall in range, the fewest payments in a series and
+# the relative width of an amount band
+RECURRING_PERIODS = {'weekly': (5, 9), 'monthly': (25, 35)}
+RECURRING_REGULARITY = 0.75
+RECURRING_MIN_OCCURRENCES = 3
+AMOUNT_BAND_WIDTH = 0.05
+
+# Counterparty name in UPI, NEFT, RTGS and IMPS narrations, e.g.
+# 'UPI-SWIGGY-swiggy@ybl-...', 'NEFT CR-HDFC0000001-RAMESH KUMAR-...',
+# 'IMPS-312345678901-PRIYA SHARMA-SBIN-...'. One named group per scheme;
+# wrapped narrations may carry newlines or spaces around the dashes.
+COUNTERPARTY_PATTERNS = {
+    'UPI': r'UPI\s*-\s*(?P<UPI>[^-@]+?)\s*-',
+    'NEFT': r'NEFT\s*(?:CR|DR)\s*-\s*[A-Z]{4}0[A-Z0-9]{6}\s*-\s*(?P<NEFT>[^-]+?)\s*(?:-|$)',
+    'RTGS': r'RTGS\s*(?:CR|DR)\s*-\s*[A-Z]{4}0[A-Z0-9]{6}\s*-\s*(?P<RTGS>[^-]+?)\s*(?:-|$)',
+    'IMPS': r'IMPS\s*-\s*\d+\s*-\s*(?P<IMPS>[^-]+?)\s*(?:-|$)',
+}
+COUNTERPARTY_PATTERN = re.compile(
+    r'^\s*(?:' + '|'.join(COUNTERPARTY_PATTERNS.values()) + ')', re.IGNORECASE
+)
+
+# Counterparties listed in the markdown report
+REPORT_TOP_COUNTERPARTIES = 15
+
+# Narration words that vary between payments to the same counterparty
+NARRATION_NOISE_WORDS = (
+    'ref', 'monthly', 'online', 'billpay', 'payment', 'from', 'phone', 'sent', 'using',
+    'collect', 'request', 'transfer', 'netbank', 'topup', 'dr', 'cr',
+)
+NARRATION_NOISE_PATTERN = re.compile(
+    r'\b(?:\w*\d\w*|[a-z]|' + '|'.join(NARRATION_NOISE_WORDS) + r')\b ?'
+)
+
+# First arguments that select the ledger subcommands instead of a conversion
+LEDGER_COMMANDS = ('export', 'query')
+
+# Subcommands handled by hdfc_shard
+SHARD_COMMANDS = ('coordinate', 'worker')
+
+# Suffixes accepted by parse_size()
+SIZE_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+
+class JobIdFilter(logging.Filter):
+    """Stamp each record with the id of the conversion that emitted it."""
+    
+    def filter(self, record):
+        if not hasattr(record, 'job_id'):
+            record.job_id = JOB_ID.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line."""
+    
+    def format(self, record):
+        entry = {
+            'time': f"{self.formatTime(record, '%Y-%m-%dT%H:%M:%S')}.{int(record.msecs):03d}",
+            'level': record.levelname,
+            'logger': record.name,
+            'job_id': getattr(record, 'job_id', None),
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+@contextmanager
+def job_context(job_id):
+    """Attribute log records emitted in this block (and by pipeline threads it starts) to job_id."""
+    token = JOB_ID.set(job_id)
+    try:
+        yield
+    finally:
+        JOB_ID.reset(token)
+
+
+def with_job_id(method):
+    """Run an HDFCConverter method, or each step of a generator method, under the converter's job id."""
+    if inspect.isgeneratorfunction(method):
+        # Only while the generator runs: the id must not leak to the caller between items
+        @functools.wraps(method)
+        def generator(self, *args, **kwargs):
+            with closing(method(self, *args, **kwargs)) as steps:
+                while True:
+                    with job_context(self.job_id):
+                        try:
+                            item = next(steps)
+                        except StopIteration:
+                            return
+                    yield item
+        return generator
+    
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with job_context(self.job_id):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def parse_size(text):
+    """Parse a byte count such as '1048576', '512M' or '2GB'."""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMG]?)(?:I?B)?\s*', str(text).upper())
+    if not match or float(match.group(1)) <= 0:
+        raise ValueError(f"Invalid size: {text}")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2)])
+
+
+def parse_pages(text):
+    """Parse a page selection such as '5', '1-3' or '1-3,7,10-12' into sorted page numbers."""
+    pages = set()
+    for part in str(text).split(','):
+        match = re.fullmatch(r'\s*(\d+)\s*(?:-\s*(\d+)\s*)?', part)
+        if not match:
+            raise ValueError(f"Invalid page selection: {text}")
+        first = int(match.group(1))
+        last = int(match.group(2) or first)
+        if first < 1 or last < first:
+            raise ValueError(f"Invalid page range: {part.strip()}")
+        pages.update(range(first, last + 1))
+    return sorted(pages)
+
+
+def parse_statement_date(text):
+    """Parse a statement date (DD/MM/YY or DD/MM/YYYY) or an ISO YYYY-MM-DD date; None if it is neither."""
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(str(text).strip(), fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_date_option(text):
+    """Parse a --since/--until date, raising ValueError for anything else."""
+    date = parse_statement_date(text)
+    if date is None:
+        raise ValueError(f"Invalid date (use YYYY-MM-DD or DD/MM/YYYY): {text}")
+    return date
+
+
+def current_rss():
+    """Resident set size of this process in bytes, or None if it cannot be read."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return None
+
+
+def transactions_frame(transactions):
+    """
+    Build the transactions DataFrame with CATEGORICAL_COLUMNS dictionary-encoded.
+    
+    Args:
+        transactions (DataFrame or list): Transactions; a DataFrame is not modified
+    
+    Returns:
+        DataFrame: Category, Page_Number and Counterparty (where present) as
+        'category' dtype, everything else as given
+    """
+    import pandas as pd
+    
+    df = pd.DataFrame(transactions)
+    encode = {column: 'category' for column in CATEGORICAL_COLUMNS
+              if column in df and not isinstance(df[column].dtype, pd.CategoricalDtype)}
+    return df.astype(encode) if encode else df
+
+
+def parse_statement_dates(dates):
+    """Parse a Series of statement dates (DD/MM/YY, or DD/MM/YYYY) into datetimes; unparseable dates are NaT."""
+    import pandas as pd
+    
+    dates = dates.astype(str).str.strip()
+    parsed = pd.to_datetime(dates, format='%d/%m/%y', errors='coerce')
+    missing = parsed.isna()
+    if missing.any():
+        parsed[missing] = pd.to_datetime(dates[missing], format='%d/%m/%Y', errors='coerce')
+    return parsed
+
+
+def compute_rollups(df, dates=None):
+    """
+    Month x category rollups and per-month totals with opening/closing balances.
+    
+    Args:
+        df (DataFrame): Categorized transactions in statement order, with
+            Withdrawal_Numeric and Deposit_Numeric columns
+        dates (Series, optional): df['Date'] already parsed with parse_statement_dates()
+    
+    Returns:
+        tuple: (monthly, totals). monthly is indexed by (Month, Category)
+        with Transactions, Debit, Credit and Net columns; undated rows fall
+        under Month 'undated'. totals is indexed by Month with the same
+        columns plus Opening_Balance (before the month's first transaction)
+        and Closing_Balance (after its last).
+    """
+    import pandas as pd
+    
+    if dates is None:
+        dates = parse_statement_dates(df['Date'])
+    # Group on an integer YYYYMM key and format only the resulting labels
+    month = (dates.dt.year * 100 + dates.dt.month).fillna(0).astype('int64')
+    closing = df['Closing_Balance'] if 'Closing_Balance' in df else pd.Series('', index=df.index)
+    frame = pd.DataFrame({
+        'Month': month.values,
+        'Category': df['Category'].values,
+        'Debit': df['Withdrawal_Numeric'].fillna(0.0).values,
+        'Credit': df['Deposit_Numeric'].fillna(0.0).values,
+        'Balance': pd.to_numeric(closing.astype(str).str.replace(',', ''), errors='coerce').values,
+    })
+    frame['Net'] = frame['Credit'] - frame['Debit']
+    
+    grouped = frame.groupby(['Month', 'Category'], observed=True)
+    monthly = grouped[['Debit', 'Credit', 'Net']].sum()
+    monthly.insert(0, 'Transactions', grouped.size())
+    
+    totals = monthly.groupby(level='Month').sum()
+    with_balance = frame[(frame['Month'] > 0) & frame['Balance'].notna()]
+    by_month = with_balance.groupby('Month')
+    first = by_month[['Balance', 'Net']].first()
+    totals['Opening_Balance'] = first['Balance'] - first['Net']
+    totals['Closing_Balance'] = by_month['Balance'].last()
+    
+    def label(key):
+        return f"{key // 100:04d}-{key % 100:02d}" if key else UNDATED_MONTH
+    
+    monthly.index = monthly.index.set_levels(monthly.index.levels[0].map(label), level='Month')
+    totals.index = totals.index.map(label).rename('Month')
+    return monthly.round(2), totals.round(2)
+
+
+def merge_rollups(rollups):
+    """
+    Combine several statements' compute_rollups() results, month by month.
+    
+    Args:
+        rollups (list): (monthly, totals) pairs, earliest statement first
+    
+    Returns:
+        tuple: (monthly, totals) with counts and amounts summed per month
+        (and category); a month opens at the opening balance of the first
+        statement covering it and closes at the closing balance of the last
+    """
+    import pandas as pd
+    
+    monthly = pd.concat([monthly for monthly, _ in rollups])
+    monthly = monthly.groupby(level=['Month', 'Category'], observed=True).sum()
+    grouped = pd.concat([totals for _, totals in rollups]).groupby(level='Month')
+    totals = grouped[['Transactions', 'Debit', 'Credit', 'Net']].sum()
+    # first() and last() skip months a statement has no balance for
+    totals['Opening_Balance'] = grouped['Opening_Balance'].first()
+    totals['Closing_Balance'] = grouped['Closing_Balance'].last()
+    return monthly.round(2), totals.round(2)
+
+
+def extract_counterparties(narrations):
+    """
+    Counterparty names from UPI, NEFT, RTGS and IMPS narrations, vectorised over a Series.
+    
+    All schemes are matched by a single str.extract with COUNTERPARTY_PATTERN;
+    names are upper-cased with whitespace collapsed, and narrations of other
+    kinds give ''.
+    """
+    if not len(narrations):
+        return narrations.astype(object)
+    groups = narrations.astype(str).str.extract(COUNTERPARTY_PATTERN)
+    # At most one scheme matches per row: coalesce the groups column by column
+    names = groups[list(COUNTERPARTY_PATTERNS)[0]]
+    for scheme in list(COUNTERPARTY_PATTERNS)[1:]:
+        names = names.fillna(groups[scheme])
+    return names.str.replace(r'\s+', ' ', regex=True).str.upper().fillna('')
+
+
+def summarize_counterparties(df):
+    """
+    Per-counterparty totals.
+    
+    Args:
+        df (DataFrame): Transactions with Counterparty, Withdrawal_Numeric and
+            Deposit_Numeric columns
+    
+    Returns:
+        DataFrame: Indexed by Counterparty with Transactions, Debit, Credit
+        and Net columns, largest turnover (debits plus credits) first;
+        transactions without a counterparty are left out
+    """
+    import pandas as pd
+    
+    named = df['Counterparty'] != ''
+    frame = pd.DataFrame({
+        'Counterparty': df['Counterparty'][named],
+        'Debit': df['Withdrawal_Numeric'][named].fillna(0.0),
+        'Credit': df['Deposit_Numeric'][named].fillna(0.0),
+    })
+    grouped = frame.groupby('Counterparty', observed=True)
+    totals = grouped[['Debit', 'Credit']].sum()
+    totals.insert(0, 'Transactions', grouped.size())
+    totals['Net'] = totals['Credit'] - totals['Debit']
+    totals.index = totals.index.astype(object)
+    order = (totals['Debit'] + totals['Credit']).sort_values(ascending=False, kind='stable').index
+    return totals.loc[order].round(2)
+
+
+def normalise_counterparties(narrations):
+    """
+    Reduce narrations to a stable counterparty key, vectorised over a Series.
+    
+    Reference numbers, card masks and other digit-bearing tokens, single
+    letters and filler words are dropped and the first three remaining
+    words kept, so 'POS 416021XXXXXX4821 NETFLIX.COM-ONLINE REF 123' and
+    'POS 416021XXXXXX4821 NETFLIX.COM' both become 'pos netflix com'.
+    """
+    words = (narrations.astype(str).str.lower()
+             .str.replace(r'[^a-z0-9]+', ' ', regex=True)
+             .str.replace(NARRATION_NOISE_PATTERN, '', regex=True))
+    return words.str.extract(r'^ *(\S+(?: \S+){0,2})', expand=False).fillna('')
+
+
+def detect_recurring(df, dates=None):
+    """
+    Find recurring debits (EMIs, SIPs, rent, subscriptions) in one grouped pass.
+    
+    Debits are hashed on (counterparty, amount band) so payments of roughly
+    the same amount to the same counterparty share a key; the day gaps
+    between consecutive payments in each group are then checked against
+    RECURRING_PERIODS. Apart from a sort when the statement is not already
+    in date order, every step is a linear vectorised operation.
+    
+    Args:
+        df (DataFrame): Categorized transactions with a Withdrawal_Numeric column;
+            the Counterparty column is used where set, the normalised
+            narration elsewhere
+        dates (Series, optional): df['Date'] already parsed with parse_statement_dates()
+    
+    Returns:
+        DataFrame: One row per recurring series with Counterparty, Category,
+        Frequency, Payments, Amount (median), Total, First_Date, Last_Date and
+        Next_Expected, largest total first
+    """
+    import numpy as np
+    import pandas as pd
+    
+    columns = ['Counterparty', 'Category', 'Frequency', 'Payments', 'Amount', 'Total',
+               'First_Date', 'Last_Date', 'Next_Expected']
+    if dates is None:
+        dates = parse_statement_dates(df['Date'])
+    amounts = df['Withdrawal_Numeric']
+    debits = (amounts > 0) & dates.notna()
+    if not debits.any():
+        return pd.DataFrame(columns=columns)
+    
+    counterparties = df['Counterparty'][debits].astype(object) if 'Counterparty' in df else pd.Series('', index=df.index[debits])
+    missing = counterparties == ''
+    if missing.any():
+        counterparties = counterparties.where(~missing, normalise_counterparties(df['Narration'][debits][missing]))
+    frame = pd.DataFrame({
+        'Counterparty': counterparties,
+        'Category': df['Category'][debits].astype(object),
+        'Amount': amounts[debits],
+        'Date': dates[debits],
+    })
+    frame['Band'] = np.floor(np.log(frame['Amount']) / np.log1p(AMOUNT_BAND_WIDTH)).astype('int64')
+    frame['Key'] = pd.util.hash_pandas_object(frame[['Counterparty', 'Band']], index=False)
+    if not frame['Date'].is_monotonic_increasing:
+        frame = frame.sort_values('Date', kind='stable')
+    
+    gaps = frame.groupby('Key', sort=False)['Date'].diff().dt.days
+    for frequency, (low, high) in RECURRING_PERIODS.items():
+        frame[frequency] = gaps.between(low, high)
+    frame['Gap'] = gaps
+    
+    grouped = frame.groupby('Key', sort=False)
+    series = grouped.agg(
+        Counterparty=('Counterparty', 'first'),
+        Category=('Category', 'first'),
+        Payments=('Amount', 'size'),
+        Amount=('Amount', 'median'),
+        Total=('Amount', 'sum'),
+        First=('Date', 'min'),
+        Last=('Date', 'max'),
+        Gap=('Gap', 'median'),
+        **{frequency: (frequency, 'sum') for frequency in RECURRING_PERIODS}
+    )
+    series = series[(series['Payments'] >= RECURRING_MIN_OCCURRENCES) & (series['Counterparty'] != '')]
+    
+    series['Frequency'] = None
+    for frequency in RECURRING_PERIODS:
+        regular = series[frequency] >= RECURRING_REGULARITY * (series['Payments'] - 1)
+        series.loc[regular & series['Frequency'].isna(), 'Frequency'] = frequency
+    series = series[series['Frequency'].notna()]
+    
+    recurring = pd.DataFrame({
+        'Counterparty': series['Counterparty'],
+        'Category': series['Category'],
+        'Frequency': series['Frequency'],
+        'Payments': series['Payments'],
+        'Amount': series['Amount'].round(2),
+        'Total': series['Total'].round(2),
+        'First_Date': series['First'].dt.strftime('%d/%m/%y'),
+        'Last_Date': series['Last'].dt.strftime('%d/%m/%y'),
+        'Next_Expected': (series['Last'] + pd.to_timedelta(series['Gap'].round(), unit='D')).dt.strftime('%d/%m/%y'),
+    }, columns=columns)
+    return recurring.sort_values('Total', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def summarize_transactions(transactions):
+    """
+    Summary statistics of categorized transactions.
+    
+    Args:
+        transactions (DataFrame or list): Categorized transactions
+    
+    Returns:
+        dict: Totals, date_range and the category, monthly, counterparty and
+        recurring-payment tables
+    """
+    import pandas as pd
+    
+    logger.info("Generating summary statistics...")
+    
+    df = transactions_frame(transactions)
+    
+    # Convert amounts to numeric
+    df['Withdrawal_Numeric'] = pd.to_numeric(
+        df['Withdrawal_Amount'].str.replace(',', ''), 
+        errors='coerce'
+    )
+    df['Deposit_Numeric'] = pd.to_numeric(
+        df['Deposit_Amount'].str.replace(',', ''), 
+        errors='coerce'
+    )
+    
+    # Calculate totals
+    total_withdrawals = df['Withdrawal_Numeric'].sum()
+    total_deposits = df['Deposit_Numeric'].sum()
+    net_amount = total_deposits - total_withdrawals
+    
+    # Month x category rollups; the whole-period breakdown is read from them
+    dates = parse_statement_dates(df['Date'])
+    monthly_breakdown, monthly_totals = compute_rollups(df, dates)
+    rollup = monthly_breakdown.groupby(level='Category', observed=True).sum()
+    rollup.index = rollup.index.astype(object)
+    category_summary = pd.DataFrame({
+        'Withdrawal_Numeric': rollup['Debit'],
+        'Deposit_Numeric': rollup['Credit'],
+        'Date': rollup['Transactions'],
+    }).round(2)
+    
+    category_summary['Net_Amount'] = (
+        category_summary['Deposit_Numeric'] - category_summary['Withdrawal_Numeric']
+    )
+    
+    if 'Counterparty' not in df:
+        df['Counterparty'] = extract_counterparties(df['Narration'])
+    counterparty_breakdown = summarize_counterparties(df)
+    recurring = detect_recurring(df, dates)
+    
+    if dates.notna().any():
+        date_range = {'start': df['Date'][dates.idxmin()], 'end': df['Date'][dates.idxmax()]}
+    else:
+        date_range = {'start': df['Date'].min(), 'end': df['Date'].max()}
+    
+    summary = {
+        'total_transactions': len(df),
+        'total_withdrawals': total_withdrawals,
+        'total_deposits': total_deposits,
+        'net_amount': net_amount,
+        'category_breakdown': category_summary,
+        'monthly_breakdown': monthly_breakdown,
+        'monthly_totals': monthly_totals,
+        'counterparty_breakdown': counterparty_breakdown,
+        'recurring': recurring,
+        'date_range': date_range
+    }
+    
+    return summary
+
+
+def merge_summaries(summaries, transactions):
+    """
+    Combine several statements' summarize_transactions() results into one.
+    
+    Totals, the monthly rollups and the category and counterparty
+    breakdowns are combined from each statement's; only recurring payments,
+    whose series run across statements, are detected again.
+    
+    Args:
+        summaries (list): summarize_transactions() results, earliest statement first
+        transactions (DataFrame or list): The statements' merged transactions,
+            in date order
+    
+    Returns:
+        dict: A summary of the merged transactions, as from summarize_transactions()
+    """
+    import pandas as pd
+    
+    monthly_breakdown, monthly_totals = merge_rollups(
+        [(summary['monthly_breakdown'], summary['monthly_totals']) for summary in summaries])
+    
+    categories = pd.concat([summary['category_breakdown'] for summary in summaries])
+    category_summary = categories.groupby(level=0).sum().round(2)
+    category_summary['Net_Amount'] = category_summary['Deposit_Numeric'] - category_summary['Withdrawal_Numeric']
+    
+    counterparties = pd.concat([summary['counterparty_breakdown'] for summary in summaries])
+    counterparties = counterparties.groupby(level=0).sum()
+    counterparties['Net'] = counterparties['Credit'] - counterparties['Debit']
+    order = (counterparties['Debit'] + counterparties['Credit']).sort_values(ascending=False, kind='stable').index
+    
+    df = transactions_frame(transactions)
+    df['Withdrawal_Numeric'] = pd.to_numeric(df['Withdrawal_Amount'].astype(str).str.replace(',', ''),
+                                             errors='coerce')
+    if 'Counterparty' not in df:
+        df['Counterparty'] = extract_counterparties(df['Narration'])
+    
+    def endpoint(key, pick):
+        dates = {summary['date_range'][key]: parse_statement_date(summary['date_range'][key])
+                 for summary in summaries}
+        dated = [text for text, date in dates.items() if date is not None]
+        return pick(dated, key=dates.get) if dated else summaries[0]['date_range'][key]
+    
+    total_withdrawals = sum(summary['total_withdrawals'] for summary in summaries)
+    total_deposits = sum(summary['total_deposits'] for summary in summaries)
+    return {
+        'total_transactions': sum(summary['total_transactions'] for summary in summaries),
+        'total_withdrawals': total_withdrawals,
+        'total_deposits': total_deposits,
+        'net_amount': total_deposits - total_withdrawals,
+        'category_breakdown': category_summary,
+        'monthly_breakdown': monthly_breakdown,
+        'monthly_totals': monthly_totals,
+        'counterparty_breakdown': counterparties.loc[order].round(2),
+        'recurring': detect_recurring(df),
+        'date_range': {'start': endpoint('start', min), 'end': endpoint('end', max)}
+    }
+
+
+def write_artifact(fmt, target, df, page_stats, summary, source, timer):
+    """
+    Serialise one output artifact.
+    
+    Args:
+        fmt (str): One of ARTIFACT_FILES
+        target: File path or binary buffer to write to
+        df (DataFrame): Categorized transactions
+        page_stats (list): Per-page extraction statistics
+        summary (dict): Output of summarize_transactions()
+        source (str): Statement name shown in the report
+        timer (StageTimer): Stage timings written as the 'timings' artifact
+    """
+    import pandas as pd
+    
+    if fmt == 'csv':
+        df.to_csv(target, index=False)
+    elif fmt == 'excel':
+        df.to_excel(target, index=False)
+    elif fmt == 'stats':
+        pd.DataFrame(page_stats).to_csv(target, index=False)
+    elif fmt == 'summary':
+        summary['category_breakdown'].reset_index().to_csv(target, index=False)
+    elif fmt == 'monthly':
+        summary['monthly_breakdown'].reset_index().merge(
+            summary['monthly_totals'][['Opening_Balance', 'Closing_Balance']].reset_index(),
+            on='Month', how='left'
+        ).to_csv(target, index=False)
+    elif fmt == 'recurring':
+        summary['recurring'].to_csv(target, index=False)
+    elif fmt == 'report':
+        report = render_markdown_report(summary, source).encode('utf-8')
+        if hasattr(target, 'write'):
+            target.write(report)
+        else:
+            Path(target).write_bytes(report)
+    elif fmt == 'timings':
+        pd.DataFrame(timer.rows()).to_csv(target, index=False)
+    else:
+        raise ValueError(f"Unknown artifact format: {fmt}")
+
+
+def serialize_artifacts(transactions, page_stats, summary, formats=None, timestamp=None, source='',
+                        timer=None):
+    """
+    Serialise results into in-memory buffers, without a converter or any files.
+    
+    Args:
+        transactions (DataFrame or list): Categorized transactions
+        page_stats (list): Per-page extraction statistics
+        summary (dict): Output of summarize_transactions()
+        formats (iterable, optional): Subset of ARTIFACT_FILES to produce (default: all)
+        timestamp (str, optional): Timestamp used in artifact filenames
+        source (str, optional): Statement name shown in the report
+        timer (StageTimer, optional): Times each artifact, and is written as
+            the 'timings' artifact
+    
+    Returns:
+        dict: format -> (filename, bytes)
+    """
+    timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+    timer = timer if timer is not None else StageTimer()
+    df = transactions_frame(transactions)
+    
+    artifacts = {}
+    for fmt in (formats if formats is not None else ARTIFACT_FILES):
+        buffer = io.BytesIO()
+        with timer.stage(f'write_{fmt}'):
+            write_artifact(fmt, buffer, df, page_stats, summary, source, timer)
+        artifacts[fmt] = (ARTIFACT_FILES[fmt].format(timestamp=timestamp), buffer.getvalue())
+    return artifacts
+
+
+def render_markdown_report(summary, source):
+    """Render the markdown summary report of `source` (a statement name) as a string."""
+    lines = []
+    lines.append("# HDFC Bank Statement Analysis Report\n\n")
+    lines.append(f"**Generated**: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n")
+    lines.append(f"**Source**: {source}\n\n")
+    
+    lines.append("## 📊 Summary\n\n")
+    lines.append(f"- **Total Transactions**: {summary['total_transactions']:,}\n")
+    lines.append(f"- **Total Withdrawals**: ₹{summary['total_withdrawals']:,.2f}\n")
+    lines.append(f"- **Total Deposits**: ₹{summary['total_deposits']:,.2f}\n")
+    lines.append(f"- **Net Amount**: ₹{summary['net_amount']:,.2f}\n")
+    lines.append(f"- **Date Range**: {summary['date_range']['start']} to {summary['date_range']['end']}\n\n")
+    
+    lines.append("## 📋 Category Breakdown\n\n")
+    lines.append("| Category | Transactions | Withdrawals | Deposits | Net Amount |\n")
+    lines.append("|----------|-------------|-------------|----------|------------|\n")
+    
+    for category, data in summary['category_breakdown'].iterrows():
+        lines.append(f"| {category} | {data['Date']} | ₹{data['Withdrawal_Numeric']:,.2f} | "
+                     f"₹{data['Deposit_Numeric']:,.2f} | ₹{data['Net_Amount']:,.2f} |\n")
+    
+    totals = summary.get('monthly_totals')
+    if totals is not None and len(totals):
+        lines.append("\n## 📅 Monthly Summary\n\n")
+        lines.append("| Month | Transactions | Debits | Credits | Net | Opening Balance | Closing Balance |\n")
+        lines.append("|-------|-------------|--------|---------|-----|-----------------|-----------------|\n")
+        for month, count, debit, credit, net, opening, closing in totals.itertuples():
+            opening = '-' if opening != opening else f"₹{opening:,.2f}"
+            closing = '-' if closing != closing else f"₹{closing:,.2f}"
+            lines.append(f"| {month} | {count} | ₹{debit:,.2f} | ₹{credit:,.2f} | ₹{net:,.2f} | "
+                         f"{opening} | {closing} |\n")
+    
+    counterparties = summary.get('counterparty_breakdown')
+    if counterparties is not None and len(counterparties):
+        lines.append("\n## 👥 Top Counterparties\n\n")
+        lines.append("| Counterparty | Transactions | Paid | Received | Net |\n")
+        lines.append("|--------------|-------------|------|----------|-----|\n")
+        for name, count, debit, credit, net in counterparties.head(REPORT_TOP_COUNTERPARTIES).itertuples():
+            lines.append(f"| {name} | {count} | ₹{debit:,.2f} | ₹{credit:,.2f} | ₹{net:,.2f} |\n")
+    
+    recurring = summary.get('recurring')
+    if recurring is not None and len(recurring):
+        lines.append("\n## 🔁 Recurring Payments\n\n")
+        lines.append("| Counterparty | Frequency | Payments | Amount | Total | Last Paid | Next Expected |\n")
+        lines.append("|--------------|-----------|----------|--------|-------|-----------|---------------|\n")
+        for row in recurring.itertuples(index=False):
+            lines.append(f"| {row.Counterparty} | {row.Frequency} | {row.Payments} | ₹{row.Amount:,.2f} | "
+                         f"₹{row.Total:,.2f} | {row.Last_Date} | {row.Next_Expected} |\n")
+    
+    return ''.join(lines)
+
+
+class StageTimer:
+    """Accumulates wall-clock and CPU time per conversion stage."""
+    
+    def __init__(self):
+        self.stages = {}
+        self.pages = {}
+        self._lock = threading.Lock()
+    
+    @contextmanager
+    def stage(self, name, page=None):
+        """
+        Time a block of work.
+        
+        Args:
+            name (str): Stage name, e.g. 'extract' or 'write_csv'
+            page (int or list, optional): Page(s) the work belongs to, for
+                per-page breakdowns; time is split evenly across a list
+        """
+        pages = page if isinstance(page, (list, tuple)) else ([] if page is None else [page])
+        wall_start = time.perf_counter()
+        # CPU time of the calling thread, so concurrent conversions don't inflate it
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.thread_time() - cpu_start
+            with self._lock:
+                totals = self.stages.setdefault(name, {'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'calls': 0})
+                totals['wall_seconds'] += wall
+                totals['cpu_seconds'] += cpu
+                totals['calls'] += 1
+                for page in pages:
+                    page_totals = self.pages.setdefault(page, {}).setdefault(
+                        name, {'wall_seconds': 0.0, 'cpu_seconds': 0.0}
+                    )
+                    page_totals['wall_seconds'] += wall / len(pages)
+                    page_totals['cpu_seconds'] += cpu / len(pages)
+    
+    def page_columns(self, page, name='extract'):
+        """Per-page timing columns for the page statistics output."""
+        timing = self.pages.get(page, {}).get(name)
+        if timing is None:
+            return {}
+        return {
+            'Extract_Wall_Seconds': round(timing['wall_seconds'], 4),
+            'Extract_CPU_Seconds': round(timing['cpu_seconds'], 4)
+        }
+    
+    def as_dict(self):
+        """Stage and per-page timings, rounded for reporting."""
+        def rounded(timing):
+            return {key: round(value, 4) if isinstance(value, float) else value
+                    for key, value in timing.items()}
+        
+        with self._lock:
+            return {
+                'stages': {name: rounded(timing) for name, timing in self.stages.items()},
+                'pages': {page: {name: rounded(timing) for name, timing in stages.items()}
+                          for page, stages in sorted(self.pages.items())}
+            }
+    
+    def rows(self):
+        """Stage timings as rows for the timings output."""
+        return [
+            {'Stage': name, 'Calls': timing['calls'],
+             'Wall_Seconds': timing['wall_seconds'], 'CPU_Seconds': timing['cpu_seconds']}
+            for name, timing in self.as_dict()['stages'].items()
+        ]
+
+
+class MemoryBudget:
+    """
+    Sizes extraction chunks (pages per camelot call) to stay under a memory limit.
+    
+    Usage is the process RSS, or allocations traced by tracemalloc where RSS
+    cannot be read. After each chunk the cost per page is taken from the
+    peak usage during the chunk (camelot frees most of what it allocates
+    before returning, so the usage after the call understates it), and the
+    estimate is the highest cost seen so far: the next chunk shrinks when
+    usage is over the limit or a dense page raises the estimate, and grows
+    while there is headroom for pages that costly.
+    
+    Both measures cover the whole process, not one conversion: where
+    several conversions share a process (as in the web backend) the limit
+    is for all of them together, and each one's chunks also shrink for the
+    others' memory.
+    """
+    
+    MIN_CHUNK = 1
+    MAX_CHUNK = 32
+    # Fraction of the remaining headroom the next chunk may use
+    HEADROOM_FRACTION = 0.5
+    
+    def __init__(self, limit_bytes, initial_chunk=1):
+        self.limit = limit_bytes
+        self.chunk_size = initial_chunk
+        self.page_cost = 0
+        self.peak = 0
+        self.chunk_sizes = []
+        self.source = 'rss' if current_rss() is not None else 'tracemalloc'
+        self._tracing = False
+        self._high_water = None
+    
+    def start(self):
+        if self.source == 'tracemalloc':
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._tracing = True
+    
+    def stop(self):
+        if self._tracing:
+            import tracemalloc
+            tracemalloc.stop()
+            self._tracing = False
+    
+    def usage(self):
+        """Current memory usage in bytes."""
+        if self.source == 'rss':
+            return current_rss() or 0
+        import tracemalloc
+        return tracemalloc.get_traced_memory()[0]
+    
+    def high_water(self):
+        """Highest usage so far in bytes (RSS high-water mark or traced peak), or None if unknown."""
+        if self.source == 'tracemalloc':
+            import tracemalloc
+            return tracemalloc.get_traced_memory()[1]
+        try:
+            import resource
+        except ImportError:
+            return None
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Kilobytes, except on macOS
+        return max_rss if sys.platform == 'darwin' else max_rss * 1024
+    
+    def mark(self):
+        """Start measuring a chunk; returns the current usage."""
+        if self.source == 'tracemalloc':
+            import tracemalloc
+            # Python 3.9+; before that the traced peak covers the whole run
+            if hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+        self._high_water = self.high_water()
+        return self.usage()
+    
+    def chunk_peak(self, after):
+        """
+        Highest usage since mark(), given the usage `after` the chunk.
+        
+        The high-water mark only shows a chunk's peak when the chunk raised
+        it; otherwise the peak is unknown and `after` is used.
+        """
+        high = self.high_water()
+        if high is None or self._high_water is None or high <= self._high_water:
+            return after
+        return max(high, after)
+    
+    def record(self, pages, before, after, peak=None):
+        """
+        Record the usage around extracting `pages` pages and size the next chunk.
+        
+        Args:
+            pages (int): Pages in the chunk
+            before (int): Usage before the chunk
+            after (int): Usage after the chunk
+            peak (int, optional): Highest usage during the chunk (default: `after`)
+        
+        Returns:
+            int: Pages to extract in the next chunk
+        """
+        peak = max(after, peak or 0)
+        self.chunk_sizes.append(pages)
+        self.peak = max(self.peak, peak)
+        cost = max(peak - before, 0) / max(pages, 1)
+        # Pages that freed their memory on return cost nothing measurable;
+        # never let them talk the estimate down from a dense page's real cost
+        self.page_cost = max(cost, self.page_cost)
+        
+        headroom = self.limit - after
+        if headroom <= 0:
+            self.chunk_size = max(self.MIN_CHUNK, self.chunk_size // 2)
+        elif self.page_cost:
+            fits = int(headroom * self.HEADROOM_FRACTION // self.page_cost)
+            self.chunk_size = max(self.MIN_CHUNK, min(self.MAX_CHUNK, fits, self.chunk_size * 2))
+        else:
+            self.chunk_size = min(self.MAX_CHUNK, self.chunk_size * 2)
+        return self.chunk_size
+    
+    def as_dict(self):
+        return {
+            'limit_bytes': self.limit,
+            'peak_bytes': self.peak,
+            'source': self.source,
+            'chunk_sizes': list(self.chunk_sizes),
+        }
+
+
+def preflight(data, text_pages=PREFLIGHT_TEXT_PAGES):
+    """
+    Inspect a PDF without converting it.
+    
+    Only the document structure and the text layer of the first text_pages
+    pages are read, which takes milliseconds even for long statements, so
+    callers can refuse or schedule a conversion before paying for camelot.
+    
+    Args:
+        data (bytes): PDF content
+        text_pages (int, optional): Leading pages searched for HDFC markers
+    
+    Returns:
+        dict: 'pages' (count, or None when it cannot be read without the
+        password), 'encrypted' (a password is needed to read it) and 'hdfc'
+        (True or False, or None when those pages have no text layer, as with
+        scans); None when neither pypdf nor PyPDF2 is installed
+    
+    Raises:
+        ValueError: If the data is not a readable PDF
+    """
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        try:
+            from PyPDF2 import PdfReader
+        except ImportError:
+            return None
+    
+    try:
+        reader = PdfReader(io.BytesIO(data))
+    except Exception as e:
+        raise ValueError(f"Not a readable PDF: {e}")
+    if reader.is_encrypted:
+        try:
+            # Owner-password-only PDFs open with an empty user password
+            encrypted = not reader.decrypt('')
+        except Exception:
+            encrypted = True
+        if encrypted:
+            return {'pages': None, 'encrypted': True, 'hdfc': None}
+    
+    try:
+        pages = len(reader.pages)
+        texts = []
+        for page in reader.pages[:text_pages]:
+            try:
+                texts.append(page.extract_text() or '')
+            except Exception as e:
+                logger.debug(f"Could not read page text during preflight: {e}")
+    except Exception as e:
+        raise ValueError(f"Not a readable PDF: {e}")
+    text = '\n'.join(texts)
+    if not text.strip():
+        hdfc = None
+    else:
+        hdfc = bool(HDFC_MARKER_PATTERN.search(text) or TRANSACTION_HEADER_PATTERN.search(text))
+    return {'pages': pages, 'encrypted': False, 'hdfc': hdfc}
+
+
+def file_sha256(path_or_bytes):
+    """SHA-256 hex digest of a file, or of in-memory bytes."""
+    if isinstance(path_or_bytes, (bytes, bytearray)):
+        return hashlib.sha256(path_or_bytes).hexdigest()
+    digest = hashlib.sha256()
+    with open(path_or_bytes, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def iter_in_thread(iterable, maxsize=PIPELINE_QUEUE_SIZE, name='pipeline-producer'):
+    """
+    Iterate over `iterable` in a background thread, through a bounded queue.
+    
+    The producer runs at most `maxsize` items ahead of the consumer, in a
+    copy of the consumer's context (so under the same job id). Its
+    exceptions are re-raised in the consumer; closing the generator (use
+    contextlib.closing) stops the producer and waits for it.
+    """
+    items = queue.Queue(maxsize)
+    stop = threading.Event()
+    
+    def put(item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def produce():
+        try:
+            for item in iterable:
+                if not put((True, item)):
+                    return
+            put((False, None))
+        except BaseException as e:
+            put((False, e))
+    
+    thread = threading.Thread(target=contextvars.copy_context().run, args=(produce,), name=name, daemon=True)
+    thread.start()
+    try:
+        while True:
+            more, item = items.get()
+            if not more:
+                if item is not None:
+                    raise item
+                return
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+
+class PipelineWriter:
+    """
+    Runs write(batch) for each batch in a background thread, behind a bounded queue.
+    
+    put() blocks while PIPELINE_QUEUE_SIZE batches are waiting; an error in
+    the writer is re-raised by the next put() or by close(). Every writer
+    must end with close() or, when the producer failed, stop().
+    """
+    
+    def __init__(self, write, maxsize=PIPELINE_QUEUE_SIZE, name='pipeline-writer'):
+        self._write = write
+        self._batches = queue.Queue(maxsize)
+        self._error = None
+        self._stopped = False
+        self._thread = threading.Thread(target=contextvars.copy_context().run, args=(self._run,),
+                                        name=name, daemon=True)
+        self._thread.start()
+    
+    def _run(self):
+        while True:
+            batch = self._batches.get()
+            if batch is None:
+                return
+            if self._error is None and not self._stopped:
+                try:
+                    self._write(batch)
+                except BaseException as e:
+                    self._error = e
+    
+    def put(self, batch):
+        if self._error is not None:
+            raise self._error
+        self._batches.put(batch)
+    
+    def close(self):
+        """Wait for queued batches to be written."""
+        self._batches.put(None)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+    
+    def stop(self):
+        """Drop the batches still queued and wait for the thread to finish; errors are not raised."""
+        self._stopped = True
+        self._batches.put(None)
+        self._thread.join()
+
+
+class CsvStream:
+    """Appends transaction dicts to a CSV file, as DataFrame.to_csv(index=False) would write them."""
+    
+    def __init__(self, path):
+        self.path = Path(path)
+        self._file = None
+        self._writer = None
+    
+    def write(self, transactions):
+        if not transactions:
+            return
+        if self._writer is None:
+            self._file = open(self.path, 'w', newline='', encoding='utf-8')
+            self._writer = csv.DictWriter(self._file, fieldnames=list(transactions[0]), restval='',
+                                          extrasaction='ignore', lineterminator=os.linesep)
+            self._writer.writeheader()
+        self._writer.writerows(transactions)
+    
+    @property
+    def written(self):
+        return self._writer is not None
+    
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+    
+    def discard(self):
+        """Close and delete a partially written file."""
+        self.close()
+        if self.written:
+            self.path.unlink(missing_ok=True)
+
+
+class PagesDone:
+    """Yielded by HDFCConverter._iter_tables once every table of `pages` has been yielded."""
+    
+    def __init__(self, pages, flavor):
+        self.pages = list(pages)
+        self.flavor = flavor
+
+
+class PageCheckpoint:
+    """
+    Per-page extraction results saved so an interrupted conversion can resume.
+    
+    Pages live in <directory>/<PDF hash prefix>/ next to a manifest holding
+    the fingerprint they were extracted under (PDF hash, extraction
+    parameters, CHECKPOINT_VERSION). Each finished page is written
+    atomically as page_NNNNN.json; load() discards the directory's pages
+    when the manifest does not match, so stale results are never reused.
+    """
+    
+    def __init__(self, directory, fingerprint):
+        self.fingerprint = fingerprint
+        self.path = Path(directory) / fingerprint['pdf_sha256'][:16]
+    
+    def _write(self, path, data):
+        tmp = path.with_name(path.name + '.tmp')
+        tmp.write_text(json.dumps(data), encoding='utf-8')
+        os.replace(tmp, path)
+    
+    def load(self):
+        """Return {page: record} saved by an earlier run under the same fingerprint."""
+        manifest = self.path / 'manifest.json'
+        try:
+            saved = json.loads(manifest.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            saved = None
+        if saved != self.fingerprint:
+            if saved is not None:
+                logger.warning(f"Discarding checkpoint in {self.path}: it was made for another PDF or settings")
+            shutil.rmtree(self.path, ignore_errors=True)
+            self.path.mkdir(parents=True, exist_ok=True)
+            self._write(manifest, self.fingerprint)
+            return {}
+        
+        records = {}
+        for page_file in self.path.glob('page_*.json'):
+            try:
+                record = json.loads(page_file.read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                continue
+            records[record['page']] = record
+        return records
+    
+    def save(self, record):
+        """Save one finished page: {'page', 'flavor', 'tables', 'transactions', 'stats'}."""
+        self._write(self.path / f"page_{record['page']:05d}.json", record)
+    
+    def clear(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+class MemoryCheckpoint:
+    """
+    PageCheckpoint stand-in that keeps finished pages in memory.
+    
+    Lets an in-memory preview hand the pages it finished to the full
+    conversion that follows on the same converter.
+    """
+    
+    def __init__(self):
+        self.records = {}
+    
+    def load(self):
+        return dict(self.records)
+    
+    def save(self, record):
+        self.records[record['page']] = record
+    
+    def clear(self):
+        self.records.clear()
+
+
+class PageIndex:
+    """
+    First and last transaction date of each page, read from the text layer.
+    
+    Building it only extracts page text, which costs a fraction of running
+    camelot on the same pages, and it is cached per PDF hash (see load() and
+    save()), so a date-bounded conversion of a long statement sends camelot
+    just the pages that can hold transactions in the range. Each page is
+    'dated' (with 'first' and 'last'), 'none' (text without transaction
+    rows: cover, summary and terms pages) or 'unknown' (no text layer, as
+    with scans, or a transaction header without readable dates); select()
+    keeps unknown pages, since they cannot be judged.
+    """
+    
+    def __init__(self, pages):
+        self.pages = pages
+    
+    @classmethod
+    def build(cls, reader):
+        """Index every page of a pypdf/PyPDF2 reader."""
+        pages = {}
+        for page_num, page in enumerate(reader.pages, start=1):
+            try:
+                text = page.extract_text() or ''
+            except Exception as e:
+                logger.debug(f"Could not read text of page {page_num}: {e}")
+                text = ''
+            dates = [date for date in map(parse_statement_date, TRANSACTION_DATE_PATTERN.findall(text)) if date]
+            if dates:
+                entry = {'status': 'dated', 'first': min(dates), 'last': max(dates)}
+            elif text.strip() and not TRANSACTION_HEADER_PATTERN.search(text):
+                entry = {'status': 'none', 'first': None, 'last': None}
+            else:
+                entry = {'status': 'unknown', 'first': None, 'last': None}
+            pages[page_num] = entry
+        return cls(pages)
+    
+    @classmethod
+    def load(cls, directory, pdf_sha256):
+        """Return the index cached for this PDF hash, or None."""
+        try:
+            saved = json.loads((Path(directory) / f"{pdf_sha256}.json").read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+        if saved.get('version') != PAGE_INDEX_VERSION or saved.get('pdf_sha256') != pdf_sha256:
+            return None
+        pages = {}
+        for entry in saved['pages']:
+            pages[entry['page']] = {
+                'status': entry['status'],
+                'first': parse_statement_date(entry['first']) if entry['first'] else None,
+                'last': parse_statement_date(entry['last']) if entry['last'] else None,
+            }
+        return cls(pages)
+    
+    def save(self, directory, pdf_sha256):
+        path = Path(directory) / f"{pdf_sha256}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            'version': PAGE_INDEX_VERSION,
+            'pdf_sha256': pdf_sha256,
+            'pages': [{'page': page_num,
+                       'status': entry['status'],
+                       'first': entry['first'].isoformat() if entry['first'] else None,
+                       'last': entry['last'].isoformat() if entry['last'] else None}
+                      for page_num, entry in sorted(self.pages.items())],
+        }
+        tmp = path.with_name(path.name + '.tmp')
+        tmp.write_text(json.dumps(data), encoding='utf-8')
+        os.replace(tmp, path)
+    
+    def select(self, pages, since=None, until=None):
+        """Those of `pages` that may hold transactions dated between since and until (inclusive)."""
+        selected = []
+        for page_num in pages:
+            entry = self.pages.get(page_num, {'status': 'unknown'})
+            if entry['status'] == 'unknown':
+                selected.append(page_num)
+            elif entry['status'] == 'dated':
+                if (since is None or entry['last'] >= since) and (until is None or entry['first'] <= until):
+                    selected.append(page_num)
+        return selected
+
 
 class HDFCConverter:
     """Main converter class for HDFC Bank PDF statements."""
     
-    def __init__(self, pdf_path, output_dir=None):
+    def __init__(self, pdf_path, output_dir=None, pdf_bytes=None, max_memory=None, prefilter=True, pages=None,
+                 job_id=None, since=None, until=None):
         """
         Initialize the converter.
         
         Args:
-            pdf_path (str): Path to the HDFC PDF statement
+            pdf_path (str): Path to the HDFC PDF statement, or a display name
+                when pdf_bytes is given
             output_dir (str, optional): Output directory for CSV files
+            pdf_bytes (bytes, optional): In-memory PDF content; when given,
+                pdf_path is not read and the output directory is only
+                created if results are saved to disk
+            max_memory (int, optional): Memory budget in bytes for the
+                whole process; pages are extracted in chunks sized to keep
+                it under the budget (see MemoryBudget)
+            prefilter (bool, optional): Skip pages whose text layer shows no
+                transactions before running camelot (default: True)
+            pages (iterable, optional): Only extract these page numbers
+                (default: all pages)
+            job_id (str, optional): Id stamped on this conversion's log
+                records (default: a random id)
+            since (date, optional): Only keep transactions dated on or
+                after this day; pages the page index places entirely
+                before it are not extracted
+            until (date, optional): Only keep transactions dated on or
+                before this day, likewise
         """
         self.pdf_path = Path(pdf_path)
+        self.pdf_bytes = pdf_bytes
         self.output_dir = Path(output_dir) if output_dir else Path('output')
-        self.output_dir.mkdir(exist_ok=True)
+        self.max_memory = max_memory
+        self.memory_budget = None
+        self.prefilter = prefilter
+        self.pages = sorted(set(pages)) if pages is not None else None
+        self.since = since
+        self.until = until
+        self.job_id = job_id or uuid.uuid4().hex[:12]
+        self.skipped_pages = []
+        self.resumed_pages = []
+        self.selected_pages = None
+        self.pages_remaining = []
+        self.page_stats = []
+        # Pages finished by an in-memory preview or deadline, for the conversion that completes it
+        self.preview_checkpoint = None
+        self.timer = StageTimer()
         
-        if not self.pdf_path.exists():
-            raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+        if pdf_bytes is None:
+            self.output_dir.mkdir(exist_ok=True)
+            
+            if not self.pdf_path.exists():
+                raise FileNotFoundError(f"PDF file not found: {pdf_path}")
         
-        logger.info(f"Initialized converter for: {self.pdf_path}")
-        logger.info(f"Output directory: {self.output_dir}")
+        with job_context(self.job_id):
+            logger.info(f"Initialized converter for: {self.pdf_path}")
+            logger.info(f"Output directory: {self.output_dir}")
     
-    def extract_transactions(self):
-        """Extract all transactions from the PDF."""
-        logger.info("Starting transaction extraction...")
+    @classmethod
+    def from_bytes(cls, data, name='statement.pdf', output_dir=None, max_memory=None, prefilter=True, job_id=None):
+        """
+        Create a converter for an in-memory PDF.
         
+        Args:
+            data (bytes or file-like): PDF content, or a binary file-like object
+            name (str, optional): Name used for the source in reports
+            output_dir (str, optional): Output directory, used only by save_results()
+            max_memory (int, optional): Memory budget in bytes
+            prefilter (bool, optional): Skip pages without transaction text
+            job_id (str, optional): Id stamped on this conversion's log records
+        """
+        if hasattr(data, 'read'):
+            data = data.read()
+        if not data:
+            raise ValueError("PDF data is empty")
+        return cls(name, output_dir, pdf_bytes=bytes(data), max_memory=max_memory, prefilter=prefilter,
+                   job_id=job_id)
+    
+    @contextmanager
+    def _pdf_file(self):
+        """Yield a filesystem path for the PDF, spooling in-memory content for camelot."""
+        if self.pdf_bytes is None:
+            yield str(self.pdf_path)
+            return
+        
+        # camelot only reads from paths, so the input is spooled once; no outputs touch disk
+        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as f:
+            f.write(self.pdf_bytes)
+        try:
+            yield f.name
+        finally:
+            os.unlink(f.name)
+    
+    def _pdf_reader(self, pdf_file):
+        """Return a pypdf (or PyPDF2) reader for the PDF, or None when neither is installed."""
+        try:
+            from pypdf import PdfReader
+        except ImportError:
+            try:
+                from PyPDF2 import PdfReader
+            except ImportError:
+                return None
+        return PdfReader(pdf_file)
+    
+    def _looks_like_transaction_page(self, text):
+        """
+        Check a page's text layer for signs of a transaction table.
+        
+        A page qualifies if it has the table header, or a line that starts
+        with a date and carries an amount. Pages without any text (scanned
+        images) always qualify, since they cannot be judged.
+        """
+        if not text or not text.strip():
+            return True
+        if TRANSACTION_HEADER_PATTERN.search(text):
+            return True
+        return TRANSACTION_LINE_PATTERN.search(text) is not None
+    
+    def _select_pages(self, pdf_file):
+        """
+        Split the PDF's pages into those worth sending to camelot and those to skip.
+        
+        Returns:
+            tuple: (pages to extract, skipped pages), or (None, []) when no PDF
+            reader is installed and no pages were requested
+        """
+        reader = self._pdf_reader(pdf_file)
+        if reader is None:
+            if self.date_bounded:
+                logger.warning("Cannot index pages by date without pypdf/PyPDF2; extracting every page")
+            return (list(self.pages) if self.pages is not None else None), []
+        pages = list(range(1, len(reader.pages) + 1))
+        if self.pages is not None:
+            pages = [page_num for page_num in self.pages if 1 <= page_num <= len(pages)]
+        if self.date_bounded:
+            with self.timer.stage('index'):
+                index = self._page_index(reader)
+            dated = index.select(pages, self.since, self.until)
+            logger.info(f"Page index: {len(dated)} of {len(pages)} pages may hold transactions "
+                        f"from {self.since or 'the start'} to {self.until or 'the end'}")
+            pages = dated
+        if not self.prefilter:
+            return pages, []
+        
+        selected, skipped = [], []
+        with self.timer.stage('probe'):
+            for page_num in pages:
+                page = reader.pages[page_num - 1]
+                try:
+                    text = page.extract_text()
+                except Exception as e:
+                    logger.debug(f"Could not read text of page {page_num}: {e}")
+                    text = None
+                (selected if self._looks_like_transaction_page(text) else skipped).append(page_num)
+        
+        if not selected and self.pages is None and not self.date_bounded:
+            logger.warning("No page looks like a transaction page; extracting all pages")
+            return pages, []
+        if skipped:
+            logger.info(f"Skipping {len(skipped)} pages without transaction text: {skipped}")
+        return selected, skipped
+    
+    @property
+    def date_bounded(self):
+        return self.since is not None or self.until is not None
+    
+    def _page_index(self, reader):
+        """
+        Return the PageIndex of the PDF, from the cache when it holds one.
+        
+        Indexes of PDFs read from disk are cached in PAGE_INDEX_DIR under the
+        output directory, keyed by the PDF's hash; in-memory PDFs are indexed
+        each time, since they have nowhere to keep one.
+        """
+        if self.pdf_bytes is not None:
+            return PageIndex.build(reader)
+        directory = self.output_dir / PAGE_INDEX_DIR
+        pdf_sha256 = file_sha256(self.pdf_path)
+        index = PageIndex.load(directory, pdf_sha256)
+        if index is not None:
+            logger.debug(f"Using cached page index for {self.pdf_path}")
+            return index
+        index = PageIndex.build(reader)
+        try:
+            index.save(directory, pdf_sha256)
+        except OSError as e:
+            logger.warning(f"Could not cache the page index: {e}")
+        return index
+    
+    def _in_date_range(self, transaction):
+        date = parse_statement_date(transaction['Date'])
+        if date is None:
+            return False
+        return (self.since is None or date >= self.since) and (self.until is None or date <= self.until)
+    
+    def _read_tables(self, pdf_file, pages='all', flavor='lattice'):
+        """Read tables from the given pages with camelot."""
+        import camelot
+        
+        options = LATTICE_OPTIONS if flavor == 'lattice' else STREAM_OPTIONS
+        return camelot.read_pdf(pdf_file, pages=pages, flavor=flavor, **options)
+    
+    def _page_chunks(self, pages):
+        """Yield lists of pages to extract together, sized by the memory budget if any."""
+        start = 0
+        while start < len(pages):
+            size = self.memory_budget.chunk_size if self.memory_budget else 1
+            yield pages[start:start + size]
+            start += size
+    
+    def _iter_tables(self, pdf_file, restored=None):
+        """
+        Yield camelot tables chunk by chunk, timing the extraction of each page.
+        
+        Pages whose text layer shows no transactions are skipped (see
+        _select_pages) and recorded in self.skipped_pages. Without a memory
+        budget every page is its own chunk; with one, chunk sizes adapt to
+        the measured memory cost per page. Falls back to the stream method
+        if lattice finds no tables in the whole document. Without a PDF
+        reader to count pages, all pages are read at once.
+        
+        A PagesDone marker follows the tables of each finished chunk. With
+        `restored` ({page: checkpoint record}), the records of the leading
+        pages already finished are yielded first and extraction resumes at
+        the first unfinished page.
+        """
+        logger.info(f"Attempting to extract tables from: {self.pdf_path}")
+        pages, self.skipped_pages = self._select_pages(pdf_file)
+        self.selected_pages = list(pages) if pages is not None else None
+        budget = self.memory_budget
+        if budget and pages is None:
+            logger.warning("Cannot count pages without pypdf/PyPDF2; the memory budget is not applied")
+            budget = None
+        
+        found = 0
+        flavors = ('lattice', 'stream')
+        self.resumed_pages = []
+        if restored and pages is not None:
+            done = 0
+            while done < len(pages) and pages[done] in restored:
+                done += 1
+            records = [restored[page] for page in pages[:done]]
+            if records:
+                self.resumed_pages = pages[:done]
+                logger.info(f"Resuming from checkpoint: {done} of {len(pages)} pages already done")
+                found = sum(record['tables'] for record in records)
+                # Stay on the method the earlier run had settled on
+                if any(record['flavor'] == 'stream' for record in records):
+                    flavors = ('stream',)
+                elif found:
+                    flavors = ('lattice',)
+                yield from records
+            pages = pages[done:]
+        elif restored:
+            logger.warning("Cannot resume without pypdf/PyPDF2 to count pages; extracting all pages")
+        
+        for flavor in flavors:
+            if flavor == 'stream' and 'lattice' in flavors:
+                if found:
+                    return
+                logger.warning("No tables found with lattice method, trying stream method...")
+            
+            # Lattice pages only count as finished once lattice has found a
+            # table; until then the stream fallback may still redo them
+            pending = []
+            for chunk in (self._page_chunks(pages) if pages is not None else [None]):
+                before = budget.mark() if budget else 0
+                with self.timer.stage('extract', page=chunk):
+                    tables = self._read_tables(pdf_file, ','.join(map(str, chunk)) if chunk else 'all', flavor)
+                if budget:
+                    after = budget.usage()
+                    next_size = budget.record(len(chunk), before, after, budget.chunk_peak(after))
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug(f"Pages {chunk[0]}-{chunk[-1]}: {budget.usage() / 2 ** 20:.0f} MiB used, "
+                                     f"next chunk {next_size} pages")
+                found += len(tables)
+                yield from tables
+                del tables
+                if chunk:
+                    pending.extend(chunk)
+                    if found or flavor == 'stream':
+                        yield PagesDone(pending, flavor)
+                        pending = []
+                if budget and budget.usage() > budget.limit:
+                    gc.collect()
+            
+            logger.info(f"Found {found} tables with {flavor} method")
+    
+    def _process_table(self, table, index):
+        """
+        Parse one camelot table into transactions.
+        
+        Returns:
+            tuple: (transactions, rows_processed), or (None, 0) if the table is
+            not a transaction table
+        """
+        df = table.df
+        
+        # Get page number
+        page_num = table.page
+        
+        # Per-table messages are only formatted when debug logging is on
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug(f"Table {index+1} on page {page_num}: {len(df)} rows, {len(df.columns)} columns")
+        
+        # Skip if table is empty
+        if len(df) < 1:
+            if debug:
+                logger.debug(f"Skipping table {index+1} on page {page_num}: empty table")
+            return None, 0
+        
+        # Check if this looks like a transaction table (at least 5 columns)
+        if len(df.columns) < 5:
+            return None, 0
+        
+        # First page has headers, others don't
+        if page_num == 1:
+            # Skip header row on first page
+            transaction_rows = df.iloc[1:]
+        else:
+            # No headers on subsequent pages
+            transaction_rows = df
+        
+        transactions = []
+        # Check if rows are concatenated with newlines (common camelot issue)
+        if len(transaction_rows) == 1 and '\n' in str(transaction_rows.iloc[0, 0]):
+            # Split concatenated rows
+            transactions.extend(self._split_concatenated_rows(transaction_rows.iloc[0], page_num))
+        else:
+            # Process each transaction row normally
+            for _, row in transaction_rows.iterrows():
+                if self._is_valid_transaction_row(row):
+                    transaction = self._parse_transaction_row(row, page_num)
+                    if transaction:
+                        transactions.append(transaction)
+        
+        if debug:
+            logger.debug(f"Page {page_num}: Processed {len(transaction_rows)} rows")
+        return transactions, len(transaction_rows)
+    
+    @with_job_id
+    def extract_transactions(self, on_page=None, checkpoint=None, deadline=None, page_limit=None):
+        """
+        Extract all transactions from the PDF.
+        
+        Table extraction runs one stage ahead of parsing, in a background
+        thread behind a bounded queue.
+        
+        Args:
+            on_page (callable, optional): Called with each table's parsed
+                transactions as soon as they are available; it may update
+                them in place
+            checkpoint (PageCheckpoint, optional): Pages it already holds are
+                restored instead of extracted, and each newly finished page
+                is saved to it
+            deadline (float, optional): time.monotonic() value after which
+                extraction stops at the next page boundary; the pages left
+                are recorded in self.pages_remaining
+            page_limit (int, optional): Stop, like at a deadline, once this
+                many of the selected pages are finished
+        
+        Returns:
+            tuple: (transactions, page_stats)
+        """
         all_transactions = []
+        for transactions in self.iter_transactions(checkpoint=checkpoint, deadline=deadline,
+                                                   page_limit=page_limit):
+            # Outside the extraction loop: a failing downstream stage fails the conversion
+            if on_page is not None:
+                on_page(transactions)
+            all_transactions.extend(transactions)
+        return all_transactions, self.page_stats
+    
+    @with_job_id
+    def iter_transactions(self, checkpoint=None, deadline=None, page_limit=None):
+        """
+        Yield each table's parsed transactions as soon as they are available.
+        
+        Nothing is accumulated beyond the page being read, so a caller that
+        passes the batches on can handle statements of any length. Batches
+        may be updated in place before the next one is requested (checkpoints
+        store them as they are then). Once exhausted, self.page_stats holds
+        the per-page statistics.
+        
+        Args:
+            checkpoint (PageCheckpoint, optional): As for extract_transactions()
+            deadline (float, optional): As for extract_transactions()
+            page_limit (int, optional): As for extract_transactions()
+        
+        Yields:
+            list: The non-empty transactions of one table, or of one page
+                restored from the checkpoint
+        """
+        logger.info("Starting transaction extraction...")
+        
+        transaction_count = 0
         page_stats = []
+        page_counts = {}
+        # Finished-page records for the checkpoint, filled until PagesDone
+        page_results = {}
+        completed = set()
+        self.page_stats = []
+        self.skipped_pages = []
+        self.pages_remaining = []
+        self.memory_budget = MemoryBudget(self.max_memory) if self.max_memory else None
+        if self.memory_budget:
+            self.memory_budget.start()
+            logger.info(f"Memory budget: {self.max_memory / 2 ** 20:.0f} MiB ({self.memory_budget.source})")
         
         try:
-            # Extract tables from all pages with memory optimization
-            logger.info(f"Attempting to extract tables from: {self.pdf_path}")
-            tables = camelot.read_pdf(
-                str(self.pdf_path), 
-                pages='all', 
-                flavor='lattice',
-                line_scale=40,
-                split_text=True,  # Split text to avoid memory issues
-                flag_size=True,   # Flag size to optimize memory
-                copy_text=['v']   # Copy text vertically to reduce memory usage
-            )
-            
-            logger.info(f"Found {len(tables)} tables across all pages")
-            
-            if len(tables) == 0:
-                logger.warning("No tables found with lattice method, trying stream method...")
-                tables = camelot.read_pdf(
-                    str(self.pdf_path), 
-                    pages='all', 
-                    flavor='stream',
-                    split_text=True,
-                    flag_size=True,
-                    copy_text=['v']
-                )
-                logger.info(f"Found {len(tables)} tables with stream method")
-            
-            # Process tables in batches to manage memory
-            batch_size = 5  # Process 5 tables at a time
-            for batch_start in range(0, len(tables), batch_size):
-                batch_end = min(batch_start + batch_size, len(tables))
-                batch_tables = tables[batch_start:batch_end]
-                
-                logger.info(f"Processing batch {batch_start//batch_size + 1}: tables {batch_start+1}-{batch_end}")
-                
-                for i, table in enumerate(batch_tables):
-                    try:
-                        df = table.df
-                        
-                        # Get page number
-                        page_num = table.page
-                        
-                        logger.info(f"Table {i+1} on page {page_num}: {len(df)} rows, {len(df.columns)} columns")
-                        
-                        # Skip if table is empty
-                        if len(df) < 1:
-                            logger.info(f"Skipping table {i+1} on page {page_num}: empty table")
-                            continue
-                        
-                        # Check if this looks like a transaction table (at least 5 columns)
-                        if len(df.columns) >= 5:
-                            logger.info(f"Processing table {i+1} on page {page_num}: {len(df)} rows, {len(df.columns)} columns")
-                            # First page has headers, others don't
-                            if page_num == 1:
-                                # Skip header row on first page
-                                transaction_rows = df.iloc[1:]
-                            else:
-                                # No headers on subsequent pages
-                                transaction_rows = df
-                            
-                            # Check if rows are concatenated with newlines (common camelot issue)
-                            if len(transaction_rows) == 1 and '\n' in str(transaction_rows.iloc[0, 0]):
-                                # Split concatenated rows
-                                split_transactions = self._split_concatenated_rows(transaction_rows.iloc[0], page_num)
-                                all_transactions.extend(split_transactions)
-                            else:
-                                # Process each transaction row normally
-                                for _, row in transaction_rows.iterrows():
-                                    if self._is_valid_transaction_row(row):
-                                        transaction = self._parse_transaction_row(row, page_num)
-                                        if transaction:
-                                            all_transactions.append(transaction)
-                            
-                            page_stats.append({
-                                'Page': page_num,
-                                'Rows_Processed': len(transaction_rows),
-                                'Valid_Transactions': len([t for t in all_transactions if t['Page_Number'] == page_num])
-                            })
-                            
-                            logger.info(f"Page {page_num}: Processed {len(transaction_rows)} rows")
+            restored = checkpoint.load() if checkpoint is not None else None
+            # camelot reads the next pages in a background thread while this one
+            # parses (and, through the consumer, categorizes) the tables already read
+            with self._pdf_file() as pdf_file, \
+                    closing(iter_in_thread(self._iter_tables(pdf_file, restored))) as tables:
+                # Process tables in batches to manage memory
+                batch_size = 5  # Collect garbage every 5 tables
+                i = -1
+                for table in tables:
+                    if isinstance(table, PagesDone):
+                        if checkpoint is not None:
+                            for page_num in table.pages:
+                                record = page_results.pop(page_num, None) or {
+                                    'tables': 0, 'transactions': [], 'stats': []}
+                                checkpoint.save({'page': page_num, 'flavor': table.flavor, **record})
+                        completed.update(table.pages)
+                        out_of_time = deadline is not None and time.monotonic() >= deadline
+                        if out_of_time or (page_limit is not None and len(completed) >= page_limit):
+                            self.pages_remaining = [page for page in self.selected_pages if page not in completed]
+                            if self.pages_remaining:
+                                logger.log(logging.WARNING if out_of_time else logging.INFO,
+                                           f"{'Deadline' if out_of_time else 'Page limit'} reached; stopping with "
+                                           f"{len(self.pages_remaining)} pages left: {self.pages_remaining}")
+                                break
+                        continue
+                    if isinstance(table, dict):
+                        # A page restored from the checkpoint
+                        completed.add(table['page'])
+                        page_stats.extend(table['stats'])
+                        if table['transactions']:
+                            transaction_count += len(table['transactions'])
+                            yield table['transactions']
+                        continue
                     
+                    i += 1
+                    try:
+                        with self.timer.stage('parse'):
+                            transactions, rows_processed = self._process_table(table, i)
                     except Exception as e:
                         logger.warning(f"Error processing table {i}: {e}")
-                        continue
-                
-                # Clear memory after each batch
-                import gc
-                gc.collect()
+                        transactions = None
+                    if transactions and self.date_bounded:
+                        # Pages at either end of the range also hold transactions outside it
+                        transactions = [transaction for transaction in transactions
+                                        if self._in_date_range(transaction)]
+                    
+                    page_num = table.page
+                    if checkpoint is not None:
+                        record = page_results.setdefault(page_num, {'tables': 0, 'transactions': [], 'stats': []})
+                        record['tables'] += 1
+                    if transactions is not None:
+                        page_counts[page_num] = page_counts.get(page_num, 0) + len(transactions)
+                        page_stats.append({
+                            'Page': page_num,
+                            'Rows_Processed': rows_processed,
+                            'Valid_Transactions': page_counts[page_num],
+                            'Status': 'extracted',
+                            **self.timer.page_columns(page_num)
+                        })
+                        if transactions:
+                            transaction_count += len(transactions)
+                            yield transactions
+                        if checkpoint is not None:
+                            record['transactions'].extend(transactions)
+                            record['stats'].append(page_stats[-1])
+                    
+                    # Clear memory after each batch
+                    if (i + 1) % batch_size == 0:
+                        gc.collect()
             
-            logger.info(f"Total transactions extracted: {len(all_transactions)}")
-            return all_transactions, page_stats
+            if (deadline is not None or page_limit is not None) and self.selected_pages is None:
+                logger.warning("Cannot stop at a page boundary without pypdf/PyPDF2; extracted all pages")
+            for status, pages in (('skipped', self.skipped_pages), ('pending', self.pages_remaining)):
+                for page_num in pages:
+                    page_stats.append({
+                        'Page': page_num,
+                        'Rows_Processed': 0,
+                        'Valid_Transactions': 0,
+                        'Status': status
+                    })
+            page_stats.sort(key=lambda stats: stats['Page'])
+            self.page_stats = page_stats
+            
+            logger.info(f"Total transactions extracted: {transaction_count}")
             
         except Exception as e:
             logger.error(f"Error during extraction: {e}")
             raise
+        finally:
+            if self.memory_budget:
+                self.memory_budget.stop()
     
     def _split_concatenated_rows(self, concatenated_row, page_num):
         """Split a concatenated row into individual transactions."""
@@ -307,8 +1990,8 @@ class HDFCConverter:
         return cleaned
     
     def categorize_transactions(self, transactions):
-        """Categorize transactions for better analysis."""
-        logger.info("Categorizing transactions...")
+        """Categorize transactions for better analysis, and extract their counterparties."""
+        import pandas as pd
         
         categorized = []
         for transaction in transactions:
@@ -343,150 +2026,382 @@ class HDFCConverter:
             transaction['Category'] = category
             categorized.append(transaction)
         
-        logger.info(f"Categorized {len(categorized)} transactions")
+        # Counterparties for the whole batch in one vectorised pass
+        narrations = pd.Series([transaction['Narration'] for transaction in categorized], dtype=object)
+        for transaction, counterparty in zip(categorized, extract_counterparties(narrations)):
+            transaction['Counterparty'] = counterparty
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Categorized {len(categorized)} transactions")
         return categorized
     
     def generate_summary(self, transactions):
-        """Generate summary statistics."""
-        logger.info("Generating summary statistics...")
-        
-        df = pd.DataFrame(transactions)
-        
-        # Convert amounts to numeric
-        df['Withdrawal_Numeric'] = pd.to_numeric(
-            df['Withdrawal_Amount'].str.replace(',', ''), 
-            errors='coerce'
-        )
-        df['Deposit_Numeric'] = pd.to_numeric(
-            df['Deposit_Amount'].str.replace(',', ''), 
-            errors='coerce'
-        )
-        
-        # Calculate totals
-        total_withdrawals = df['Withdrawal_Numeric'].sum()
-        total_deposits = df['Deposit_Numeric'].sum()
-        net_amount = total_deposits - total_withdrawals
-        
-        # Category breakdown
-        category_summary = df.groupby('Category').agg({
-            'Withdrawal_Numeric': 'sum',
-            'Deposit_Numeric': 'sum',
-            'Date': 'count'
-        }).round(2)
-        
-        category_summary['Net_Amount'] = (
-            category_summary['Deposit_Numeric'] - category_summary['Withdrawal_Numeric']
-        )
-        
-        summary = {
-            'total_transactions': len(df),
-            'total_withdrawals': total_withdrawals,
-            'total_deposits': total_deposits,
-            'net_amount': net_amount,
-            'category_breakdown': category_summary,
-            'date_range': {
-                'start': df['Date'].min(),
-                'end': df['Date'].max()
-            }
-        }
+        """Generate summary statistics (see summarize_transactions())."""
+        return summarize_transactions(transactions)
+    
+    def _write_artifact(self, fmt, target, df, page_stats, summary, timestamp):
+        """
+        Serialise one output artifact.
         
-        return summary
+        Args:
+            fmt (str): One of ARTIFACT_FILES
+            target: File path or binary buffer to write to
+            df (DataFrame): Categorized transactions
+            page_stats (list): Per-page extraction statistics
+            summary (dict): Output of generate_summary()
+            timestamp (str): Run timestamp shown in the report
+        """
+        with self.timer.stage(f'write_{fmt}'):
+            write_artifact(fmt, target, df, page_stats, summary, self.pdf_path.name, self.timer)
     
-    def save_results(self, transactions, page_stats, summary):
-        """Save all results to files."""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    def save_results(self, transactions, page_stats, summary, timestamp=None, written=()):
+        """
+        Save all results to files.
+        
+        Args:
+            transactions (list or DataFrame): Categorized transactions
+            page_stats (list): Per-page extraction statistics
+            summary (dict): Output of generate_summary()
+            timestamp (str, optional): Timestamp used in the filenames (default: now)
+            written (iterable, optional): Formats already written under this
+                timestamp, e.g. the CSV streamed by convert()
+        """
+        timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.output_dir.mkdir(exist_ok=True)
+        df = transactions_frame(transactions)
         
         # Save main transaction CSV
-        transactions_file = self.output_dir / f"hdfc_transactions_{timestamp}.csv"
-        df = pd.DataFrame(transactions)
-        df.to_csv(transactions_file, index=False)
+        transactions_file = self.output_dir / ARTIFACT_FILES['csv'].format(timestamp=timestamp)
+        if 'csv' not in written:
+            self._write_artifact('csv', transactions_file, df, page_stats, summary, timestamp)
         logger.info(f"Saved transactions to: {transactions_file}")
         
         # Save Excel version
-        excel_file = self.output_dir / f"hdfc_transactions_{timestamp}.xlsx"
-        df.to_excel(excel_file, index=False)
+        excel_file = self.output_dir / ARTIFACT_FILES['excel'].format(timestamp=timestamp)
+        self._write_artifact('excel', excel_file, df, page_stats, summary, timestamp)
         logger.info(f"Saved Excel file to: {excel_file}")
         
         # Save page statistics
-        stats_file = self.output_dir / f"extraction_stats_{timestamp}.csv"
-        pd.DataFrame(page_stats).to_csv(stats_file, index=False)
+        stats_file = self.output_dir / ARTIFACT_FILES['stats'].format(timestamp=timestamp)
+        self._write_artifact('stats', stats_file, df, page_stats, summary, timestamp)
         logger.info(f"Saved page statistics to: {stats_file}")
         
         # Save summary
-        summary_file = self.output_dir / f"summary_{timestamp}.csv"
-        summary_df = summary['category_breakdown'].reset_index()
-        summary_df.to_csv(summary_file, index=False)
+        summary_file = self.output_dir / ARTIFACT_FILES['summary'].format(timestamp=timestamp)
+        self._write_artifact('summary', summary_file, df, page_stats, summary, timestamp)
         logger.info(f"Saved summary to: {summary_file}")
         
+        # Save month x category rollups with monthly balances
+        monthly_file = self.output_dir / ARTIFACT_FILES['monthly'].format(timestamp=timestamp)
+        self._write_artifact('monthly', monthly_file, df, page_stats, summary, timestamp)
+        logger.info(f"Saved monthly summary to: {monthly_file}")
+        
+        # Save recurring payments
+        recurring_file = self.output_dir / ARTIFACT_FILES['recurring'].format(timestamp=timestamp)
+        self._write_artifact('recurring', recurring_file, df, page_stats, summary, timestamp)
+        logger.info(f"Saved recurring payments to: {recurring_file}")
+        
         # Generate markdown report
         self._generate_markdown_report(summary, timestamp)
         
+        # Save stage timings last so they cover every other writer
+        timings_file = self.output_dir / ARTIFACT_FILES['timings'].format(timestamp=timestamp)
+        self._write_artifact('timings', timings_file, df, page_stats, summary, timestamp)
+        logger.info(f"Saved stage timings to: {timings_file}")
+        
         return {
             'transactions_file': transactions_file,
             'excel_file': excel_file,
             'stats_file': stats_file,
-            'summary_file': summary_file
+            'summary_file': summary_file,
+            'monthly_file': monthly_file,
+            'recurring_file': recurring_file,
+            'timings_file': timings_file
         }
     
+    def serialize_results(self, transactions, page_stats, summary, formats=None, timestamp=None):
+        """Serialise results into in-memory buffers instead of files (see serialize_artifacts())."""
+        return serialize_artifacts(transactions, page_stats, summary, formats, timestamp,
+                                   source=self.pdf_path.name, timer=self.timer)
+    
+    def _render_markdown_report(self, summary):
+        """Render the markdown summary report as a string."""
+        return render_markdown_report(summary, self.pdf_path.name)
+    
     def _generate_markdown_report(self, summary, timestamp):
         """Generate a markdown summary report."""
-        report_file = self.output_dir / f"EXTRACTION_REPORT_{timestamp}.md"
+        report_file = self.output_dir / ARTIFACT_FILES['report'].format(timestamp=timestamp)
+        self._write_artifact('report', report_file, None, None, summary, timestamp)
+        logger.info(f"Generated markdown report: {report_file}")
+    
+    def _checkpoint(self, directory=None):
+        """Return the PageCheckpoint for this PDF and the current extraction settings."""
+        fingerprint = {
+            'version': CHECKPOINT_VERSION,
+            'pdf_sha256': file_sha256(self.pdf_bytes if self.pdf_bytes is not None else self.pdf_path),
+            'prefilter': self.prefilter,
+            # Saved pages only hold the transactions inside the date range
+            'since': self.since.isoformat() if self.since else None,
+            'until': self.until.isoformat() if self.until else None,
+            'lattice': LATTICE_OPTIONS,
+            'stream': STREAM_OPTIONS,
+        }
+        return PageCheckpoint(directory or self.output_dir / CHECKPOINT_DIR, fingerprint)
+    
+    def _run_stages(self, writer=None, checkpoint=None, deadline=None, page_limit=None):
+        """
+        Run extraction, categorization and summary under a fresh stage timer.
         
-        with open(report_file, 'w') as f:
-            f.write("# HDFC Bank Statement Analysis Report\n\n")
-            f.write(f"**Generated**: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n")
-            f.write(f"**Source**: {self.pdf_path.name}\n\n")
-            
-            f.write("## 📊 Summary\n\n")
-            f.write(f"- **Total Transactions**: {summary['total_transactions']:,}\n")
-            f.write(f"- **Total Withdrawals**: ₹{summary['total_withdrawals']:,.2f}\n")
-            f.write(f"- **Total Deposits**: ₹{summary['total_deposits']:,.2f}\n")
-            f.write(f"- **Net Amount**: ₹{summary['net_amount']:,.2f}\n")
-            f.write(f"- **Date Range**: {summary['date_range']['start']} to {summary['date_range']['end']}\n\n")
-            
-            f.write("## 📋 Category Breakdown\n\n")
-            f.write("| Category | Transactions | Withdrawals | Deposits | Net Amount |\n")
-            f.write("|----------|-------------|-------------|----------|------------|\n")
-            
-            for category, data in summary['category_breakdown'].iterrows():
-                f.write(f"| {category} | {data['Date']} | ₹{data['Withdrawal_Numeric']:,.2f} | "
-                       f"₹{data['Deposit_Numeric']:,.2f} | ₹{data['Net_Amount']:,.2f} |\n")
+        Extraction, parsing and categorization overlap: each table's rows
+        are categorized as soon as they are parsed, while camelot reads the
+        next pages, and are then handed to `writer` if one is given.
         
-        logger.info(f"Generated markdown report: {report_file}")
+        Args:
+            writer (PipelineWriter, optional): Receives each page's
+                categorized transactions
+            checkpoint (PageCheckpoint, optional): Resume from, and save
+                finished pages to, this checkpoint
+            deadline (float, optional): time.monotonic() value at which to
+                stop extracting (see extract_transactions)
+            page_limit (int, optional): Pages after which to stop extracting
+        
+        Returns:
+            tuple: (categorized_transactions, page_stats, summary), or None if
+            no transactions were found
+        """
+        self.timer = StageTimer()
+        
+        def on_page(transactions):
+            # Categorizes in place, so the extracted list ends up categorized
+            with self.timer.stage('categorize'):
+                self.categorize_transactions(transactions)
+            if writer is not None:
+                writer.put(transactions)
+        
+        # Extract and categorize transactions; the writer thread is always
+        # finished before returning, so nothing writes after a failure
+        try:
+            categorized_transactions, page_stats = self.extract_transactions(
+                on_page=on_page, checkpoint=checkpoint, deadline=deadline, page_limit=page_limit)
+        except BaseException:
+            if writer is not None:
+                writer.stop()
+            raise
+        if writer is not None:
+            writer.close()
+        
+        if not categorized_transactions:
+            logger.error("No transactions found in the PDF!")
+            return None
+        
+        # Generate summary
+        with self.timer.stage('summarize'):
+            summary = self.generate_summary(categorized_transactions)
+        
+        return categorized_transactions, page_stats, summary
+    
+    def _pages_processed(self, page_stats):
+        return sum(1 for stats in page_stats if stats.get('Status') not in ('skipped', 'pending'))
     
-    def convert(self):
-        """Main conversion method."""
+    def _log_timings(self):
+        stages = self.timer.as_dict()['stages']
+        logger.info("Stage timings: " + ", ".join(
+            f"{name} {timing['wall_seconds']:.2f}s wall/{timing['cpu_seconds']:.2f}s cpu"
+            for name, timing in stages.items()
+        ))
+    
+    @with_job_id
+    def convert(self, resume=False, checkpoint_dir=None, deadline=None, preview_pages=None):
+        """
+        Main conversion method.
+        
+        Args:
+            resume (bool, optional): Save each finished page to a checkpoint,
+                and skip the pages an interrupted earlier run already
+                finished. The checkpoint is only reused for the same PDF
+                and extraction settings, and is removed once the
+                conversion succeeds
+            checkpoint_dir (str, optional): Checkpoint directory (default:
+                CHECKPOINT_DIR under the output directory)
+            deadline (float, optional): Seconds the conversion may take. When
+                they run out, extraction stops at the next page boundary and
+                the transactions so far are saved and returned with
+                'partial' set and the unfinished pages in 'pages_remaining';
+                finished pages are checkpointed, so continue_in_background()
+                or a later resume=True run only extracts the rest
+            preview_pages (int, optional): Only convert the first this many
+                transaction pages, returning a 'partial' result as for a
+                deadline; continue_in_background() converts the rest
+        """
+        stop_at = time.monotonic() + deadline if deadline is not None else None
+        # The transactions CSV is written page by page while later pages are
+        # still being extracted
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.output_dir.mkdir(exist_ok=True)
+        csv_stream = CsvStream(self.output_dir / ARTIFACT_FILES['csv'].format(timestamp=timestamp))
+        
+        def write_csv(transactions):
+            with self.timer.stage('write_csv'):
+                csv_stream.write(transactions)
+        
         try:
             logger.info("Starting HDFC PDF to CSV conversion...")
             
-            # Extract transactions
-            transactions, page_stats = self.extract_transactions()
-            
-            if not transactions:
-                logger.error("No transactions found in the PDF!")
+            bounded = deadline is not None or preview_pages is not None
+            checkpoint = self._checkpoint(checkpoint_dir) if resume or bounded else None
+            try:
+                results = self._run_stages(writer=PipelineWriter(write_csv), checkpoint=checkpoint,
+                                           deadline=stop_at, page_limit=preview_pages)
+            finally:
+                csv_stream.close()
+            partial = bool(self.pages_remaining)
+            if checkpoint is not None and results is not None and not partial:
+                checkpoint.clear()
+            if results is None:
+                csv_stream.discard()
+                if partial:
+                    return {
+                        'success': False,
+                        'error': 'Deadline reached before any transactions were extracted',
+                        'partial': True,
+                        'pages_remaining': list(self.pages_remaining)
+                    }
                 return {
                     'success': False,
                     'error': 'No transactions found in the PDF'
                 }
-            
-            # Categorize transactions
-            categorized_transactions = self.categorize_transactions(transactions)
-            
-            # Generate summary
-            summary = self.generate_summary(categorized_transactions)
+            categorized_transactions, page_stats, summary = results
             
             # Save results
-            output_files = self.save_results(categorized_transactions, page_stats, summary)
+            output_files = self.save_results(categorized_transactions, page_stats, summary,
+                                             timestamp=timestamp, written=['csv'])
             
-            logger.info("Conversion completed successfully!")
+            if partial:
+                logger.warning(f"Partial conversion: {len(self.pages_remaining)} pages left for a resumed run")
+            else:
+                logger.info("Conversion completed successfully!")
             logger.info(f"Output files saved in: {self.output_dir}")
+            self._log_timings()
             
             return {
                 'success': True,
+                'partial': partial,
                 'csv_file': str(output_files['transactions_file']),
                 'excel_file': str(output_files['excel_file']),
                 'summary_file': str(output_files['summary_file']),
-                'pages_processed': len(page_stats)
+                'monthly_file': str(output_files['monthly_file']),
+                'recurring_file': str(output_files['recurring_file']),
+                'stats_file': str(output_files['stats_file']),
+                'timings_file': str(output_files['timings_file']),
+                'pages_processed': self._pages_processed(page_stats),
+                'pages_skipped': list(self.skipped_pages),
+                'pages_resumed': list(self.resumed_pages),
+                'pages_remaining': list(self.pages_remaining),
+                'transactions': categorized_transactions,
+                'timings': self.timer.as_dict(),
+                'memory': self.memory_budget.as_dict() if self.memory_budget else None
+            }
+            
+        except Exception as e:
+            logger.error(f"Conversion failed: {e}")
+            csv_stream.discard()
+            return {
+                'success': False,
+                'error': str(e)
+            }
+    
+    def continue_in_background(self, checkpoint_dir=None, on_complete=None):
+        """
+        Finish a partial (deadline-bounded or preview) conversion in a background thread.
+        
+        The continuation resumes from the checkpoint the partial run left,
+        so only the remaining pages are extracted, and writes a complete
+        set of output files.
+        
+        Args:
+            checkpoint_dir (str, optional): Checkpoint directory the partial
+                run used
+            on_complete (callable, optional): Called with the convert()
+                result of the continuation
+        
+        Returns:
+            threading.Thread: The started continuation
+        """
+        def run():
+            result = self.convert(resume=True, checkpoint_dir=checkpoint_dir)
+            if on_complete is not None:
+                on_complete(result)
+        
+        thread = threading.Thread(target=run, name='conversion-continuation', daemon=True)
+        thread.start()
+        return thread
+    
+    @with_job_id
+    def convert_to_memory(self, formats=(), preview_pages=None, deadline=None):
+        """
+        Run the conversion without writing any output files.
+        
+        Args:
+            formats (iterable, optional): Artifacts from ARTIFACT_FILES to
+                serialise into in-memory buffers (default: none)
+            preview_pages (int, optional): Only convert the first this many
+                transaction pages. The pages finished are kept in memory,
+                and the next convert_to_memory() call on this converter
+                converts just the rest
+            deadline (float, optional): Seconds the conversion may take. When
+                they run out, extraction stops at the next page boundary and
+                a 'partial' result is returned as for preview_pages
+        
+        Returns:
+            dict: 'success', plus on success 'transactions' (DataFrame),
+            'summary' (dict), 'page_stats' (list), 'pages_processed',
+            'pages_skipped', 'partial' and 'pages_remaining' (pages a preview
+            or deadline left), 'artifacts' (format -> (filename, bytes)),
+            'timings' and 'memory' (memory budget report, or None without a
+            budget); 'error' on failure
+        """
+        stop_at = time.monotonic() + deadline if deadline is not None else None
+        try:
+            logger.info("Starting in-memory HDFC PDF conversion...")
+            
+            if preview_pages is not None or (deadline is not None and self.preview_checkpoint is None):
+                self.preview_checkpoint = MemoryCheckpoint()
+            results = self._run_stages(checkpoint=self.preview_checkpoint, deadline=stop_at,
+                                       page_limit=preview_pages)
+            if not self.pages_remaining:
+                self.preview_checkpoint = None
+            if results is None:
+                if self.pages_remaining:
+                    return {
+                        'success': False,
+                        'error': 'Deadline reached before any transactions were extracted',
+                        'partial': True,
+                        'pages_remaining': list(self.pages_remaining)
+                    }
+                return {
+                    'success': False,
+                    'error': 'No transactions found in the PDF'
+                }
+            categorized_transactions, page_stats, summary = results
+            df = transactions_frame(categorized_transactions)
+            
+            artifacts = self.serialize_results(df, page_stats, summary, formats) if formats else {}
+            
+            logger.info("In-memory conversion completed successfully!")
+            self._log_timings()
+            
+            return {
+                'success': True,
+                'transactions': df,
+                'summary': summary,
+                'page_stats': page_stats,
+                'pages_processed': self._pages_processed(page_stats),
+                'pages_skipped': list(self.skipped_pages),
+                'partial': bool(self.pages_remaining),
+                'pages_remaining': list(self.pages_remaining),
+                'artifacts': artifacts,
+                'timings': self.timer.as_dict(),
+                'memory': self.memory_budget.as_dict() if self.memory_budget else None
             }
             
         except Exception as e:
@@ -497,8 +2412,63 @@ class HDFCConverter:
             }
 
 
-def main():
+# Listener thread started by setup_logging()
+_log_listener = None
+
+
+def setup_logging(verbose=False, log_format='text', log_file=LOG_FILE):
+    """
+    Configure logging for command line runs and servers.
+    
+    Emitting a record only puts it on a queue; a listener thread formats
+    and writes it, so conversions never wait on log I/O or handler locks.
+    Records carry the job id of the conversion that emitted them, and are
+    written as JSON lines to `log_file` (None for no file) and to stdout,
+    as text or (log_format='json') JSON lines. Calling it again replaces
+    the previous configuration; the listener is stopped at exit.
+    """
+    global _log_listener
+    _stop_logging()
+    
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(JsonFormatter() if log_format == 'json'
+                         else logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    handlers = [console]
+    if log_file:
+        file_handler = logging.FileHandler(log_file)
+        file_handler.setFormatter(JsonFormatter())
+        handlers.insert(0, file_handler)
+    
+    records = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(records)
+    queue_handler.addFilter(JobIdFilter())
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(logging.DEBUG if verbose else logging.INFO)
+    
+    _log_listener = logging.handlers.QueueListener(records, *handlers)
+    _log_listener.start()
+
+
+@atexit.register
+def _stop_logging():
+    """Write out the records still queued."""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+
+def main(argv=None):
     """Main entry point for command line usage."""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in LEDGER_COMMANDS:
+        from hdfc_ledger import main as ledger_main
+        sys.exit(ledger_main(argv))
+    if argv and argv[0] in SHARD_COMMANDS:
+        from hdfc_shard import main as shard_main
+        sys.exit(shard_main(argv))
+    
     parser = argparse.ArgumentParser(
         description="Convert HDFC Bank PDF statements to CSV format",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -507,6 +2477,21 @@ Examples:
   python hdfc_converter.py statement.pdf
   python hdfc_converter.py statement.pdf --output-dir ./results
   python hdfc_converter.py /path/to/statements/hdfc_2024.pdf --verbose
+  python hdfc_converter.py large_statement.pdf --max-memory 512M
+  python hdfc_converter.py large_statement.pdf --resume
+  python hdfc_converter.py yearly_statement.pdf --since 2024-03-01 --until 2024-03-31
+  python hdfc_converter.py statement.pdf --pages 1-3,7
+  python hdfc_converter.py large_statement.pdf --deadline 60   # then --resume to finish
+  python hdfc_converter.py statement.pdf --sqlite ledger.db
+
+Ledger commands (see hdfc_converter.py export/query --help):
+  python hdfc_converter.py export --sqlite ledger.db 2023/*.pdf results/*.csv
+  python hdfc_converter.py query ledger.db monthly --category "UPI Payments"
+  python hdfc_converter.py query ledger.db search swiggy
+
+Sharded conversion (see hdfc_converter.py coordinate/worker --help):
+  python hdfc_converter.py worker --queue /mnt/shared/queue
+  python hdfc_converter.py coordinate --queue /mnt/shared/queue --local-workers 4 archive/*.pdf
         """
     )
     
@@ -527,21 +2512,121 @@ Examples:
         help='Enable verbose logging'
     )
     
-    args = parser.parse_args()
+    parser.add_argument(
+        '--log-format',
+        choices=('text', 'json'),
+        default='text',
+        help=f'Console log format; {LOG_FILE} is always JSON lines (default: text)'
+    )
+    
+    parser.add_argument(
+        '--max-memory',
+        type=parse_size,
+        metavar='SIZE',
+        help='Memory budget for the whole process, e.g. 512M or 2G; pages are extracted in chunks sized to '
+             'stay under it'
+    )
+    
+    parser.add_argument(
+        '--no-prefilter',
+        dest='prefilter',
+        action='store_false',
+        help='Send every page to camelot instead of skipping pages without transaction text'
+    )
+    
+    parser.add_argument(
+        '--pages',
+        type=parse_pages,
+        metavar='PAGES',
+        help='Only extract these pages, e.g. 3-5,9'
+    )
+    
+    parser.add_argument(
+        '--since',
+        type=parse_date_option,
+        metavar='DATE',
+        help='Only convert transactions on or after this date (YYYY-MM-DD or DD/MM/YYYY); '
+             'pages indexed as entirely earlier are not extracted'
+    )
+    
+    parser.add_argument(
+        '--until',
+        type=parse_date_option,
+        metavar='DATE',
+        help='Only convert transactions on or before this date; pages indexed as entirely later are not extracted'
+    )
+    
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='Checkpoint each finished page, and pick up where an interrupted run on the same PDF stopped'
+    )
+    
+    parser.add_argument(
+        '--checkpoint-dir',
+        metavar='DIR',
+        help=f'Checkpoint directory for --resume (default: {CHECKPOINT_DIR} in the output directory)'
+    )
+    
+    parser.add_argument(
+        '--deadline',
+        type=float,
+        metavar='SECONDS',
+        help='Stop at the first page boundary after this many seconds and save the partial results; '
+             'finish later with --resume'
+    )
     
-    # Set logging level
-    if args.verbose:
-        logging.getLogger().setLevel(logging.DEBUG)
+    parser.add_argument(
+        '--sqlite',
+        metavar='LEDGER_DB',
+        help='Also add the transactions to this SQLite ledger (see the query command)'
+    )
+    
+    parser.add_argument(
+        '--profile',
+        metavar='PSTATS_FILE',
+        help='Profile the run with cProfile and write pstats data to this file'
+    )
+    
+    args = parser.parse_args(argv)
+    if args.since and args.until and args.since > args.until:
+        parser.error('--since must not be after --until')
+    
+    # Set up logging
+    setup_logging(args.verbose, args.log_format)
     
     # Use the provided PDF path
     pdf_path = args.pdf_path
     
+    # A run converts one statement, so its job id covers every record, not just the converter's
+    job_id = uuid.uuid4().hex[:12]
+    JOB_ID.set(job_id)
+    
     try:
         # Create converter and run conversion
-        converter = HDFCConverter(pdf_path, args.output_dir)
-        success = converter.convert()
+        converter = HDFCConverter(pdf_path, args.output_dir, max_memory=args.max_memory,
+                                  prefilter=args.prefilter, pages=args.pages, job_id=job_id,
+                                  since=args.since, until=args.until)
+        
+        if args.profile:
+            import cProfile
+            profiler = cProfile.Profile()
+            result = profiler.runcall(converter.convert, resume=args.resume, checkpoint_dir=args.checkpoint_dir,
+                                      deadline=args.deadline)
+            profiler.dump_stats(args.profile)
+            logger.info(f"Saved profile to: {args.profile} (inspect with python -m pstats)")
+        else:
+            result = converter.convert(resume=args.resume, checkpoint_dir=args.checkpoint_dir,
+                                       deadline=args.deadline)
         
-        if success:
+        if result['success']:
+            if result['partial']:
+                logger.warning(f"⏱ Deadline reached: pages {result['pages_remaining']} were not converted; "
+                               f"rerun with --resume to finish")
+            if args.sqlite:
+                from hdfc_ledger import LedgerStore
+                with LedgerStore(args.sqlite) as ledger:
+                    ledger.export(result['transactions'], converter.pdf_path.name)
             logger.info("✅ Conversion completed successfully!")
             sys.exit(0)
         else:
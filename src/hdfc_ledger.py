@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+SQLite ledger for converted HDFC Bank statements
+
+Collects transactions from many statements into one indexed SQLite
+database, so questions such as monthly spend by category or a narration
+search are answered from indexes instead of re-reading every CSV.
+
+Usage:
+  hdfc-converter export --sqlite ledger.db statement.pdf results/hdfc_transactions_*.csv
+  hdfc-converter query ledger.db monthly --category "UPI Payments" --since 2023-04
+  hdfc-converter query ledger.db months
+  hdfc-converter query ledger.db search swiggy
+"""
+
+import argparse
+import csv
+import logging
+import sqlite3
+import sys
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Rows per executemany() call during bulk inserts
+INSERT_BATCH_SIZE = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    date TEXT,
+    narration TEXT NOT NULL DEFAULT '',
+    reference TEXT,
+    value_date TEXT,
+    withdrawal REAL NOT NULL DEFAULT 0,
+    deposit REAL NOT NULL DEFAULT 0,
+    amount REAL NOT NULL DEFAULT 0,
+    balance REAL,
+    category TEXT,
+    page INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions(date);
+CREATE INDEX IF NOT EXISTS idx_transactions_category ON transactions(category, date);
+CREATE INDEX IF NOT EXISTS idx_transactions_amount ON transactions(amount);
+CREATE INDEX IF NOT EXISTS idx_transactions_source ON transactions(source);
+CREATE TABLE IF NOT EXISTS monthly_rollups (
+    month TEXT NOT NULL,
+    category TEXT NOT NULL,
+    transactions INTEGER NOT NULL,
+    debits INTEGER NOT NULL,
+    debit REAL NOT NULL,
+    credit REAL NOT NULL,
+    net REAL NOT NULL,
+    PRIMARY KEY (month, category)
+);
+CREATE TABLE IF NOT EXISTS monthly_balances (
+    month TEXT PRIMARY KEY,
+    opening_balance REAL,
+    closing_balance REAL
+);
+"""
+
+# Full-text index on narration, kept in sync with the transactions table
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts
+    USING fts5(narration, content='transactions', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS transactions_fts_insert AFTER INSERT ON transactions BEGIN
+    INSERT INTO transactions_fts(rowid, narration) VALUES (new.id, new.narration);
+END;
+CREATE TRIGGER IF NOT EXISTS transactions_fts_delete AFTER DELETE ON transactions BEGIN
+    INSERT INTO transactions_fts(transactions_fts, rowid, narration) VALUES ('delete', old.id, old.narration);
+END;
+"""
+
+# Recompute one month's rollups from its transactions (range scan on the date index)
+ROLLUP_SQL = """
+INSERT INTO monthly_rollups (month, category, transactions, debits, debit, credit, net)
+SELECT :month, COALESCE(category, 'Other'), COUNT(*), SUM(withdrawal > 0),
+       ROUND(SUM(withdrawal), 2), ROUND(SUM(deposit), 2), ROUND(SUM(amount), 2)
+FROM transactions
+WHERE date BETWEEN :first AND :last
+GROUP BY COALESCE(category, 'Other')
+"""
+
+BALANCE_SQL = """
+INSERT INTO monthly_balances (month, opening_balance, closing_balance)
+SELECT :month,
+       (SELECT ROUND(balance - amount, 2) FROM transactions
+        WHERE date BETWEEN :first AND :last AND balance IS NOT NULL ORDER BY date, id LIMIT 1),
+       (SELECT balance FROM transactions
+        WHERE date BETWEEN :first AND :last AND balance IS NOT NULL ORDER BY date DESC, id DESC LIMIT 1)
+WHERE EXISTS (SELECT 1 FROM transactions WHERE date BETWEEN :first AND :last)
+"""
+
+INSERT_SQL = """
+INSERT INTO transactions
+    (source, date, narration, reference, value_date, withdrawal, deposit, amount, balance, category, page)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def to_iso_date(value):
+    """Convert a statement date to YYYY-MM-DD, or None if it cannot be parsed."""
+    from hdfc_converter import parse_statement_date
+
+    date = parse_statement_date(value) if value is not None else None
+    return date.isoformat() if date else None
+
+
+def to_amount(value):
+    """Convert a statement amount such as '1,402.94' to a float (0.0 when blank)."""
+    try:
+        return float(str(value).replace(',', '').strip() or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _row(source, transaction):
+    withdrawal = to_amount(transaction.get('Withdrawal_Amount'))
+    deposit = to_amount(transaction.get('Deposit_Amount'))
+    balance = transaction.get('Closing_Balance')
+    page = transaction.get('Page_Number')
+    return (
+        source,
+        to_iso_date(transaction.get('Date')),
+        str(transaction.get('Narration') or ''),
+        transaction.get('Reference_Number'),
+        to_iso_date(transaction.get('Value_Date')),
+        withdrawal,
+        deposit,
+        round(deposit - withdrawal, 2),
+        to_amount(balance) if balance not in (None, '') else None,
+        transaction.get('Category'),
+        int(page) if str(page or '').strip().isdigit() else None,
+    )
+
+
+class LedgerStore:
+    """Indexed SQLite store of transactions from any number of statements."""
+
+    def __init__(self, path):
+        """
+        Open (and if needed create) a ledger database.
+
+        Args:
+            path (str): SQLite database file, or ':memory:'
+        """
+        self.path = str(path)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+        try:
+            self.conn.executescript(FTS_SCHEMA)
+            self.has_fts = True
+        except sqlite3.OperationalError as e:
+            # SQLite builds without FTS5 fall back to LIKE searches
+            logger.warning(f"Full-text search unavailable ({e}); narration search will scan")
+            self.has_fts = False
+        
+        # Ledgers created before rollups existed get them built once
+        if (self.conn.execute("SELECT 1 FROM transactions LIMIT 1").fetchone()
+                and not self.conn.execute("SELECT 1 FROM monthly_rollups LIMIT 1").fetchone()):
+            with self.conn:
+                self._refresh_rollups(self._months("SELECT DISTINCT substr(date, 1, 7) FROM transactions"))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def export(self, transactions, source):
+        """
+        Bulk-insert one statement's transactions in a single database transaction.
+
+        Rows previously exported from the same source are replaced, so
+        re-exporting a statement does not duplicate it. Monthly rollups are
+        recomputed only for the months the old and new rows fall in.
+
+        Args:
+            transactions (list or DataFrame): Converted transactions
+            source (str): Name identifying the statement, e.g. its file name
+
+        Returns:
+            int: Number of rows inserted
+        """
+        if hasattr(transactions, 'to_dict'):
+            transactions = transactions.to_dict('records')
+
+        inserted = 0
+        with self.conn:
+            months = self._months("SELECT DISTINCT substr(date, 1, 7) FROM transactions WHERE source = ?", (source,))
+            self.conn.execute("DELETE FROM transactions WHERE source = ?", (source,))
+            batch = []
+            for transaction in transactions:
+                row = _row(source, transaction)
+                if row[1]:
+                    months.add(row[1][:7])
+                batch.append(row)
+                if len(batch) >= INSERT_BATCH_SIZE:
+                    self.conn.executemany(INSERT_SQL, batch)
+                    inserted += len(batch)
+                    batch = []
+            if batch:
+                self.conn.executemany(INSERT_SQL, batch)
+                inserted += len(batch)
+            self._refresh_rollups(months)
+
+        logger.info(f"Exported {inserted} transactions from {source} to {self.path}")
+        return inserted
+
+    def _months(self, sql, params=()):
+        return {row[0] for row in self.conn.execute(sql, params) if row[0]}
+
+    def _refresh_rollups(self, months):
+        """Recompute rollups and balances for the given YYYY-MM months (inside the caller's transaction)."""
+        for month in sorted(months):
+            bounds = {'month': month, 'first': f'{month}-01', 'last': f'{month}-31'}
+            self.conn.execute("DELETE FROM monthly_rollups WHERE month = ?", (month,))
+            self.conn.execute("DELETE FROM monthly_balances WHERE month = ?", (month,))
+            self.conn.execute(ROLLUP_SQL, bounds)
+            self.conn.execute(BALANCE_SQL, bounds)
+
+    def monthly_summary(self, since=None, until=None):
+        """
+        Per-month totals with opening and closing balances, read from the rollups.
+
+        Returns:
+            list: Rows with month, transactions, debit, credit, net,
+            opening_balance and closing_balance
+        """
+        conditions, params = self._month_range(since, until)
+        return [dict(row) for row in self.conn.execute(f"""
+            SELECT r.month, SUM(r.transactions) AS transactions, ROUND(SUM(r.debit), 2) AS debit,
+                   ROUND(SUM(r.credit), 2) AS credit, ROUND(SUM(r.net), 2) AS net,
+                   b.opening_balance, b.closing_balance
+            FROM monthly_rollups r LEFT JOIN monthly_balances b ON b.month = r.month
+            WHERE {' AND '.join(conditions) or '1'}
+            GROUP BY r.month ORDER BY r.month
+        """, params)]
+
+    def _month_range(self, since, until, column='r.month'):
+        conditions, params = [], []
+        if since:
+            conditions.append(f'{column} >= ?')
+            params.append(since[:7])
+        if until:
+            conditions.append(f'{column} <= ?')
+            params.append(until[:7])
+        return conditions, params
+
+    def monthly_spend(self, category=None, since=None, until=None):
+        """
+        Withdrawals per month and category, read from the rollups.
+
+        Args:
+            category (str, optional): Only this category
+            since (str, optional): First month to include (YYYY-MM; a YYYY-MM-DD day selects its month)
+            until (str, optional): Last month to include (YYYY-MM; a YYYY-MM-DD day selects its month)
+
+        Returns:
+            list: Rows with month, category, spend and transactions
+        """
+        conditions, params = self._month_range(since, until)
+        conditions.append('r.debit > 0')
+        if category:
+            conditions.append('r.category = ?')
+            params.append(category)
+
+        return [dict(row) for row in self.conn.execute(f"""
+            SELECT r.month, r.category, r.debit AS spend, r.debits AS transactions
+            FROM monthly_rollups r
+            WHERE {' AND '.join(conditions)}
+            ORDER BY r.month, spend DESC
+        """, params)]
+
+    def search(self, text, limit=50):
+        """
+        Find transactions whose narration matches the search text, newest first.
+
+        Args:
+            text (str): Words to look for (all must match)
+            limit (int, optional): Maximum number of rows
+
+        Raises:
+            ValueError: If the text has no words to look for
+        """
+        if not text.split():
+            raise ValueError("Search text is empty")
+        columns = "t.date, t.narration, t.withdrawal, t.deposit, t.balance, t.category, t.source"
+        if self.has_fts:
+            # Quote each word so punctuation in narrations (UPI-, @okaxis) isn't FTS syntax
+            query = ' '.join('"' + word.replace('"', '""') + '"' for word in text.split())
+            rows = self.conn.execute(f"""
+                SELECT {columns} FROM transactions_fts f
+                JOIN transactions t ON t.id = f.rowid
+                WHERE transactions_fts MATCH ?
+                ORDER BY t.date DESC LIMIT ?
+            """, (query, limit))
+        else:
+            conditions = ' AND '.join('t.narration LIKE ?' for _ in text.split())
+            rows = self.conn.execute(f"""
+                SELECT {columns} FROM transactions t WHERE {conditions}
+                ORDER BY t.date DESC LIMIT ?
+            """, [f'%{word}%' for word in text.split()] + [limit])
+        return [dict(row) for row in rows]
+
+    def sources(self):
+        """Statements in the ledger with their transaction counts and date ranges."""
+        return [dict(row) for row in self.conn.execute("""
+            SELECT source, COUNT(*) AS transactions, MIN(date) AS first, MAX(date) AS last
+            FROM transactions GROUP BY source ORDER BY first
+        """)]
+
+
+def read_transactions_csv(path):
+    """Read a transactions CSV written by HDFCConverter."""
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def export_files(ledger, paths, max_memory=None):
+    """
+    Export PDFs (converted in memory) and converter CSVs into the ledger.
+
+    Returns:
+        int: Number of files that could not be exported
+    """
+    failures = 0
+    for path in map(Path, paths):
+        if path.suffix.lower() == '.pdf':
+            from hdfc_converter import HDFCConverter
+
+            converter = HDFCConverter.from_bytes(path.read_bytes(), name=path.name, max_memory=max_memory)
+            result = converter.convert_to_memory()
+            if not result['success']:
+                logger.error(f"❌ {path}: {result.get('error')}")
+                failures += 1
+                continue
+            transactions = result['transactions']
+        else:
+            transactions = read_transactions_csv(path)
+        ledger.export(transactions, path.name)
+    return failures
+
+
+def print_rows(rows, columns):
+    """Print rows as an aligned text table."""
+    if not rows:
+        print("No matching transactions")
+        return
+
+    def cell(value):
+        return f"{value:,.2f}" if isinstance(value, float) else ('' if value is None else str(value))
+
+    widths = {column: max(len(column), *(len(cell(row[column])) for row in rows)) for column in columns}
+    print('  '.join(column.ljust(widths[column]) for column in columns))
+    for row in rows:
+        print('  '.join(
+            cell(row[column]).rjust(widths[column]) if isinstance(row[column], (int, float))
+            else cell(row[column]).ljust(widths[column])
+            for column in columns
+        ))
+
+
+def main(argv=None):
+    """Entry point for the export and query subcommands."""
+    from hdfc_converter import parse_size, setup_logging
+
+    parser = argparse.ArgumentParser(prog='hdfc-converter', description="SQLite ledger of HDFC transactions")
+    subcommands = parser.add_subparsers(dest='command', required=True)
+
+    export = subcommands.add_parser('export', help='Load statements (PDF) or converted CSVs into a ledger')
+    export.add_argument('--sqlite', required=True, metavar='LEDGER_DB', help='SQLite ledger file')
+    export.add_argument('files', nargs='+', help='Statement PDFs or hdfc_transactions_*.csv files')
+    export.add_argument('--max-memory', type=parse_size, metavar='SIZE', help='Process memory budget for PDF conversion')
+    export.add_argument('--verbose', '-v', action='store_true', help='Enable verbose logging')
+
+    query = subcommands.add_parser('query', help='Answer common questions from a ledger')
+    query.add_argument('ledger', help='SQLite ledger file')
+    questions = query.add_subparsers(dest='question', required=True)
+    monthly = questions.add_parser('monthly', help='Spend per month and category')
+    monthly.add_argument('--category', help='Only this category')
+    monthly.add_argument('--since', help='First month (YYYY-MM or YYYY-MM-DD)')
+    monthly.add_argument('--until', help='Last month (YYYY-MM or YYYY-MM-DD)')
+    search = questions.add_parser('search', help='Search narrations')
+    search.add_argument('text', help='Words to search for')
+    search.add_argument('--limit', type=int, default=50, help='Maximum rows (default: 50)')
+    months = questions.add_parser('months', help='Monthly totals with opening and closing balances')
+    months.add_argument('--since', help='First month (YYYY-MM)')
+    months.add_argument('--until', help='Last month (YYYY-MM)')
+    questions.add_parser('sources', help='Statements in the ledger')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'export':
+        setup_logging(args.verbose)
+        with LedgerStore(args.sqlite) as ledger:
+            failures = export_files(ledger, args.files, args.max_memory)
+        return 1 if failures else 0
+
+    if not Path(args.ledger).exists():
+        print(f"Ledger not found: {args.ledger}", file=sys.stderr)
+        return 1
+    with LedgerStore(args.ledger) as ledger:
+        if args.question == 'monthly':
+            print_rows(ledger.monthly_spend(args.category, args.since, args.until),
+                       ['month', 'category', 'spend', 'transactions'])
+        elif args.question == 'months':
+            print_rows(ledger.monthly_summary(args.since, args.until),
+                       ['month', 'transactions', 'debit', 'credit', 'net', 'opening_balance', 'closing_balance'])
+        elif args.question == 'search':
+            try:
+                rows = ledger.search(args.text, args.limit)
+            except ValueError as e:
+                print(e, file=sys.stderr)
+                return 1
+            print_rows(rows, ['date', 'narration', 'withdrawal', 'deposit', 'balance', 'category'])
+        else:
+            print_rows(ledger.sources(), ['source', 'transactions', 'first', 'last'])
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
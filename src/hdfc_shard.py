@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+Page-range sharding of statement conversions across worker processes
+
+A coordinator splits each statement into shards of consecutive pages and
+publishes them to a job queue kept in a shared directory (any filesystem
+every node mounts; no broker). Workers on any node claim shards with an
+atomic rename, extract and categorize their pages with HDFCConverter and
+write the shard results back. The coordinator merges the results in page
+order and writes the usual output files for each statement.
+
+Queue layout:
+  <queue>/pdfs/<sha256>.pdf             statements, copied in by the coordinator
+  <queue>/jobs/<job>.json               one manifest per statement
+  <queue>/pending/<job>-<page>.json     shards waiting for a worker
+  <queue>/claimed/<job>-<page>.<claim>.json
+                                        shards being converted, one file per claim
+  <queue>/done/<job>-<page>.json        shard results
+  <queue>/failed/<job>-<page>.json      shards that raised, with the error
+
+Usage:
+  hdfc-converter worker --queue /mnt/shared/queue
+  hdfc-converter coordinate --queue /mnt/shared/queue -o results 2023/*.pdf
+  hdfc-converter coordinate --queue /tmp/queue --local-workers 4 statement.pdf
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Pages per shard
+DEFAULT_SHARD_PAGES = 10
+
+# Seconds between queue scans by idle workers and the waiting coordinator
+DEFAULT_POLL_INTERVAL = 1.0
+
+# Seconds after which a claimed shard is assumed lost (its worker died) and
+# handed out again
+DEFAULT_STALE_AFTER = 30 * 60
+
+# Queue subdirectories a shard moves through
+SHARD_STATES = ('pending', 'claimed', 'done', 'failed')
+
+
+def count_pages(pdf_path):
+    """Number of pages in a PDF; sharding needs pypdf or PyPDF2 to count them."""
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        try:
+            from PyPDF2 import PdfReader
+        except ImportError:
+            raise RuntimeError("Sharding needs pypdf or PyPDF2 to count pages")
+    return len(PdfReader(str(pdf_path)).pages)
+
+
+class ShardQueue:
+    """
+    Job queue of page-range shards in a shared directory.
+
+    Every state change is a rename or an atomic replace within the queue
+    directory, so any number of workers, on any node that mounts it, can
+    claim shards without further locking: exactly one rename of a pending
+    shard succeeds. Each claim gets its own file name, so a worker whose
+    claim was requeued (see requeue_stale()) can tell, and never finishes
+    a shard another worker has claimed since.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        for name in ('pdfs', 'jobs') + SHARD_STATES:
+            (self.directory / name).mkdir(parents=True, exist_ok=True)
+
+    def _path(self, state, name):
+        return self.directory / state / name
+
+    def _write(self, path, data):
+        # Dot-prefixed temporary names are never matched by the *.json scans
+        tmp = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+        tmp.write_text(json.dumps(data), encoding='utf-8')
+        os.replace(tmp, path)
+
+    def _read(self, path):
+        return json.loads(path.read_text(encoding='utf-8'))
+
+    def submit(self, pdf_path, shard_pages=DEFAULT_SHARD_PAGES, prefilter=True):
+        """
+        Copy a statement into the queue and publish its shards.
+
+        Returns:
+            str: Job id, for status() and results()
+        """
+        from hdfc_converter import file_sha256
+
+        pdf_path = Path(pdf_path)
+        page_count = count_pages(pdf_path)
+        pdf = self._path('pdfs', f'{file_sha256(pdf_path)}.pdf')
+        if not pdf.exists():
+            tmp = pdf.with_name(f'.{pdf.name}.{os.getpid()}.tmp')
+            shutil.copyfile(pdf_path, tmp)
+            os.replace(tmp, pdf)
+
+        job = uuid.uuid4().hex[:12]
+        shards = {}
+        for first in range(1, page_count + 1, shard_pages):
+            shards[f'{job}-{first:05d}.json'] = list(range(first, min(first + shard_pages, page_count + 1)))
+
+        # The manifest goes first, so workers never see shards of an unknown job
+        self._write(self._path('jobs', f'{job}.json'), {
+            'job': job, 'source': pdf_path.name, 'pdf': pdf.name, 'pages': page_count, 'shards': list(shards)})
+        for name, pages in shards.items():
+            self._write(self._path('pending', name), {
+                'job': job, 'source': pdf_path.name, 'pdf': pdf.name, 'pages': pages, 'prefilter': prefilter})
+        logger.info(f"Submitted {pdf_path.name} as job {job}: {page_count} pages in {len(shards)} shards")
+        return job
+
+    @staticmethod
+    def shard_name(claim):
+        """The shard a claim (as returned by claim()) is for."""
+        return claim.split('.', 1)[0] + '.json'
+
+    def _claims(self, name=None):
+        """Claim files in claimed/, of one shard or all of them."""
+        pattern = f"{name[:-len('.json')]}.*" if name else '*'
+        return [path for path in self._path('claimed', '').glob(pattern) if not path.name.startswith('.')]
+
+    def claim(self):
+        """
+        Claim the first pending shard.
+
+        Returns:
+            tuple: (claim, shard), where claim names this worker's claim for
+            complete() or fail(); None when no shard is pending
+        """
+        for path in sorted(self._path('pending', '').glob('*.json')):
+            claim = f"{path.stem}.{uuid.uuid4().hex[:12]}.json"
+            try:
+                # Claim time, for requeue_stale(); set first, since a rename keeps it
+                os.utime(path)
+                os.rename(path, self._path('claimed', claim))
+            except FileNotFoundError:
+                continue  # Another worker claimed it first
+            return claim, self._read(self._path('claimed', claim))
+        return None
+
+    def _finish(self, claim, state, record):
+        """Move a claimed shard to done/ or failed/; False if the claim was lost to requeue_stale()."""
+        name = self.shard_name(claim)
+        path = self._path('claimed', claim)
+        # Renewing the claim time keeps requeue_stale() off it while it is finished
+        finishing = path.with_name(path.name + '.finishing')
+        try:
+            os.utime(path)
+            os.rename(path, finishing)
+        except FileNotFoundError:
+            logger.warning(f"Shard {name} was requeued while this worker converted it; result discarded")
+            return False
+        self._write(self._path(state, name), record)
+        finishing.unlink()
+        return True
+
+    def complete(self, claim, result):
+        """Record a claimed shard's result; returns False if the claim was lost."""
+        return self._finish(claim, 'done', result)
+
+    def fail(self, claim, error):
+        """Record that a claimed shard could not be converted; returns False if the claim was lost."""
+        return self._finish(claim, 'failed', {'error': error})
+
+    def requeue_stale(self, stale_after=DEFAULT_STALE_AFTER):
+        """Hand out again the shards claimed more than `stale_after` seconds ago; returns their names."""
+        requeued = []
+        cutoff = time.time() - stale_after
+        for path in self._claims():
+            name = self.shard_name(path.name)
+            try:
+                if path.stat().st_mtime >= cutoff:
+                    continue
+                # Also picks up a worker that died while finishing its shard
+                os.rename(path, self._path('pending', name))
+            except FileNotFoundError:
+                continue  # Completed in the meantime
+            logger.warning(f"Shard {name} was claimed {stale_after:.0f}s ago without a result; requeued")
+            requeued.append(name)
+        return requeued
+
+    def status(self, job):
+        """Return the number of the job's shards in each state, plus 'total'."""
+        shards = self._read(self._path('jobs', f'{job}.json'))['shards']
+        claimed = {self.shard_name(path.name) for path in self._claims()}
+        counts = {state: sum(1 for name in shards if self._path(state, name).exists())
+                  for state in SHARD_STATES if state != 'claimed'}
+        counts['claimed'] = sum(1 for name in shards if name in claimed)
+        counts['total'] = len(shards)
+        return counts
+
+    def results(self, job):
+        """
+        Merge a finished job's shard results in page order.
+
+        Returns:
+            tuple: (transactions, page_stats, skipped_pages)
+
+        Raises:
+            RuntimeError: If a shard failed or has no result yet
+        """
+        manifest = self._read(self._path('jobs', f'{job}.json'))
+        transactions, page_stats, skipped_pages = [], [], []
+        for name in manifest['shards']:
+            failed = self._path('failed', name)
+            if failed.exists():
+                raise RuntimeError(f"Shard {name} of {manifest['source']} failed: {self._read(failed)['error']}")
+            try:
+                result = self._read(self._path('done', name))
+            except FileNotFoundError:
+                raise RuntimeError(f"Shard {name} of {manifest['source']} has not finished")
+            transactions.extend(result['transactions'])
+            page_stats.extend(result['page_stats'])
+            skipped_pages.extend(result['skipped_pages'])
+        return transactions, page_stats, skipped_pages
+
+    def discard(self, job):
+        """
+        Remove a job's shards and manifest, and its PDF unless another job still uses it.
+
+        A job that is already gone is left alone.
+        """
+        manifest_path = self._path('jobs', f'{job}.json')
+        try:
+            manifest = self._read(manifest_path)
+        except FileNotFoundError:
+            return
+        for name in manifest['shards']:
+            for state in SHARD_STATES:
+                self._path(state, name).unlink(missing_ok=True)
+            for path in self._claims(name):
+                path.unlink(missing_ok=True)
+        manifest_path.unlink(missing_ok=True)
+        if not any(self._read(path)['pdf'] == manifest['pdf'] for path in self._path('jobs', '').glob('*.json')):
+            self._path('pdfs', manifest['pdf']).unlink(missing_ok=True)
+
+
+def process_shard(queue, shard):
+    """Extract and categorize one shard's pages; returns its result record."""
+    from hdfc_converter import HDFCConverter
+
+    # Only extracts: nothing is written to the output directory
+    converter = HDFCConverter(queue.directory / 'pdfs' / shard['pdf'], queue.directory,
+                              prefilter=shard['prefilter'], pages=shard['pages'])
+    transactions, page_stats = converter.extract_transactions(on_page=converter.categorize_transactions)
+    return {'transactions': transactions, 'page_stats': page_stats, 'skipped_pages': converter.skipped_pages}
+
+
+def run_worker(directory, poll_interval=DEFAULT_POLL_INTERVAL, exit_when_idle=False):
+    """
+    Claim and convert shards until stopped.
+
+    Args:
+        directory (str): Queue directory
+        poll_interval (float, optional): Seconds to wait when no shard is pending
+        exit_when_idle (bool, optional): Return once no shard is pending
+            instead of waiting for more
+
+    Returns:
+        int: Number of shards processed
+    """
+    queue = ShardQueue(directory)
+    processed = 0
+    while True:
+        claimed = queue.claim()
+        if claimed is None:
+            if exit_when_idle:
+                return processed
+            time.sleep(poll_interval)
+            continue
+
+        name, shard = claimed
+        logger.info(f"Converting {shard['source']} pages {shard['pages'][0]}-{shard['pages'][-1]} ({name})")
+        try:
+            result = process_shard(queue, shard)
+        except Exception as e:
+            logger.error(f"Shard {name} failed: {e}")
+            queue.fail(name, f"{type(e).__name__}: {e}")
+        else:
+            queue.complete(name, result)
+        processed += 1
+
+
+def start_local_worker(directory, poll_interval=DEFAULT_POLL_INTERVAL):
+    """Start a worker process on this machine."""
+    converter = Path(__file__).with_name('hdfc_converter.py')
+    return subprocess.Popen([sys.executable, str(converter), 'worker', '--queue', str(directory),
+                             '--poll-interval', str(poll_interval)])
+
+
+def merge_job(queue, job, pdf_path, output_dir):
+    """Write the output files of a finished job; returns a convert()-style result."""
+    from hdfc_converter import HDFCConverter
+
+    try:
+        transactions, page_stats, skipped_pages = queue.results(job)
+    except RuntimeError as e:
+        logger.error(str(e))
+        return {'success': False, 'error': str(e)}
+    finally:
+        queue.discard(job)
+
+    if not transactions:
+        logger.error(f"No transactions found in {pdf_path}")
+        return {'success': False, 'error': 'No transactions found in the PDF'}
+
+    converter = HDFCConverter(pdf_path, output_dir)
+    converter.skipped_pages = skipped_pages
+    page_stats.sort(key=lambda stats: stats['Page'])
+    summary = converter.generate_summary(transactions)
+    output_files = converter.save_results(transactions, page_stats, summary)
+    return {
+        'success': True,
+        'csv_file': str(output_files['transactions_file']),
+        'summary_file': str(output_files['summary_file']),
+        'pages_processed': converter._pages_processed(page_stats),
+        'pages_skipped': skipped_pages,
+        'transactions': transactions,
+    }
+
+
+def coordinate(directory, pdf_paths, output_dir='results', shard_pages=DEFAULT_SHARD_PAGES, prefilter=True,
+               local_workers=0, poll_interval=DEFAULT_POLL_INTERVAL, stale_after=DEFAULT_STALE_AFTER):
+    """
+    Shard statements onto the queue, wait for workers and merge each statement's results.
+
+    Args:
+        directory (str): Queue directory, shared with the workers
+        pdf_paths (list): Statement PDFs
+        output_dir (str, optional): Where each statement's output files go
+        shard_pages (int, optional): Pages per shard
+        prefilter (bool, optional): Skip pages without transaction text
+        local_workers (int, optional): Worker processes to start on this
+            machine for the duration of the run, besides any remote workers
+        poll_interval (float, optional): Seconds between progress checks
+        stale_after (float, optional): Requeue shards claimed this long ago
+
+    Returns:
+        dict: PDF path -> convert()-style result
+    """
+    queue = ShardQueue(directory)
+    pending = {str(path): queue.submit(path, shard_pages, prefilter) for path in pdf_paths}
+    workers = [start_local_worker(directory, poll_interval) for _ in range(local_workers)]
+    results = {}
+    try:
+        while pending:
+            queue.requeue_stale(stale_after)
+            for path, job in list(pending.items()):
+                status = queue.status(job)
+                if status['done'] + status['failed'] < status['total']:
+                    continue
+                # merge_job() discards the job from here on, even if the merge fails
+                del pending[path]
+                results[path] = merge_job(queue, job, path, output_dir)
+                logger.info(f"Merged {len(results)}/{len(results) + len(pending)}: {path}")
+            if not pending:
+                break
+            if workers and all(worker.poll() is not None for worker in workers):
+                raise RuntimeError("All local workers exited before the queue was drained")
+            time.sleep(poll_interval)
+    finally:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.wait()
+        for job in pending.values():
+            queue.discard(job)
+    return results
+
+
+def main(argv=None):
+    """Entry point for the coordinate and worker subcommands."""
+    from hdfc_converter import setup_logging
+
+    parser = argparse.ArgumentParser(prog='hdfc-converter',
+                                     description="Convert statements across worker processes by page range")
+    subcommands = parser.add_subparsers(dest='command', required=True)
+
+    coordinator = subcommands.add_parser('coordinate', help='Shard statements onto a queue and merge the results')
+    coordinator.add_argument('files', nargs='+', help='Statement PDFs')
+    coordinator.add_argument('--queue', required=True, metavar='DIR', help='Queue directory shared with the workers')
+    coordinator.add_argument('--output-dir', '-o', default='results', help='Output directory (default: results)')
+    coordinator.add_argument('--shard-pages', type=int, default=DEFAULT_SHARD_PAGES,
+                             help=f'Pages per shard (default: {DEFAULT_SHARD_PAGES})')
+    coordinator.add_argument('--local-workers', type=int, default=0, metavar='N',
+                             help='Also start N workers on this machine (default: 0)')
+    coordinator.add_argument('--stale-after', type=float, default=DEFAULT_STALE_AFTER, metavar='SECONDS',
+                             help=f'Requeue shards claimed this long ago (default: {DEFAULT_STALE_AFTER})')
+    coordinator.add_argument('--no-prefilter', dest='prefilter', action='store_false',
+                             help='Send every page to camelot')
+
+    worker = subcommands.add_parser('worker', help='Claim and convert shards from a queue')
+    worker.add_argument('--queue', required=True, metavar='DIR', help='Queue directory shared with the coordinator')
+    worker.add_argument('--exit-when-idle', action='store_true', help='Exit once no shard is pending')
+
+    for subcommand in (coordinator, worker):
+        subcommand.add_argument('--poll-interval', type=float, default=DEFAULT_POLL_INTERVAL, metavar='SECONDS',
+                                help=f'Seconds between queue scans (default: {DEFAULT_POLL_INTERVAL})')
+        subcommand.add_argument('--verbose', '-v', action='store_true', help='Enable verbose logging')
+
+    args = parser.parse_args(argv)
+    setup_logging(args.verbose)
+
+    if args.command == 'worker':
+        try:
+            processed = run_worker(args.queue, args.poll_interval, args.exit_when_idle)
+        except KeyboardInterrupt:
+            return 0
+        logger.info(f"Processed {processed} shards")
+        return 0
+
+    results = coordinate(args.queue, args.files, args.output_dir, args.shard_pages, args.prefilter,
+                         args.local_workers, args.poll_interval, args.stale_after)
+    failures = [path for path, result in results.items() if not result['success']]
+    for path, result in results.items():
+        if result['success']:
+            print(f"{path}: {len(result['transactions'])} transactions -> {result['csv_file']}")
+        else:
+            print(f"{path}: failed: {result['error']}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,696 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the HDFC PDF Converter web backend
+"""
+
+import unittest
+import tempfile
+import subprocess
+import os
+import io
+import gzip
+import zipfile
+import json
+import shutil
+import threading
+import time
+from importlib.util import find_spec
+from pathlib import Path
+import sys
+
+# Add web-ui, src and the benchmark helpers to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'web-ui'))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'benchmarks'))
+
+try:
+    import backend
+    import metrics
+    from admission import JobPool, Saturated
+    from hdfc_converter import summarize_transactions
+    BACKEND_AVAILABLE = True
+except ImportError as e:
+    print(f"Warning: Could not import backend: {e}")
+    BACKEND_AVAILABLE = False
+
+
+from synthetic_statement import build_statement
+
+CAMELOT_AVAILABLE = find_spec('camelot') is not None
+PDF_READER_AVAILABLE = find_spec('pypdf') is not None or find_spec('PyPDF2') is not None
+
+SAMPLE_CSV = "Date,Narration,Category\n01/04/2024,UPI-GROCER,UPI Payments\n" * 200
+SAMPLE_REPORT = "# HDFC Bank Statement Analysis Report\n\n" + "| Other | 1 |\n" * 200
+
+
+@unittest.skipUnless(BACKEND_AVAILABLE, "Web backend not available")
+class TestDownloads(unittest.TestCase):
+    """Test cases for the artifact download endpoints."""
+
+    def setUp(self):
+        """Create a fake session directory with converter artifacts."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.session_id = os.path.basename(self.temp_dir)
+        self.files = {
+            'hdfc_transactions_20240101_000000.csv': SAMPLE_CSV.encode(),
+            'hdfc_transactions_20240101_000000.xlsx': b'PK\x03\x04fake-xlsx',
+            'EXTRACTION_REPORT_20240101_000000.md': SAMPLE_REPORT.encode(),
+        }
+        for name, data in self.files.items():
+            with open(os.path.join(self.temp_dir, name), 'wb') as f:
+                f.write(data)
+        with open(os.path.join(self.temp_dir, 'statement.pdf'), 'wb') as f:
+            f.write(b'%PDF-1.4')
+        self.client = backend.app.test_client()
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_bundle_streams_all_artifacts(self):
+        """Test that the bundle endpoint returns a zip of every artifact."""
+        response = self.client.get(f'/download/{self.session_id}/bundle')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/zip')
+        self.assertTrue(response.is_streamed)
+
+        archive = zipfile.ZipFile(io.BytesIO(response.get_data()))
+        self.assertEqual(sorted(archive.namelist()), sorted(self.files))
+        for name, data in self.files.items():
+            self.assertEqual(archive.read(name), data)
+        response.close()
+        self.assertFalse(os.path.exists(self.temp_dir))
+
+    def test_csv_gzip_when_accepted(self):
+        """Test that CSV downloads are gzip-encoded when the client accepts it."""
+        response = self.client.get(f'/download/{self.session_id}/csv',
+                                   headers={'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        body = response.get_data()
+        self.assertLess(len(body), len(SAMPLE_CSV))
+        self.assertEqual(gzip.decompress(body).decode(), SAMPLE_CSV)
+        response.close()
+
+    def test_csv_plain_without_gzip(self):
+        """Test that CSV downloads are uncompressed by default."""
+        response = self.client.get(f'/download/{self.session_id}/csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(response.get_data().decode(), SAMPLE_CSV)
+        response.close()
+
+    def test_excel_never_gzipped(self):
+        """Test that already-compressed Excel files are sent as-is."""
+        response = self.client.get(f'/download/{self.session_id}/excel',
+                                   headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Content-Encoding', response.headers)
+        response.close()
+
+    def test_unknown_session(self):
+        """Test that an unknown session returns 404."""
+        response = self.client.get('/download/no-such-session-xyz/bundle')
+        self.assertEqual(response.status_code, 404)
+
+    def test_in_memory_session_downloads(self):
+        """Test that in-memory sessions serialise artifacts on demand."""
+        requested = []
+
+        def artifacts(fmt):
+            requested.append(fmt)
+            return f'artifact.{fmt}', SAMPLE_CSV.encode()
+
+        backend.RESULT_STORE.put('memory-session', make_transactions(3), artifacts)
+        try:
+            response = self.client.get('/download/memory-session/csv', headers={'Accept-Encoding': 'gzip'})
+            self.assertEqual(gzip.decompress(response.get_data()).decode(), SAMPLE_CSV)
+            self.assertEqual(requested, ['csv'])
+
+            response = self.client.get('/download/memory-session/bundle')
+            archive = zipfile.ZipFile(io.BytesIO(response.get_data()))
+            self.assertEqual(len(archive.namelist()), len(backend.ARTIFACT_FILES))
+            self.assertEqual(requested.count('csv'), 1)
+        finally:
+            backend.RESULT_STORE.discard('memory-session')
+
+
+def make_transactions(count):
+    """Build converter-shaped transaction dicts spread over several months."""
+    categories = ['UPI Payments', 'Salary & Employment', 'Card Payments']
+    transactions = []
+    for i in range(count):
+        transactions.append({
+            'Date': f"{(i % 28) + 1:02d}/{(i // 28) % 12 + 1:02d}/24",
+            'Narration': f"TXN {i}",
+            'Reference_Number': f"{i:016d}",
+            'Value_Date': f"{(i % 28) + 1:02d}/{(i // 28) % 12 + 1:02d}/24",
+            'Withdrawal_Amount': f"{i:.2f}" if i % 2 else '0.00',
+            'Deposit_Amount': '0.00' if i % 2 else f"{i * 10:.2f}",
+            'Closing_Balance': f"{100000 + i:.2f}",
+            'Page_Number': i // 20 + 1,
+            'Category': categories[i % 3],
+        })
+    return transactions
+
+
+def make_rollups(transactions):
+    """The converter's (monthly_breakdown, monthly_totals) for the transactions."""
+    summary = summarize_transactions(transactions)
+    return summary['monthly_breakdown'], summary['monthly_totals']
+
+
+@unittest.skipUnless(BACKEND_AVAILABLE, "Web backend not available")
+class TestTransactionsApi(unittest.TestCase):
+    """Test cases for the paginated transactions endpoint."""
+
+    def setUp(self):
+        self.session_id = 'test-session-transactions'
+        transactions = make_transactions(300)
+        self.store = backend.RESULT_STORE.put(self.session_id, transactions, rollups=make_rollups(transactions))
+        self.client = backend.app.test_client()
+
+    def tearDown(self):
+        backend.RESULT_STORE.discard(self.session_id)
+
+    def get(self, **params):
+        return self.client.get(f'/api/sessions/{self.session_id}/transactions', query_string=params)
+
+    def test_pagination(self):
+        """Test that offset/limit slice the ledger in statement order."""
+        data = self.get(offset=10, limit=5).get_json()
+        self.assertEqual(data['total'], 300)
+        self.assertEqual([row['Narration'] for row in data['transactions']],
+                         [f"TXN {i}" for i in range(10, 15)])
+
+    def test_category_filter(self):
+        """Test filtering by category."""
+        data = self.get(category='Card Payments', limit=1000).get_json()
+        self.assertEqual(data['total'], 100)
+        self.assertTrue(all(row['Category'] == 'Card Payments' for row in data['transactions']))
+
+    def test_date_filter_and_sort(self):
+        """Test date range filtering combined with a descending sort."""
+        data = self.get(**{'from': '2024-02-01', 'to': '29/02/2024', 'sort': '-deposit'}).get_json()
+        self.assertEqual(data['total'], 28)
+        self.assertTrue(all(row['Date'].endswith('/02/24') for row in data['transactions']))
+        deposits = [float(row['Deposit_Amount']) for row in data['transactions']]
+        self.assertEqual(deposits, sorted(deposits, reverse=True))
+
+    def test_describe_result(self):
+        """Test that logged converter results carry counts and coverage, not the data."""
+        transactions = make_transactions(30)
+        summary = summarize_transactions(transactions)
+        description = backend.describe_result({
+            'success': True, 'partial': True, 'transactions': transactions, 'summary': summary,
+            'page_stats': [{'Page': 1}], 'pages_processed': 1, 'pages_remaining': [2, 3]})
+        self.assertEqual(description, {'success': True, 'partial': True, 'pages_processed': 1,
+                                       'transactions': 30, 'pages_remaining': 2,
+                                       'date_range': summary['date_range']})
+
+    def test_invalid_parameters(self):
+        """Test that malformed parameters are rejected."""
+        self.assertEqual(self.get(limit='many').status_code, 400)
+        self.assertEqual(self.get(sort='narration').status_code, 400)
+        self.assertEqual(self.get(**{'from': 'yesterday'}).status_code, 400)
+
+    def test_columns_dictionary_encoded(self):
+        """Test that low-cardinality columns are categoricals but serialise as plain values."""
+        for column in ('Category', 'Counterparty', 'Page_Number'):
+            self.assertEqual(self.store.df[column].dtype.name, 'category')
+        row = self.get(limit=1).get_json()['transactions'][0]
+        self.assertEqual((row['Category'], row['Counterparty'], row['Page_Number']), ('UPI Payments', '', 1))
+
+    def test_stats(self):
+        """Test summary statistics computed from the store."""
+        stats = self.store.stats()
+        self.assertEqual(stats['transaction_count'], 300)
+        self.assertEqual(stats['category_count'], 3)
+        self.assertEqual(stats['date_range'], {'start': '01/01/24', 'end': '20/11/24'})
+        self.assertEqual(len(stats['monthly']), 11)
+        self.assertEqual(sum(month['transactions'] for month in stats['monthly']), 300)
+        january = stats['monthly'][0]
+        self.assertEqual(january['month'], '2024-01')
+        self.assertEqual(january['closing_balance'], 100027.0)
+        self.assertEqual(stats['total_withdrawals'], round(sum(month['debit'] for month in stats['monthly']), 2))
+        self.assertEqual(backend.RESULT_STORE.put('no-rollups', make_transactions(3)).stats()['monthly'], [])
+        backend.RESULT_STORE.discard('no-rollups')
+
+    def test_merged_summaries(self):
+        """Test that statements' summaries combine month by month, with balances from the statements covering it."""
+        january, february = make_transactions(40)[:20], make_transactions(40)[20:]
+        # A first row without a balance must not open the month at zero
+        january[0] = dict(january[0], Closing_Balance='')
+        summary = backend.merge_summaries([summarize_transactions(january), summarize_transactions(february)], january + february)
+        expected = summarize_transactions(january + february)
+        self.assertTrue(summary['monthly_breakdown'].equals(expected['monthly_breakdown'].sort_index()))
+        totals = summary['monthly_totals']
+        self.assertEqual(totals['Transactions'].tolist(), [28, 12])
+        self.assertEqual(totals.loc['2024-01', 'Opening_Balance'],
+                         expected['monthly_totals'].loc['2024-01', 'Opening_Balance'])
+        self.assertGreater(totals.loc['2024-01', 'Opening_Balance'], 0)
+        self.assertEqual(totals.loc['2024-01', 'Closing_Balance'], 100027.0)
+        self.assertEqual(totals.loc['2024-02', 'Closing_Balance'], 100039.0)
+        for key in ('total_transactions', 'total_withdrawals', 'total_deposits', 'net_amount', 'date_range'):
+            self.assertEqual(summary[key], expected[key], key)
+        self.assertTrue(summary['recurring'].equals(expected['recurring']))
+        for key in ('category_breakdown', 'counterparty_breakdown'):
+            self.assertTrue(summary[key].sort_index().equals(expected[key].sort_index()), key)
+
+    def test_unknown_session(self):
+        """Test that an unknown session returns 404."""
+        response = self.client.get('/api/sessions/missing/transactions')
+        self.assertEqual(response.status_code, 404)
+
+@unittest.skipUnless(BACKEND_AVAILABLE, "Web backend not available")
+class TestBatchUpload(unittest.TestCase):
+    """Test cases for multi-file and zip uploads."""
+
+    def setUp(self):
+        self.client = backend.app.test_client()
+        self.convert_statement = backend.convert_statement
+        self.preflight = backend.preflight
+        self.converted = []
+        # The fake statements are not real PDFs; size them by their bytes
+        backend.preflight = lambda data: None
+
+        def convert_statement(filename, pdf_bytes):
+            # Each fake statement holds one month: b'%PDF month=N'
+            self.converted.append(filename)
+            month = int(pdf_bytes.rsplit(b'=', 1)[1])
+            if month == 0:
+                return None, {'success': False, 'error': 'No transactions found in the PDF'}
+            transactions = [dict(t, Date=t['Date'][:3] + f"{month:02d}/24") for t in make_transactions(5)]
+            summary = summarize_transactions(transactions)
+            return None, {'success': True, 'transactions': transactions, 'pages_processed': 1,
+                          'page_stats': [{'Page': 1, 'Status': 'extracted'}], 'summary': summary}
+        backend.convert_statement = convert_statement
+
+    def tearDown(self):
+        backend.convert_statement = self.convert_statement
+        backend.preflight = self.preflight
+
+    def upload(self, files):
+        return self.client.post('/upload', data={'file': [(io.BytesIO(data), name) for name, data in files]},
+                                content_type='multipart/form-data')
+
+    def test_files_and_archive_merged_in_date_order(self):
+        """Test that PDFs and zipped PDFs become one chronological ledger with per-file status."""
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w') as zf:
+            zf.writestr('2024/february.pdf', b'%PDF month=2')
+            zf.writestr('2024/empty.pdf', b'%PDF month=0')
+            zf.writestr('notes.txt', b'not a statement')
+        response = self.upload([('march.pdf', b'%PDF month=3'), ('january.pdf', b'%PDF month=1'),
+                                ('statements.zip', archive.getvalue())])
+        data = response.get_json()
+        self.assertEqual(response.status_code, 200, data)
+        self.assertEqual(sorted(self.converted), ['empty.pdf', 'february.pdf', 'january.pdf', 'march.pdf'])
+        statuses = {file['filename']: file['status'] for file in data['files']}
+        self.assertEqual(statuses, {'march.pdf': 'converted', 'january.pdf': 'converted',
+                                    'february.pdf': 'converted', 'empty.pdf': 'failed'})
+        self.assertEqual(data['stats']['transaction_count'], 15)
+        self.assertEqual(data['stats']['file_count'], 3)
+        self.assertEqual([month['month'] for month in data['stats']['monthly']], ['2024-01', '2024-02', '2024-03'])
+
+        rows = self.client.get(f"/api/sessions/{data['session_id']}/transactions").get_json()['transactions']
+        self.assertEqual([row['Source_File'] for row in rows[::5]], ['january.pdf', 'february.pdf', 'march.pdf'])
+        self.assertEqual([row['Date'][3:5] for row in rows], sorted(row['Date'][3:5] for row in rows))
+        report = self.client.get(f"/download/{data['session_id']}/summary").get_data(as_text=True)
+        self.assertIn('**Source**: february.pdf, january.pdf, march.pdf', report)
+        self.assertIn('**Total Transactions**: 15', report)
+        backend.RESULT_STORE.discard(data['session_id'])
+
+    def test_rejects_other_files(self):
+        """Test that non-PDF uploads and failed batches are reported."""
+        response = self.upload([('a.pdf', b'%PDF month=1'), ('b.docx', b'doc')])
+        self.assertEqual(response.status_code, 400)
+        response = self.upload([('a.pdf', b'%PDF month=0'), ('b.pdf', b'%PDF month=0')])
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual([file['status'] for file in response.get_json()['files']], ['failed', 'failed'])
+
+    def test_saturated_batch_converts_nothing(self):
+        """Test that a batch too large for the pool is turned away before any file starts converting."""
+        small_jobs = backend.SMALL_JOBS
+        backend.SMALL_JOBS = JobPool('test', workers=1, max_queued=1)
+        try:
+            response = self.upload([(f'{month}.pdf', f'%PDF month={month}'.encode()) for month in (1, 2, 3)])
+            self.assertEqual(response.status_code, 429)
+            self.assertEqual(self.converted, [])
+            self.assertEqual(backend.SMALL_JOBS.queued, 0)
+            response = self.upload([('1.pdf', b'%PDF month=1'), ('2.pdf', b'%PDF month=2')])
+            self.assertEqual(response.status_code, 200)
+        finally:
+            backend.SMALL_JOBS.shutdown()
+            backend.SMALL_JOBS = small_jobs
+
+
+@unittest.skipUnless(BACKEND_AVAILABLE, "Web backend not available")
+class TestStreamingConvert(unittest.TestCase):
+    """Test cases for the /convert endpoint and its NDJSON stream."""
+
+    class FakeConverter:
+        """Stands in for HDFCConverter, recording how far extraction got."""
+
+        def __init__(self, pages, fail_after=None):
+            self.pages = pages
+            self.fail_after = fail_after
+            self.extracted = []
+            self.page_stats = []
+            self.skipped_pages = []
+
+        def iter_transactions(self):
+            for page, transactions in enumerate(self.pages, start=1):
+                if page == self.fail_after:
+                    raise RuntimeError('camelot failed')
+                self.extracted.append(page)
+                self.page_stats.append({'Page': page, 'Status': 'extracted'})
+                yield transactions
+
+        def categorize_transactions(self, transactions):
+            return transactions
+
+    def setUp(self):
+        self.client = backend.app.test_client()
+
+    def test_records_follow_each_page(self):
+        """Test that a page's transactions are yielded before the next page is read."""
+        transactions = make_transactions(40)
+        converter = self.FakeConverter([transactions[:20], transactions[20:]])
+        records = backend.iter_conversion_records(converter)
+        self.assertEqual(next(records)['Narration'], 'TXN 0')
+        self.assertEqual(converter.extracted, [1])
+
+        rest = list(records)
+        self.assertEqual([record['type'] for record in rest], ['transaction'] * 39 + ['summary'])
+        summary = rest[-1]
+        self.assertEqual(summary['transaction_count'], 40)
+        self.assertEqual(summary['page_count'], 2)
+        self.assertEqual(summary['categories']['UPI Payments'], 14)
+        self.assertEqual(summary['total_withdrawals'], float(sum(range(1, 40, 2))))
+        self.assertEqual(summary['date_range'], {'start': '01/01/24', 'end': '12/02/24'})
+
+    def test_failure_ends_with_error_record(self):
+        """Test that a conversion failing part-way ends the stream with an error record."""
+        converter = self.FakeConverter([make_transactions(3), make_transactions(3)], fail_after=2)
+        records = list(backend.iter_conversion_records(converter))
+        self.assertEqual([record['type'] for record in records], ['transaction'] * 3 + ['error'])
+        self.assertIn('camelot failed', records[-1]['error'])
+
+    def test_rejects_bad_requests(self):
+        """Test that missing files, other file types and unknown stream formats are refused."""
+        self.assertEqual(self.client.post('/convert?stream=ndjson').status_code, 400)
+        response = self.client.post('/convert?stream=csv', data={'file': (io.BytesIO(b'%PDF'), 'a.pdf')},
+                                    content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/convert', data={'file': (io.BytesIO(b'doc'), 'a.docx')},
+                                    content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 400)
+
+    @unittest.skipUnless(CAMELOT_AVAILABLE, "camelot not available")
+    def test_ndjson_stream_of_statement(self):
+        """Test streaming a generated statement as JSON lines ending in a summary."""
+        pdf, info = build_statement(pages=2, rows_per_page=10, cover_pages=1)
+        response = self.client.post('/convert?stream=ndjson', data={'file': (io.BytesIO(pdf), 'statement.pdf')},
+                                    content_type='multipart/form-data', buffered=False)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        self.assertTrue(response.is_streamed)
+        records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual(len(records), info['transactions'] + 1)
+        self.assertTrue(all(record['type'] == 'transaction' and record['Category'] for record in records[:-1]))
+        self.assertEqual(records[-1]['type'], 'summary')
+        self.assertEqual(records[-1]['transaction_count'], info['transactions'])
+
+        response = self.client.post('/convert', data={'file': (io.BytesIO(pdf), 'statement.pdf')},
+                                    content_type='multipart/form-data')
+        data = response.get_json()
+        self.assertEqual(len(data['transactions']), info['transactions'])
+        self.assertEqual(data['summary'], {key: value for key, value in records[-1].items() if key != 'type'})
+
+
+@unittest.skipUnless(BACKEND_AVAILABLE, "Web backend not available")
+class TestAdmission(unittest.TestCase):
+    """Test cases for bounded conversion pools and upload admission."""
+
+    def setUp(self):
+        self.client = backend.app.test_client()
+        self.pool = JobPool('test', workers=1, max_queued=1, job_seconds=10.0)
+        self.release = threading.Event()
+        self.started = threading.Event()
+
+    def block(self):
+        """Occupy the pool's worker until the test ends."""
+        self.started.set()
+        return self.release.wait()
+
+    def tearDown(self):
+        self.release.set()
+        self.pool.shutdown()
+
+    def test_queue_is_bounded(self):
+        """Test that jobs beyond the workers and queue are turned away with a retry estimate."""
+        rejected = metrics.ADMISSION_REJECTIONS.value(pool='test')
+        running = self.pool.submit(self.block)
+        self.assertTrue(self.started.wait(timeout=10))
+        queued = self.pool.submit(lambda: 'done')
+        self.assertEqual(self.pool.queued, 1)
+        self.assertEqual(metrics.QUEUE_DEPTH.value(pool='test'), 1)
+        with self.assertRaises(Saturated) as raised:
+            self.pool.submit(lambda: None)
+        self.assertEqual(raised.exception.retry_after, 20)
+        self.assertEqual(metrics.ADMISSION_REJECTIONS.value(pool='test'), rejected + 1)
+
+        self.release.set()
+        self.assertEqual(queued.result(timeout=10), 'done')
+        self.assertTrue(running.result(timeout=10))
+        self.assertEqual(self.pool.queued, 0)
+        self.pool.submit(lambda: None).result(timeout=10)
+
+    def test_cancelled_and_unstarted_jobs_free_their_place(self):
+        """Test that cancelled jobs and reservations never entered are released."""
+        self.pool.submit(self.block)
+        self.assertTrue(self.started.wait(timeout=10))
+        self.assertTrue(self.pool.submit(lambda: None).cancel())
+        reservation = self.pool.reserve()
+        reservation.release()
+        reservation.release()
+        self.assertEqual(self.pool.queued, 0)
+        self.pool.reserve().release()
+
+    @unittest.skipUnless(PDF_READER_AVAILABLE, "pypdf/PyPDF2 not available")
+    def test_jobs_routed_by_page_count(self):
+        """Test that the pre-flight page count picks the pool."""
+        short, _ = build_statement(pages=2, rows_per_page=5)
+        long, _ = build_statement(pages=backend.SMALL_JOB_PAGES + 1, rows_per_page=5)
+        self.assertIs(backend.plan_conversion('short.pdf', short)[0], backend.SMALL_JOBS)
+        self.assertIs(backend.plan_conversion('long.pdf', long)[0], backend.LARGE_JOBS)
+
+    @unittest.skipUnless(PDF_READER_AVAILABLE, "pypdf/PyPDF2 not available")
+    def test_upload_rejections(self):
+        """Test that unreadable uploads get 400 and a saturated pool 429 with Retry-After."""
+        response = self.client.post('/upload', data={'file': (io.BytesIO(b'not a pdf'), 'a.pdf')},
+                                    content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 400)
+
+        pdf, _ = build_statement(pages=1, rows_per_page=5)
+        small_jobs = backend.SMALL_JOBS
+        backend.SMALL_JOBS = self.pool
+        held = [self.pool.reserve(), self.pool.reserve()]
+        try:
+            for endpoint in ('/upload', '/convert?stream=ndjson', '/preview'):
+                response = self.client.post(endpoint, data={'file': (io.BytesIO(pdf), 'statement.pdf')},
+                                            content_type='multipart/form-data')
+                self.assertEqual(response.status_code, 429)
+                self.assertEqual(response.headers['Retry-After'], str(response.get_json()['retry_after']))
+        finally:
+            backend.SMALL_JOBS = small_jobs
+            for reservation in held:
+                reservation.release()
+
+
+@unittest.skipUnless(BACKEND_AVAILABLE, "Web backend not available")
+class TestPreview(unittest.TestCase):
+    """Test cases for the /preview endpoint and background conversions."""
+
+    def setUp(self):
+        self.client = backend.app.test_client()
+
+    def post(self, pdf):
+        return self.client.post('/preview', data={'file': (io.BytesIO(pdf), 'statement.pdf')},
+                                content_type='multipart/form-data')
+
+    def wait_until_ready(self, session_id):
+        for _ in range(600):
+            status = self.client.get(f'/api/sessions/{session_id}/status').get_json()
+            if status['status'] != 'converting':
+                return status
+            time.sleep(0.1)
+        self.fail('Background conversion did not finish')
+
+    def test_unknown_session(self):
+        """Test that the status of an unknown session is 404."""
+        self.assertEqual(self.client.get('/api/sessions/missing/status').status_code, 404)
+
+    @unittest.skipUnless(CAMELOT_AVAILABLE and PDF_READER_AVAILABLE, "camelot and pypdf/PyPDF2 not available")
+    def test_preview_then_background_conversion(self):
+        """Test that a preview answers with the first pages and the session fills in afterwards."""
+        pdf, info = build_statement(pages=4, rows_per_page=10, cover_pages=1)
+        response = self.post(pdf)
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data['status'], 'converting')
+        self.assertTrue(data['stats']['approximate'])
+        self.assertEqual(data['stats']['page_count'], 4)
+        self.assertEqual(len(data['pages_remaining']), 4 - backend.PREVIEW_PAGES)
+        self.assertEqual(len(data['transactions']), min(data['stats']['preview_transaction_count'],
+                                                        backend.PREVIEW_ROWS))
+
+        status = self.wait_until_ready(data['session_id'])
+        self.assertEqual(status['status'], 'ready')
+        self.assertEqual(status['stats']['transaction_count'], info['transactions'])
+        response = self.client.get(f"/api/sessions/{data['session_id']}/transactions?limit=1000")
+        self.assertEqual(response.get_json()['total'], info['transactions'])
+        self.assertEqual(self.client.get(f"/download/{data['session_id']}/csv").status_code, 200)
+
+    @unittest.skipUnless(CAMELOT_AVAILABLE and PDF_READER_AVAILABLE, "camelot and pypdf/PyPDF2 not available")
+    def test_preview_deadline(self):
+        """Test that a preview out of time answers after one page and the session still fills in."""
+        pdf, info = build_statement(pages=4, rows_per_page=10, cover_pages=1)
+        deadline = backend.PREVIEW_DEADLINE_SECONDS
+        backend.PREVIEW_DEADLINE_SECONDS = 0
+        try:
+            data = self.post(pdf).get_json()
+        finally:
+            backend.PREVIEW_DEADLINE_SECONDS = deadline
+        self.assertEqual(data['status'], 'converting')
+        self.assertEqual(len(data['pages_remaining']), 3)
+        self.assertEqual(data['stats']['page_count'], 4)
+
+        status = self.wait_until_ready(data['session_id'])
+        self.assertEqual(status['stats']['transaction_count'], info['transactions'])
+
+    @unittest.skipUnless(CAMELOT_AVAILABLE and PDF_READER_AVAILABLE, "camelot and pypdf/PyPDF2 not available")
+    def test_short_statement_ready_at_once(self):
+        """Test that a statement no longer than the preview is converted in full straight away."""
+        pdf, info = build_statement(pages=backend.PREVIEW_PAGES, rows_per_page=10, cover_pages=1)
+        data = self.post(pdf).get_json()
+        self.assertEqual(data['status'], 'ready')
+        self.assertEqual(data['stats']['transaction_count'], info['transactions'])
+        self.assertEqual(self.wait_until_ready(data['session_id'])['status'], 'ready')
+
+
+@unittest.skipUnless(BACKEND_AVAILABLE, "Web backend not available")
+class TestMetrics(unittest.TestCase):
+    """Test cases for the /metrics endpoint and metric types."""
+
+    def setUp(self):
+        self.client = backend.app.test_client()
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test that observations render as cumulative buckets with sum and count."""
+        histogram = metrics.Histogram('test_pages', 'Test histogram.', registry=None, buckets=(1, 5, 10))
+        for value in (1, 3, 7, 50):
+            histogram.observe(value)
+        self.assertEqual(histogram.snapshot(), ([1, 2, 3, 4], 61.0, 4))
+        lines = histogram.samples()
+        self.assertIn('test_pages_bucket{le="5"} 2', lines)
+        self.assertIn('test_pages_bucket{le="+Inf"} 4', lines)
+        self.assertIn('test_pages_count 4', lines)
+
+    def test_labels_are_validated(self):
+        """Test that a counter rejects missing or unknown labels."""
+        counter = metrics.Counter('test_total', 'Test counter.', ['outcome'], registry=None)
+        counter.inc(outcome='success')
+        self.assertEqual(counter.value(outcome='success'), 1)
+        with self.assertRaises(ValueError):
+            counter.inc()
+        with self.assertRaises(ValueError):
+            counter.inc(outcome='success', engine='full')
+
+    def test_conversion_outcomes_recorded(self):
+        """Test that conversions are counted by outcome with latency and pages."""
+        before = metrics.CONVERSIONS.value(engine='test', outcome='success')
+        _, _, pages_before = metrics.CONVERSION_PAGES.snapshot()
+        backend.observe_conversion('test', lambda: {'success': True, 'pages_processed': 12})
+        backend.observe_conversion('test', lambda: {'success': False})
+        with self.assertRaises(RuntimeError):
+            backend.observe_conversion('test', lambda: (_ for _ in ()).throw(RuntimeError('boom')))
+
+        self.assertEqual(metrics.CONVERSIONS.value(engine='test', outcome='success'), before + 1)
+        self.assertGreaterEqual(metrics.CONVERSIONS.value(engine='test', outcome='failure'), 1)
+        self.assertGreaterEqual(metrics.CONVERSIONS.value(engine='test', outcome='error'), 1)
+        self.assertEqual(metrics.CONVERSION_PAGES.snapshot()[2], pages_before + 1)
+        self.assertEqual(metrics.ACTIVE_WORKERS.value(), 0)
+
+    def test_metrics_endpoint(self):
+        """Test that /metrics serves the text exposition format."""
+        backend.RESULT_STORE.put('metrics-session', make_transactions(5))
+        try:
+            self.client.get('/api/sessions/metrics-session/transactions')
+            self.client.get('/api/sessions/missing/transactions')
+        finally:
+            backend.RESULT_STORE.discard('metrics-session')
+
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain; version=0.0.4'))
+        body = response.get_data(as_text=True)
+        for name in ('hdfc_http_requests_total', 'hdfc_conversion_duration_seconds', 'hdfc_conversion_pages',
+                     'hdfc_conversion_queue_depth', 'hdfc_conversion_workers_active', 'hdfc_cache_hit_ratio',
+                     'hdfc_temp_session_bytes', 'hdfc_temp_disk_free_bytes', 'process_resident_memory_bytes'):
+            self.assertIn(f'# TYPE {name} ', body)
+        self.assertIn('hdfc_http_requests_total{endpoint="/api/sessions/<session_id>/transactions",'
+                      'method="GET",status="404"}', body)
+        self.assertIn('hdfc_cache_requests_total{cache="sessions",result="miss"}', body)
+        self.assertIn('hdfc_cache_hit_ratio{cache="sessions"}', body)
+
+
+@unittest.skipUnless(BACKEND_AVAILABLE, "Web backend not available")
+class TestStartup(unittest.TestCase):
+    """Keep backend startup free of heavy imports."""
+
+    def test_import_does_not_load_pandas(self):
+        """Test that importing the backend defers pandas and camelot."""
+        web_ui = Path(__file__).parent.parent / 'web-ui'
+        code = (
+            "import sys\n"
+            "import backend\n"
+            "print(','.join(m for m in ('pandas', 'camelot') if m in sys.modules))\n"
+        )
+        result = subprocess.run([sys.executable, '-c', code], cwd=web_ui,
+                                 capture_output=True, text=True, timeout=60)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.splitlines()[-1], '')
+
+    def test_import_without_converter(self):
+        """Test that the backend still starts, on the simple converter, when hdfc_converter cannot be imported."""
+        web_ui = Path(__file__).parent.parent / 'web-ui'
+        code = (
+            "import sys\n"
+            "sys.modules['hdfc_converter'] = None\n"
+            "import backend\n"
+            "print(backend.HDFCConverter)\n"
+        )
+        result = subprocess.run([sys.executable, '-c', code], cwd=web_ui,
+                                capture_output=True, text=True, timeout=60)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.splitlines()[-1], 'None')
+
+    def test_app_configures_json_logging(self):
+        """Test that the production entry point sends converter logs to stdout as JSON lines."""
+        web_ui = Path(__file__).parent.parent / 'web-ui'
+        code = (
+            "import logging\n"
+            "import app\n"
+            "logging.getLogger('hdfc_converter').info('converter started')\n"
+        )
+        result = subprocess.run([sys.executable, '-c', code], cwd=web_ui,
+                                capture_output=True, text=True, timeout=60)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        records = [json.loads(line) for line in result.stdout.splitlines() if line.startswith('{')]
+        self.assertEqual([record['message'] for record in records], ['converter started'])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
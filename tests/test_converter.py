@@ -5,20 +5,37 @@ Unit tests for HDFC PDF to CSV Converter
 
 import unittest
 import tempfile
+import subprocess
+import io
 import os
+import time
+from importlib.util import find_spec
 from pathlib import Path
 import sys
 
-# Add src to path
+# Add src and the benchmark helpers to path
 sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'benchmarks'))
 
 try:
-    from hdfc_converter import HDFCConverter
+    from hdfc_converter import (
+        HDFCConverter, StageTimer, MemoryBudget, PipelineWriter, iter_in_thread, parse_size,
+        normalise_counterparties, extract_counterparties, JobIdFilter, JsonFormatter, job_context, JOB_ID,
+        preflight, PageIndex, parse_pages, parse_statement_date, file_sha256,
+    )
     CONVERTER_AVAILABLE = True
 except ImportError as e:
     print(f"Warning: Could not import HDFCConverter: {e}")
     CONVERTER_AVAILABLE = False
 
+from synthetic_statement import write_statement, build_statement, PDFWriter, _text
+import bench_stages
+
+# The converter imports its engines lazily, so check for them separately
+PANDAS_AVAILABLE = find_spec('pandas') is not None
+CAMELOT_AVAILABLE = find_spec('camelot') is not None
+PDF_READER_AVAILABLE = find_spec('pypdf') is not None or find_spec('PyPDF2') is not None
+
 
 class TestHDFCConverter(unittest.TestCase):
     """Test cases for HDFCConverter class."""
@@ -26,7 +43,8 @@ class TestHDFCConverter(unittest.TestCase):
     def setUp(self):
         """Set up test fixtures."""
         self.temp_dir = tempfile.mkdtemp()
-        self.test_pdf = "test_statement.pdf"  # This would need to be a real test PDF
+        self.test_pdf = os.path.join(self.temp_dir, "test_statement.pdf")
+        write_statement(self.test_pdf, pages=2, rows_per_page=10)
         
     def tearDown(self):
         """Clean up test fixtures."""
@@ -100,7 +118,7 @@ class TestHDFCConverter(unittest.TestCase):
                 result = converter._clean_amount(input_amount)
                 self.assertEqual(result, expected)
     
-    @unittest.skipUnless(CONVERTER_AVAILABLE, "HDFCConverter not available")
+    @unittest.skipUnless(CONVERTER_AVAILABLE and PANDAS_AVAILABLE, "pandas not available")
     def test_transaction_categorization(self):
         """Test transaction categorization."""
         if os.path.exists(self.test_pdf):
@@ -132,20 +150,945 @@ class TestHDFCConverter(unittest.TestCase):
             self.assertTrue(os.path.exists(new_output_dir))
 
 
+SAMPLE_TRANSACTIONS = [
+    {
+        'Date': '01/04/24', 'Narration': 'UPI-GROCER-grocer@okhdfc', 'Reference_Number': '0000412345678901',
+        'Value_Date': '01/04/24', 'Withdrawal_Amount': '450.00', 'Deposit_Amount': '0.00',
+        'Closing_Balance': '99550.00', 'Page_Number': 1
+    },
+    {
+        'Date': '02/04/24', 'Narration': 'SALARY APR 2024', 'Reference_Number': '0000412345678902',
+        'Value_Date': '02/04/24', 'Withdrawal_Amount': '0.00', 'Deposit_Amount': '85000.00',
+        'Closing_Balance': '184550.00', 'Page_Number': 1
+    },
+]
+
+
+def stub_extraction(converter, transactions, page_stats):
+    """Replace extract_transactions with fixed results, handed to on_page like the real one."""
+    def extract_transactions(on_page=None, checkpoint=None, deadline=None, page_limit=None):
+        if on_page is not None:
+            on_page(transactions)
+        return transactions, page_stats
+    converter.extract_transactions = extract_transactions
+
+
+class TestInMemoryConversion(unittest.TestCase):
+    """Test cases for the bytes-in, objects-out conversion API."""
+    
+    @unittest.skipUnless(CONVERTER_AVAILABLE, "HDFCConverter not available")
+    def test_from_bytes_does_not_touch_disk(self):
+        """Test that from_bytes needs no file and creates no output directory."""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            output_dir = os.path.join(temp_dir, 'never_created')
+            converter = HDFCConverter.from_bytes(io.BytesIO(b'%PDF-1.4 fake'), 'upload.pdf', output_dir)
+            self.assertEqual(converter.pdf_bytes, b'%PDF-1.4 fake')
+            self.assertEqual(converter.pdf_path.name, 'upload.pdf')
+            self.assertFalse(os.path.exists(output_dir))
+            
+            with self.assertRaises(ValueError):
+                HDFCConverter.from_bytes(b'')
+        finally:
+            import shutil
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    
+    @unittest.skipUnless(CONVERTER_AVAILABLE and PANDAS_AVAILABLE, "pandas not available")
+    def test_convert_to_memory(self):
+        """Test that convert_to_memory returns objects and only requested artifacts."""
+        converter = HDFCConverter.from_bytes(b'%PDF-1.4 fake')
+        stub_extraction(converter, [dict(t) for t in SAMPLE_TRANSACTIONS], [{'Page': 1}])
+        
+        result = converter.convert_to_memory(formats=['csv', 'report'])
+        self.assertTrue(result['success'])
+        self.assertEqual(len(result['transactions']), 2)
+        self.assertIn('Category', result['transactions'].columns)
+        for column in ('Category', 'Page_Number', 'Counterparty'):
+            self.assertEqual(result['transactions'][column].dtype.name, 'category')
+        self.assertEqual(result['summary']['total_transactions'], 2)
+        self.assertEqual(result['page_stats'], [{'Page': 1}])
+        self.assertEqual(sorted(result['artifacts']), ['csv', 'report'])
+        
+        filename, data = result['artifacts']['csv']
+        self.assertTrue(filename.endswith('.csv'))
+        self.assertIn(b'SALARY APR 2024', data)
+        self.assertIn('HDFC Bank Statement Analysis Report', result['artifacts']['report'][1].decode('utf-8'))
+
+
+@unittest.skipUnless(CONVERTER_AVAILABLE and PANDAS_AVAILABLE, "pandas not available")
+class TestRollups(unittest.TestCase):
+    """Test cases for the month x category rollups."""
+    
+    def setUp(self):
+        self.converter = HDFCConverter.from_bytes(b'%PDF-1.4 fake')
+        may = {
+            'Date': '03/05/24', 'Narration': 'UPI-GROCER-grocer@okhdfc', 'Reference_Number': '0000512345678903',
+            'Value_Date': '03/05/24', 'Withdrawal_Amount': '1,000.00', 'Deposit_Amount': '0.00',
+            'Closing_Balance': '183,550.00', 'Page_Number': 2
+        }
+        transactions = [dict(t) for t in SAMPLE_TRANSACTIONS] + [may]
+        self.summary = self.converter.generate_summary(self.converter.categorize_transactions(transactions))
+    
+    def test_monthly_breakdown(self):
+        """Test count, debit, credit and net per month and category."""
+        monthly = self.summary['monthly_breakdown']
+        self.assertEqual(monthly.loc[('2024-04', 'UPI Payments'), 'Debit'], 450.0)
+        self.assertEqual(monthly.loc[('2024-04', 'Salary & Employment'), 'Net'], 85000.0)
+        self.assertEqual(monthly.loc[('2024-05', 'UPI Payments'), 'Transactions'], 1)
+        # The whole-period breakdown is the rollups summed over months
+        self.assertEqual(self.summary['category_breakdown'].loc['UPI Payments', 'Withdrawal_Numeric'], 1450.0)
+        self.assertEqual(self.summary['category_breakdown'].loc['UPI Payments', 'Date'], 2)
+    
+    def test_monthly_balances(self):
+        """Test opening and closing balances per month."""
+        balances = self.summary['monthly_totals']
+        self.assertEqual(balances.loc['2024-04', 'Opening_Balance'], 100000.0)
+        self.assertEqual(balances.loc['2024-04', 'Closing_Balance'], 184550.0)
+        self.assertEqual(balances.loc['2024-05', 'Opening_Balance'], 184550.0)
+        self.assertEqual(self.summary['date_range'], {'start': '01/04/24', 'end': '03/05/24'})
+    
+    def test_report_and_artifact(self):
+        """Test that the report and monthly CSV are built from the rollups."""
+        report = self.converter._render_markdown_report(self.summary)
+        self.assertIn('## 📅 Monthly Summary', report)
+        self.assertIn('| 2024-05 | 1 | ₹1,000.00 | ₹0.00 | ₹-1,000.00 | ₹184,550.00 | ₹183,550.00 |', report)
+        
+        _, data = self.converter.serialize_results([], [], self.summary, ['monthly'])['monthly']
+        lines = data.decode('utf-8').splitlines()
+        self.assertEqual(lines[0], 'Month,Category,Transactions,Debit,Credit,Net,Opening_Balance,Closing_Balance')
+        self.assertEqual(len(lines), 4)
+
+
+@unittest.skipUnless(CONVERTER_AVAILABLE and PANDAS_AVAILABLE, "pandas not available")
+class TestRecurringPayments(unittest.TestCase):
+    """Test cases for recurring payment detection."""
+    
+    def setUp(self):
+        from datetime import date, timedelta
+        self.converter = HDFCConverter.from_bytes(b'%PDF-1.4 fake')
+        
+        def debit(day, narration, amount):
+            return {
+                'Date': f"{day:%d/%m/%y}", 'Narration': narration, 'Reference_Number': '0000000000000000',
+                'Value_Date': f"{day:%d/%m/%y}", 'Withdrawal_Amount': f"{amount:,.2f}", 'Deposit_Amount': '0.00',
+                'Closing_Balance': '100,000.00', 'Page_Number': 1
+            }
+        
+        start = date(2024, 1, 5)
+        transactions = []
+        for month in range(6):
+            # Rent on the 5th, with a varying reference and the odd suffix
+            suffix = '-ONLINE REF 99812' if month % 2 else ''
+            transactions.append(debit(start + timedelta(days=30 * month), f"NEFT DR-SBIN0001234-SUNDARAM PROPERTIES-N{month:05d}{suffix}", 25000))
+            # Same amount to the same shop, but at random intervals
+            transactions.append(debit(start + timedelta(days=[0, 3, 41, 45, 100, 160][month]), 'POS 416021XXXXXX4821 DMART', 2000))
+        for week in range(8):
+            # Weekly metro top-up whose amount wobbles within the band
+            transactions.append(debit(start + timedelta(days=7 * week + 1), f"UPI-NAMMA METRO-metro@okaxis-{week:012d}", 500 + week % 2))
+        transactions.sort(key=lambda t: (t['Date'][6:], t['Date'][3:5], t['Date'][:2]))
+        self.summary = self.converter.generate_summary(self.converter.categorize_transactions(transactions))
+    
+    def test_normalise_counterparties(self):
+        """Test that references, card masks and filler words are dropped."""
+        import pandas as pd
+        keys = normalise_counterparties(pd.Series([
+            'POS 416021XXXXXX4821 NETFLIX.COM-ONLINE REF 123', 'POS 416021XXXXXX4821 NETFLIX.COM', '12345'
+        ]))
+        self.assertEqual(keys.tolist(), ['pos netflix com', 'pos netflix com', ''])
+    
+    def test_falls_back_to_narration(self):
+        """Test that card payments without a counterparty are keyed on the narration."""
+        import pandas as pd
+        from hdfc_converter import detect_recurring
+        df = pd.DataFrame({
+            'Date': ['05/01/24', '04/02/24', '05/03/24'],
+            'Narration': ['POS 416021XXXXXX4821 NETFLIX.COM', 'POS 416021XXXXXX4821 NETFLIX.COM-ONLINE REF 1', 'POS 416021XXXXXX4821 NETFLIX.COM'],
+            'Category': 'Card Payments', 'Counterparty': '', 'Withdrawal_Numeric': 649.0,
+        })
+        self.assertEqual(detect_recurring(df)['Counterparty'].tolist(), ['pos netflix com'])
+    
+    def test_detects_monthly_and_weekly(self):
+        """Test that regular series are found and irregular ones are not."""
+        recurring = self.summary['recurring'].set_index('Counterparty')
+        self.assertEqual(sorted(recurring.index), ['NAMMA METRO', 'SUNDARAM PROPERTIES'])
+        rent = recurring.loc['SUNDARAM PROPERTIES']
+        self.assertEqual((rent['Frequency'], rent['Payments'], rent['Total']), ('monthly', 6, 150000.0))
+        self.assertEqual((rent['Last_Date'], rent['Next_Expected']), ('03/06/24', '03/07/24'))
+        self.assertEqual(recurring.loc['NAMMA METRO', 'Frequency'], 'weekly')
+    
+    def test_report_and_artifact(self):
+        """Test the report section and recurring payments CSV."""
+        report = self.converter._render_markdown_report(self.summary)
+        self.assertIn('## 🔁 Recurring Payments', report)
+        self.assertIn('| SUNDARAM PROPERTIES | monthly | 6 | ₹25,000.00 | ₹150,000.00 | 03/06/24 | 03/07/24 |', report)
+        
+        _, data = self.converter.serialize_results([], [], self.summary, ['recurring'])['recurring']
+        lines = data.decode('utf-8').splitlines()
+        self.assertEqual(lines[0], 'Counterparty,Category,Frequency,Payments,Amount,Total,First_Date,Last_Date,Next_Expected')
+        self.assertEqual(len(lines), 3)
+    
+    def test_no_debits(self):
+        """Test that statements without debits give an empty table."""
+        credit = dict(SAMPLE_TRANSACTIONS[1])
+        summary = self.converter.generate_summary(self.converter.categorize_transactions([credit]))
+        self.assertTrue(summary['recurring'].empty)
+        self.assertNotIn('Recurring Payments', self.converter._render_markdown_report(summary))
+
+
+@unittest.skipUnless(CONVERTER_AVAILABLE and PANDAS_AVAILABLE, "pandas not available")
+class TestCounterparties(unittest.TestCase):
+    """Test cases for counterparty extraction and aggregates."""
+    
+    def test_extract_counterparties(self):
+        """Test each payment scheme, wrapped narrations and non-matching narrations."""
+        import pandas as pd
+        names = extract_counterparties(pd.Series([
+            'UPI-SWIGGY-swiggy@ybl-SBIN0001234-312345678901-PAYMENT FROM PHONE',
+            'UPI-Kavya Reddy-\nkavya@okaxis-UTIB0000553-312345678902-UPI',
+            'NEFT CR-HDFC0000001-RAMESH KUMAR-PRIYA SHARMA-312345678903',
+            'NEFT DR-SBIN0001234-SUNDARAM\nPROPERTIES-NETBANK RENT',
+            'RTGS CR-ICIC0000104-ACME TECHNOLOGIES PVT LTD',
+            'IMPS-312345678904-ANAND IYER-SBIN-XXXXXXXX1234-TRANSFER',
+            'POS 416021XXXXXX4821 DMART CHENNAI',
+        ]))
+        self.assertEqual(names.tolist(), [
+            'SWIGGY', 'KAVYA REDDY', 'RAMESH KUMAR', 'SUNDARAM PROPERTIES',
+            'ACME TECHNOLOGIES PVT LTD', 'ANAND IYER', '',
+        ])
+    
+    def test_summary_and_report(self):
+        """Test that categorized transactions carry a counterparty and the summary aggregates by it."""
+        converter = HDFCConverter.from_bytes(b'%PDF-1.4 fake')
+        refund = dict(SAMPLE_TRANSACTIONS[0], Withdrawal_Amount='0.00', Deposit_Amount='50.00')
+        categorized = converter.categorize_transactions([dict(t) for t in SAMPLE_TRANSACTIONS] + [refund])
+        self.assertEqual([t['Counterparty'] for t in categorized], ['GROCER', '', 'GROCER'])
+        
+        summary = converter.generate_summary(categorized)
+        grocer = summary['counterparty_breakdown'].loc['GROCER']
+        self.assertEqual((grocer['Transactions'], grocer['Debit'], grocer['Credit'], grocer['Net']), (2, 450.0, 50.0, -400.0))
+        self.assertEqual(list(summary['counterparty_breakdown'].index), ['GROCER'])
+        self.assertIn('| GROCER | 2 | ₹450.00 | ₹50.00 | ₹-400.00 |', converter._render_markdown_report(summary))
+
+
+class TestStageTiming(unittest.TestCase):
+    """Test cases for per-stage instrumentation."""
+    
+    @unittest.skipUnless(CONVERTER_AVAILABLE, "HDFCConverter not available")
+    def test_stage_timer(self):
+        """Test that the timer accumulates totals and per-page breakdowns."""
+        timer = StageTimer()
+        for page in (1, 2, 2):
+            with timer.stage('extract', page=page):
+                sum(range(1000))
+        
+        timings = timer.as_dict()
+        self.assertEqual(timings['stages']['extract']['calls'], 3)
+        self.assertGreaterEqual(timings['stages']['extract']['wall_seconds'], 0)
+        self.assertEqual(sorted(timings['pages']), [1, 2])
+        self.assertIn('Extract_Wall_Seconds', timer.page_columns(2))
+        self.assertEqual(timer.page_columns(3), {})
+    
+    @unittest.skipUnless(CONVERTER_AVAILABLE and PANDAS_AVAILABLE, "pandas not available")
+    def test_convert_reports_stage_timings(self):
+        """Test that conversion results carry timings for each stage and writer."""
+        converter = HDFCConverter.from_bytes(b'%PDF-1.4 fake')
+        stub_extraction(converter, [dict(t) for t in SAMPLE_TRANSACTIONS], [{'Page': 1}])
+        
+        result = converter.convert_to_memory(formats=['csv', 'timings'])
+        stages = result['timings']['stages']
+        for stage in ('categorize', 'summarize', 'write_csv'):
+            self.assertIn(stage, stages)
+            self.assertIn('cpu_seconds', stages[stage])
+        self.assertIn(b'write_csv', result['artifacts']['timings'][1])
+    
+    @unittest.skipUnless(CONVERTER_AVAILABLE, "HDFCConverter not available")
+    def test_chunk_time_split_across_pages(self):
+        """Test that a multi-page chunk's time is shared between its pages."""
+        timer = StageTimer()
+        with timer.stage('extract', page=[3, 4]):
+            sum(range(1000))
+        pages = timer.as_dict()['pages']
+        self.assertEqual(sorted(pages), [3, 4])
+        self.assertEqual(pages[3]['extract'], pages[4]['extract'])
+
+
+@unittest.skipUnless(CONVERTER_AVAILABLE and PANDAS_AVAILABLE, "pandas not available")
+class TestPipeline(unittest.TestCase):
+    """Test cases for the overlapped extraction pipeline."""
+    
+    def test_iter_in_thread_is_bounded(self):
+        """Test that the producer runs at most a queue's length ahead, in order."""
+        import threading
+        produced = []
+        
+        def numbers():
+            for i in range(10):
+                produced.append((i, threading.current_thread().name))
+                yield i
+        
+        consumed = []
+        for item in iter_in_thread(numbers(), maxsize=2):
+            time.sleep(0.01)
+            # One item in hand, two queued and one waiting to be queued
+            self.assertLessEqual(len(produced), len(consumed) + 4)
+            consumed.append(item)
+        self.assertEqual(consumed, list(range(10)))
+        self.assertEqual({name for _, name in produced}, {'pipeline-producer'})
+    
+    def test_iter_in_thread_errors_and_close(self):
+        """Test that producer errors reach the consumer and closing stops the producer."""
+        from contextlib import closing
+        
+        def failing():
+            yield 1
+            raise RuntimeError("camelot failed")
+        
+        with self.assertRaises(RuntimeError):
+            list(iter_in_thread(failing()))
+        
+        produced = []
+        
+        def endless():
+            while True:
+                produced.append(1)
+                yield 1
+        
+        with closing(iter_in_thread(endless(), maxsize=1)) as items:
+            next(items)
+        count = len(produced)
+        time.sleep(0.05)
+        self.assertEqual(len(produced), count)
+    
+    def test_writer_errors_propagate(self):
+        """Test that a failing writer fails the next put or close."""
+        def write(batch):
+            raise OSError("disk full")
+        
+        writer = PipelineWriter(write)
+        writer.put([1])
+        with self.assertRaises(OSError):
+            writer.close()
+    
+    def test_convert_streams_csv(self):
+        """Test that convert() categorizes and writes pages as they are extracted."""
+        import pandas as pd
+        from types import SimpleNamespace
+        
+        temp_dir = tempfile.mkdtemp()
+        try:
+            rows = bench_stages.camelot_rows(30)
+            tables = [SimpleNamespace(page=page, df=pd.DataFrame(([['Date'] * 7] if page == 1 else []) + rows[i:i + 10]))
+                      for page, i in ((1, 0), (2, 10), (3, 20))]
+            converter = HDFCConverter.from_bytes(b'%PDF-1.4 fake', output_dir=temp_dir)
+            converter._iter_tables = lambda pdf_file, restored=None: iter(tables)
+            
+            result = converter.convert()
+            self.assertTrue(result['success'], result.get('error'))
+            self.assertEqual(len(result['transactions']), 30)
+            self.assertEqual(result['timings']['stages']['categorize']['calls'], 3)
+            self.assertEqual(result['timings']['stages']['write_csv']['calls'], 3)
+            with open(result['csv_file'], encoding='utf-8') as f:
+                streamed = f.read()
+            self.assertEqual(streamed, pd.DataFrame(result['transactions']).to_csv(index=False))
+        finally:
+            import shutil
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    
+    def test_iter_transactions_yields_as_tables_are_read(self):
+        """Test that each table's transactions are yielded before the next table is read."""
+        import pandas as pd
+        from types import SimpleNamespace
+        
+        rows = bench_stages.camelot_rows(20)
+        read = []
+        
+        def tables(pdf_file, restored=None):
+            for page in (1, 2):
+                read.append(page)
+                yield SimpleNamespace(page=page, df=pd.DataFrame(rows[(page - 1) * 10:page * 10]))
+        
+        converter = HDFCConverter.from_bytes(b'%PDF-1.4 fake')
+        converter._iter_tables = tables
+        batches = converter.iter_transactions()
+        first = next(batches)
+        self.assertEqual({transaction['Page_Number'] for transaction in first}, {1})
+        # The producer thread may read one table ahead, but no further
+        self.assertLessEqual(len(read), 2)
+        self.assertEqual(converter.page_stats, [])
+        # The job id only applies while the generator runs
+        self.assertIsNone(JOB_ID.get())
+        self.assertEqual(len(list(batches)), 1)
+        self.assertEqual([stats['Page'] for stats in converter.page_stats], [1, 2])
+    
+    def test_failed_convert_removes_partial_csv(self):
+        """Test that a conversion failing mid-way leaves no partial CSV behind."""
+        import threading
+        import pandas as pd
+        from types import SimpleNamespace
+        
+        temp_dir = tempfile.mkdtemp()
+        try:
+            def tables(pdf_file, restored=None):
+                yield SimpleNamespace(page=2, df=pd.DataFrame(bench_stages.camelot_rows(5)))
+                raise RuntimeError("camelot failed")
+            
+            converter = HDFCConverter.from_bytes(b'%PDF-1.4 fake', output_dir=temp_dir)
+            converter._iter_tables = tables
+            for _ in range(5):
+                result = converter.convert()
+                self.assertFalse(result['success'])
+                self.assertEqual(os.listdir(temp_dir), [])
+            # The CSV writer thread is finished before the failure is returned
+            writers = [thread for thread in threading.enumerate() if thread.name == 'pipeline-writer']
+            self.assertEqual(writers, [])
+        finally:
+            import shutil
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+class TestLogging(unittest.TestCase):
+    """Test cases for per-job structured logging."""
+    
+    def test_job_id_follows_pipeline_threads(self):
+        """Test that records from pipeline threads carry the job id as JSON lines."""
+        import json
+        import logging
+        stream = io.StringIO()
+        handler = logging.StreamHandler(stream)
+        handler.addFilter(JobIdFilter())
+        handler.setFormatter(JsonFormatter())
+        test_logger = logging.getLogger('test_job_logging')
+        test_logger.addHandler(handler)
+        test_logger.setLevel(logging.INFO)
+        
+        def pages():
+            for page in range(3):
+                test_logger.info(f"page {page}")
+                yield page
+        
+        try:
+            with job_context('job-1'):
+                self.assertEqual(list(iter_in_thread(pages())), [0, 1, 2])
+            test_logger.info('after')
+        finally:
+            test_logger.removeHandler(handler)
+        
+        entries = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual([entry['job_id'] for entry in entries], ['job-1'] * 3 + [None])
+        self.assertEqual(entries[0]['thread'], 'pipeline-producer')
+        self.assertEqual(entries[0]['message'], 'page 0')
+    
+    @unittest.skipUnless(PANDAS_AVAILABLE and CAMELOT_AVAILABLE, "pandas and camelot not available")
+    def test_cli_log_file_is_json_lines(self):
+        """Test that a CLI run logs one job's JSON records, without per-table chatter."""
+        import json
+        temp_dir = tempfile.mkdtemp()
+        try:
+            pdf = os.path.join(temp_dir, 'statement.pdf')
+            write_statement(pdf, pages=2, rows_per_page=10)
+            converter = Path(__file__).parent.parent / 'src' / 'hdfc_converter.py'
+            result = subprocess.run([sys.executable, str(converter), pdf, '-o', 'out', '--log-format', 'json'],
+                                    cwd=temp_dir, capture_output=True, text=True, timeout=120)
+            self.assertEqual(result.returncode, 0, result.stderr)
+            
+            with open(os.path.join(temp_dir, 'hdfc_conversion.log'), encoding='utf-8') as f:
+                entries = [json.loads(line) for line in f]
+            self.assertTrue(entries)
+            self.assertEqual(len({entry['job_id'] for entry in entries}), 1)
+            self.assertIsNotNone(entries[0]['job_id'])
+            self.assertNotIn('DEBUG', {entry['level'] for entry in entries})
+            self.assertIn('pipeline-producer', {entry['thread'] for entry in entries})
+            # The console gets the same records as JSON
+            self.assertEqual(json.loads(result.stdout.splitlines()[0])['job_id'], entries[0]['job_id'])
+        finally:
+            import shutil
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+@unittest.skipUnless(CONVERTER_AVAILABLE and PANDAS_AVAILABLE, "pandas not available")
+class TestResume(unittest.TestCase):
+    """Test cases for checkpointed, resumable conversions."""
+    
+    def setUp(self):
+        import pandas as pd
+        from types import SimpleNamespace
+        
+        self.temp_dir = tempfile.mkdtemp()
+        rows = bench_stages.camelot_rows(40)
+        self.tables = {page: SimpleNamespace(page=page, df=pd.DataFrame(rows[(page - 1) * 10:page * 10]))
+                       for page in range(1, 5)}
+    
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def make_converter(self, data=b'%PDF-1.4 fake', fail_at=None, **kwargs):
+        """Converter over self.tables, one table per page; reading page `fail_at` raises."""
+        converter = HDFCConverter.from_bytes(data, output_dir=self.temp_dir, **kwargs)
+        converter._select_pages = lambda pdf_file: (list(self.tables), [])
+        converter.requested = []
+        
+        def read_tables(pdf_file, pages, flavor):
+            converter.requested.append(int(pages))
+            if int(pages) == fail_at:
+                raise RuntimeError("interrupted")
+            return [self.tables[int(pages)]]
+        converter._read_tables = read_tables
+        return converter
+    
+    def test_resume_skips_finished_pages(self):
+        """Test that a resumed run only extracts the pages the interrupted one did not finish."""
+        import pandas as pd
+        
+        first = self.make_converter(fail_at=3).convert(resume=True)
+        self.assertFalse(first['success'])
+        
+        converter = self.make_converter()
+        result = converter.convert(resume=True)
+        self.assertTrue(result['success'], result.get('error'))
+        self.assertEqual(converter.requested, [3, 4])
+        self.assertEqual(result['pages_resumed'], [1, 2])
+        self.assertEqual(result['pages_processed'], 4)
+        
+        fresh = self.make_converter().convert()
+        self.assertEqual(result['transactions'], fresh['transactions'])
+        with open(result['csv_file'], encoding='utf-8') as f:
+            self.assertEqual(f.read(), pd.DataFrame(fresh['transactions']).to_csv(index=False))
+        # A successful run removes its checkpoint
+        self.assertEqual(os.listdir(os.path.join(self.temp_dir, '.checkpoints')), [])
+    
+    def test_stale_checkpoint_discarded(self):
+        """Test that a checkpoint is not reused for other PDF content or extraction settings."""
+        self.make_converter(fail_at=3).convert(resume=True)
+        
+        converter = self.make_converter(prefilter=False)
+        self.assertTrue(converter.convert(resume=True)['success'])
+        self.assertEqual(converter.requested, [1, 2, 3, 4])
+        
+        self.make_converter(fail_at=3).convert(resume=True)
+        converter = self.make_converter(data=b'%PDF-1.4 other')
+        self.assertTrue(converter.convert(resume=True)['success'])
+        self.assertEqual(converter.requested, [1, 2, 3, 4])
+
+
+    def test_deadline_returns_partial_results(self):
+        """Test that a missed deadline stops at a page boundary and the continuation finishes the rest."""
+        converter = self.make_converter()
+        result = converter.convert(deadline=0)
+        self.assertTrue(result['success'], result.get('error'))
+        self.assertTrue(result['partial'])
+        self.assertEqual(result['pages_remaining'], [2, 3, 4])
+        self.assertEqual({t['Page_Number'] for t in result['transactions']}, {1})
+        self.assertEqual(result['pages_processed'], 1)
+        
+        finished = []
+        converter.requested = []
+        converter.continue_in_background(on_complete=finished.append).join(timeout=30)
+        self.assertEqual(converter.requested, [2, 3, 4])
+        self.assertFalse(finished[0]['partial'])
+        self.assertEqual(finished[0]['transactions'], self.make_converter().convert()['transactions'])
+    
+    def test_preview_then_full_conversion(self):
+        """Test that a preview converts the first pages and the continuation only the rest."""
+        converter = self.make_converter()
+        result = converter.convert(preview_pages=2)
+        self.assertTrue(result['partial'])
+        self.assertEqual(result['pages_remaining'], [3, 4])
+        self.assertEqual({t['Page_Number'] for t in result['transactions']}, {1, 2})
+        
+        finished = []
+        converter.requested = []
+        converter.continue_in_background(on_complete=finished.append).join(timeout=30)
+        self.assertEqual(converter.requested, [3, 4])
+        self.assertEqual(finished[0]['transactions'], self.make_converter().convert()['transactions'])
+    
+    def test_in_memory_preview(self):
+        """Test that an in-memory preview hands its pages to the next in-memory conversion."""
+        converter = self.make_converter()
+        preview = converter.convert_to_memory(preview_pages=1)
+        self.assertTrue(preview['partial'])
+        self.assertEqual(preview['pages_remaining'], [2, 3, 4])
+        self.assertEqual(set(preview['transactions']['Page_Number']), {1})
+        self.assertEqual(os.listdir(self.temp_dir), [])
+        
+        converter.requested = []
+        result = converter.convert_to_memory()
+        self.assertFalse(result['partial'])
+        self.assertEqual(converter.requested, [2, 3, 4])
+        self.assertEqual(len(result['transactions']), len(self.make_converter().convert_to_memory()['transactions']))
+        self.assertEqual(result['transactions']['Page_Number'].tolist(), sorted(result['transactions']['Page_Number']))
+        self.assertIsNone(converter.preview_checkpoint)
+    
+    def test_in_memory_deadline(self):
+        """Test that a missed deadline returns the in-memory pages so far and the next call finishes the rest."""
+        converter = self.make_converter()
+        partial = converter.convert_to_memory(deadline=0)
+        self.assertTrue(partial['success'], partial.get('error'))
+        self.assertTrue(partial['partial'])
+        self.assertEqual(partial['pages_remaining'], [2, 3, 4])
+        self.assertEqual(set(partial['transactions']['Page_Number']), {1})
+        
+        converter.requested = []
+        result = converter.convert_to_memory()
+        self.assertFalse(result['partial'])
+        self.assertEqual(converter.requested, [2, 3, 4])
+        self.assertEqual(len(result['transactions']), len(self.make_converter().convert_to_memory()['transactions']))
+
+
+class TestMemoryBudget(unittest.TestCase):
+    """Test cases for memory-budgeted page chunking."""
+    
+    MIB = 2 ** 20
+    
+    def test_parse_size(self):
+        """Test human-readable memory sizes."""
+        self.assertEqual(parse_size('512M'), 512 * self.MIB)
+        self.assertEqual(parse_size('2GB'), 2 * 1024 * self.MIB)
+        self.assertEqual(parse_size('4096'), 4096)
+        for invalid in ('0', 'lots', '1T'):
+            with self.assertRaises(ValueError):
+                parse_size(invalid)
+    
+    def test_grows_with_headroom(self):
+        """Test that cheap pages let the chunk double up to the headroom."""
+        budget = MemoryBudget(1000 * self.MIB)
+        self.assertEqual(budget.record(1, 100 * self.MIB, 101 * self.MIB), 2)
+        self.assertEqual(budget.record(2, 101 * self.MIB, 103 * self.MIB), 4)
+        # A 100 MiB page leaves room for (1000 - 500) / 2 / 100 = 2 more pages
+        self.assertEqual(budget.record(4, 103 * self.MIB, 500 * self.MIB), 2)
+    
+    def test_shrinks_over_budget(self):
+        """Test that exceeding the budget halves the chunk, down to one page."""
+        budget = MemoryBudget(100 * self.MIB, initial_chunk=8)
+        self.assertEqual(budget.record(8, 50 * self.MIB, 120 * self.MIB), 4)
+        self.assertEqual(budget.record(4, 120 * self.MIB, 130 * self.MIB), 2)
+        self.assertEqual(budget.record(2, 130 * self.MIB, 130 * self.MIB), 1)
+        self.assertEqual(budget.record(1, 130 * self.MIB, 130 * self.MIB), 1)
+        self.assertEqual(budget.as_dict()['peak_bytes'], 130 * self.MIB)
+    
+    def test_transient_peak_limits_chunks(self):
+        """Test that pages whose memory is freed on return are sized by their peak, not RSS growth."""
+        budget = MemoryBudget(1000 * self.MIB, initial_chunk=8)
+        # 8 pages peaked 800 MiB above the baseline, then gave it all back
+        self.assertEqual(budget.record(8, 100 * self.MIB, 100 * self.MIB, peak=900 * self.MIB), 4)
+        self.assertEqual(budget.as_dict()['peak_bytes'], 900 * self.MIB)
+        # Later chunks that show no growth don't talk the estimate back down
+        for _ in range(5):
+            self.assertEqual(budget.record(4, 100 * self.MIB, 100 * self.MIB), 4)
+    
+    def test_chunk_peak_traced(self):
+        """Test that the traced peak of an allocation freed within the chunk is seen."""
+        budget = MemoryBudget(1000 * self.MIB)
+        budget.source = 'tracemalloc'
+        budget.start()
+        try:
+            before = budget.mark()
+            block = bytearray(20 * self.MIB)
+            del block
+            after = budget.usage()
+            self.assertLess(after - before, self.MIB)
+            self.assertGreaterEqual(budget.chunk_peak(after) - before, 20 * self.MIB)
+        finally:
+            budget.stop()
+    
+    def test_chunks_cover_every_page_in_order(self):
+        """Test that budgeted extraction requests every page exactly once, in order."""
+        requested = []
+        converter = HDFCConverter.from_bytes(b'%PDF-1.4 fake', max_memory=parse_size('64G'))
+        converter._select_pages = lambda pdf_file: (list(range(1, 31)), [])
+        converter._read_tables = lambda pdf_file, pages, flavor: requested.append((flavor, pages)) or []
+        
+        transactions, _ = converter.extract_transactions()
+        self.assertEqual(transactions, [])
+        lattice = [pages for flavor, pages in requested if flavor == 'lattice']
+        self.assertLess(len(lattice), 30)
+        self.assertEqual(','.join(lattice), ','.join(str(page) for page in range(1, 31)))
+        self.assertEqual(sum(converter.memory_budget.chunk_sizes), 60)
+
+
+@unittest.skipUnless(CONVERTER_AVAILABLE, "HDFCConverter not available")
+class TestPagePrefilter(unittest.TestCase):
+    """Test cases for the text-layer page pre-filter."""
+    
+    def setUp(self):
+        self.converter = HDFCConverter.from_bytes(b'%PDF-1.4 fake')
+    
+    def test_transaction_pages_qualify(self):
+        """Test that header or dated amount lines mark a transaction page."""
+        self.assertTrue(self.converter._looks_like_transaction_page(
+            "Date Narration Chq./Ref.No. Value Dt Withdrawal Amt. Deposit Amt. Closing Balance"))
+        self.assertTrue(self.converter._looks_like_transaction_page(
+            "HDFC BANK LIMITED Page No .: 7\n"
+            "12/05/23 UPI-SWIGGY-swiggy@ybl 0000123 12/05/23 470.42 223,995.92"))
+    
+    def test_other_pages_skipped(self):
+        """Test that cover, summary and terms pages are rejected."""
+        cover = ("MR. SYNTHETIC ACCOUNT HOLDER\nAccount No : 50100000000000\n"
+                 "Statement From : 01/04/2023 To : 30/06/2023")
+        summary = ("Opening Balance Dr Count Cr Count Debits Credits Closing Bal\n"
+                   "250,000.00 12 3 55,769.62 87,111.70 281,342.08\nSTATEMENT SUMMARY")
+        self.assertFalse(self.converter._looks_like_transaction_page(cover))
+        self.assertFalse(self.converter._looks_like_transaction_page(summary))
+    
+    def test_pages_without_text_kept(self):
+        """Test that scanned pages with no text layer are never skipped."""
+        self.assertTrue(self.converter._looks_like_transaction_page(''))
+        self.assertTrue(self.converter._looks_like_transaction_page(None))
+    
+    @unittest.skipUnless(PDF_READER_AVAILABLE, "pypdf/PyPDF2 not available")
+    def test_select_pages(self):
+        """Test page selection on a statement with a cover page."""
+        pdf, info = build_statement(pages=2, rows_per_page=5, cover_pages=1)
+        converter = HDFCConverter.from_bytes(pdf)
+        with converter._pdf_file() as pdf_file:
+            self.assertEqual(converter._select_pages(pdf_file), ([2, 3], [1, 4]))
+            converter.prefilter = False
+            self.assertEqual(converter._select_pages(pdf_file), ([1, 2, 3, 4], []))
+
+
+@unittest.skipUnless(CONVERTER_AVAILABLE, "HDFCConverter not available")
+class TestPageIndex(unittest.TestCase):
+    """Test cases for the page -> date range index and date-bounded extraction."""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+    
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_parse_pages_and_dates(self):
+        """Test page selections and the accepted date formats."""
+        from datetime import date
+        
+        self.assertEqual(parse_pages('7,1-3'), [1, 2, 3, 7])
+        self.assertEqual(parse_pages('2-2, 2'), [2])
+        for text in ('0', '3-1', 'a', '1,'):
+            with self.assertRaises(ValueError):
+                parse_pages(text)
+        self.assertEqual(parse_statement_date('05/04/23'), date(2023, 4, 5))
+        self.assertEqual(parse_statement_date('05/04/2023'), date(2023, 4, 5))
+        self.assertEqual(parse_statement_date('2023-04-05'), date(2023, 4, 5))
+        self.assertIsNone(parse_statement_date('Opening Balance'))
+    
+    @unittest.skipUnless(PDF_READER_AVAILABLE, "pypdf/PyPDF2 not available")
+    def test_index_and_select(self):
+        """Test that pages are indexed by their transaction dates and selected by overlap."""
+        from datetime import timedelta
+        
+        pdf, info = build_statement(pages=3, rows_per_page=10, cover_pages=1)
+        converter = HDFCConverter.from_bytes(pdf)
+        with converter._pdf_file() as pdf_file:
+            index = PageIndex.build(converter._pdf_reader(pdf_file))
+        statuses = {page: entry['status'] for page, entry in index.pages.items()}
+        self.assertEqual(statuses, {1: 'none', 2: 'dated', 3: 'dated', 4: 'dated', 5: 'none'})
+        second, third = index.pages[2], index.pages[3]
+        self.assertLessEqual(second['first'], second['last'])
+        self.assertLessEqual(second['last'], third['first'])
+        
+        pages = list(index.pages)
+        self.assertEqual(index.select(pages), info['transaction_pages'])
+        self.assertEqual(index.select(pages, since=second['last'] + timedelta(days=1)), [3, 4])
+        self.assertEqual(index.select(pages, until=third['first'] - timedelta(days=1)), [2])
+        self.assertEqual(index.select(pages, since=second['last'] + timedelta(days=1),
+                                      until=index.pages[4]['first'] - timedelta(days=1)), [3])
+        # Pages without a readable text layer are always kept
+        index.pages[3] = {'status': 'unknown', 'first': None, 'last': None}
+        self.assertEqual(index.select([1, 3], until=second['first']), [3])
+    
+    @unittest.skipUnless(PDF_READER_AVAILABLE, "pypdf/PyPDF2 not available")
+    def test_index_cached_by_pdf_hash(self):
+        """Test that the index of a PDF on disk is built once and reused."""
+        pdf_path = os.path.join(self.temp_dir, 'statement.pdf')
+        write_statement(pdf_path, pages=3, rows_per_page=10, cover_pages=1)
+        output_dir = os.path.join(self.temp_dir, 'out')
+        converter = HDFCConverter(pdf_path, output_dir, since=parse_statement_date('2023-04-01'))
+        with converter._pdf_file() as pdf_file:
+            selected, skipped = converter._select_pages(pdf_file)
+        self.assertEqual((selected, skipped), ([2, 3, 4], []))
+        cached = Path(output_dir, '.page_index', f"{file_sha256(pdf_path)}.json")
+        self.assertTrue(cached.exists())
+        
+        build = PageIndex.build
+        PageIndex.build = classmethod(lambda cls, reader: self.fail('index rebuilt'))
+        try:
+            converter = HDFCConverter(pdf_path, output_dir, until=parse_statement_date('2000-01-01'))
+            with converter._pdf_file() as pdf_file:
+                self.assertEqual(converter._select_pages(pdf_file), ([], []))
+        finally:
+            PageIndex.build = build
+    
+    @unittest.skipUnless(PDF_READER_AVAILABLE and CAMELOT_AVAILABLE, "pypdf/PyPDF2 and camelot not available")
+    def test_date_bounded_conversion(self):
+        """Test that only pages overlapping the range are extracted, and only its transactions kept."""
+        pdf, info = build_statement(pages=4, rows_per_page=10, cover_pages=1)
+        full = HDFCConverter.from_bytes(pdf).convert_to_memory()['transactions']
+        dates = full['Date'].map(parse_statement_date)
+        since, until = dates.iloc[12], dates.iloc[18]
+        
+        converter = HDFCConverter.from_bytes(pdf, output_dir=self.temp_dir)
+        converter.since, converter.until = since, until
+        requested = []
+        read_tables = converter._read_tables
+        converter._read_tables = lambda pdf_file, pages, flavor: requested.append(pages) or read_tables(
+            pdf_file, pages, flavor)
+        result = converter.convert_to_memory()
+        self.assertTrue(result['success'], result.get('error'))
+        self.assertEqual(requested, ['3'])
+        expected = full[(dates >= since) & (dates <= until)]
+        self.assertEqual(result['transactions']['Narration'].tolist(), expected['Narration'].tolist())
+
+
+@unittest.skipUnless(PDF_READER_AVAILABLE, "pypdf/PyPDF2 not available")
+class TestPreflight(unittest.TestCase):
+    """Test cases for the pre-conversion PDF check."""
+    
+    def encrypt(self, pdf, user_password, owner_password=None):
+        from PyPDF2 import PdfReader, PdfWriter
+        writer = PdfWriter()
+        for page in PdfReader(io.BytesIO(pdf)).pages:
+            writer.add_page(page)
+        writer.encrypt(user_password, owner_password)
+        output = io.BytesIO()
+        writer.write(output)
+        return output.getvalue()
+    
+    def test_statement(self):
+        """Test that a statement's pages are counted and it is recognised as HDFC."""
+        pdf, info = build_statement(pages=3, rows_per_page=5, cover_pages=1)
+        start = time.perf_counter()
+        self.assertEqual(preflight(pdf), {'pages': info['pages'], 'encrypted': False, 'hdfc': True})
+        self.assertLess(time.perf_counter() - start, 1.0)
+    
+    def test_encrypted(self):
+        """Test that only PDFs needing a user password count as encrypted."""
+        pdf, info = build_statement(pages=1, rows_per_page=5)
+        self.assertTrue(preflight(self.encrypt(pdf, 'secret'))['encrypted'])
+        self.assertEqual(preflight(self.encrypt(pdf, '', 'owner'))['pages'], info['pages'])
+    
+    def test_other_documents(self):
+        """Test that other banks' PDFs, scans and non-PDFs are told apart."""
+        writer = PDFWriter()
+        writer.add_page([_text(40, 800, 'ACME BANK Statement of Account')])
+        self.assertIs(preflight(writer.to_bytes())['hdfc'], False)
+        writer = PDFWriter()
+        writer.add_page([])
+        self.assertIsNone(preflight(writer.to_bytes())['hdfc'])
+        with self.assertRaises(ValueError):
+            preflight(b'not a pdf')
+
+
+class TestImportCost(unittest.TestCase):
+    """Keep importing the converter cheap and free of side effects."""
+    
+    # Generous enough for slow CI runners; an eager pandas/camelot import takes seconds
+    IMPORT_BUDGET_SECONDS = 0.5
+    HEAVY_MODULES = ('pandas', 'numpy', 'camelot', 'cv2', 'pdfminer')
+    
+    def run_python(self, code, cwd):
+        env = dict(os.environ, PYTHONPATH=str(Path(__file__).parent.parent / 'src'))
+        return subprocess.run(
+            [sys.executable, '-c', code], cwd=cwd, env=env,
+            capture_output=True, text=True, timeout=60
+        )
+    
+    def test_import_budget(self):
+        """Test that importing the module loads no heavy engines and writes no files."""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            code = (
+                "import sys, time\n"
+                "start = time.perf_counter()\n"
+                "import hdfc_converter\n"
+                "print(time.perf_counter() - start)\n"
+                f"print(','.join(m for m in {self.HEAVY_MODULES!r} if m in sys.modules))\n"
+            )
+            result = self.run_python(code, temp_dir)
+            self.assertEqual(result.returncode, 0, result.stderr)
+            elapsed, loaded = result.stdout.splitlines()
+            
+            self.assertEqual(loaded, '', f"Heavy modules imported eagerly: {loaded}")
+            self.assertLess(float(elapsed), self.IMPORT_BUDGET_SECONDS)
+            self.assertEqual(os.listdir(temp_dir), [])
+        finally:
+            import shutil
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    
+    def test_help_has_no_side_effects(self):
+        """Test that --help neither loads engines nor creates a log file."""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            code = "import sys; sys.argv = ['hdfc-converter', '--help']; import hdfc_converter; hdfc_converter.main()"
+            result = self.run_python(code, temp_dir)
+            self.assertEqual(result.returncode, 0, result.stderr)
+            self.assertIn('--output-dir', result.stdout)
+            self.assertEqual(os.listdir(temp_dir), [])
+        finally:
+            import shutil
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+class TestSyntheticStatement(unittest.TestCase):
+    """Test cases for the synthetic statement generator."""
+    
+    def test_deterministic(self):
+        """Test that the same seed always produces the same PDF."""
+        first, info = build_statement(pages=3, rows_per_page=20, seed=5)
+        second, _ = build_statement(pages=3, rows_per_page=20, seed=5)
+        self.assertEqual(first, second)
+        self.assertTrue(first.startswith(b'%PDF-1.4'))
+        self.assertEqual(info['pages'], 4)
+        self.assertEqual(info['transaction_pages'], [1, 2, 3])
+        self.assertEqual(info['transactions'], 60)
+    
+    def test_page_limits(self):
+        """Test that page counts outside 1-500 are rejected."""
+        with self.assertRaises(ValueError):
+            build_statement(pages=0)
+        with self.assertRaises(ValueError):
+            build_statement(pages=501)
+
+
+class TestStageBenchmarks(unittest.TestCase):
+    """Test cases for the stage micro-benchmark regression gate."""
+    
+    def test_compare_flags_regressions(self):
+        """Test that only stages slower than the tolerance are reported."""
+        baseline = {'stages': {'parse': {'relative': 1.0}, 'summary': {'relative': 2.0}}}
+        results = {'stages': {'parse': {'relative': 1.6}, 'summary': {'relative': 2.2}}}
+        regressions = bench_stages.compare(results, baseline, tolerance=0.5)
+        self.assertEqual([name for name, *_ in regressions], ['parse'])
+        self.assertEqual(bench_stages.compare(results, baseline, tolerance=1.0), [])
+    
+    def test_baseline_covers_every_stage(self):
+        """Test that the committed baseline has an entry for every benchmarked stage."""
+        import json
+        with open(bench_stages.BASELINE_FILE) as f:
+            baseline = json.load(f)
+        self.assertEqual(set(baseline['stages']), {
+            'parse_transaction_row', 'split_concatenated_rows', 'categorize_transactions',
+            'generate_summary', 'save_results', 'generate_markdown_report',
+        })
+
+
 class TestIntegration(unittest.TestCase):
     """Integration tests."""
     
-    @unittest.skipUnless(CONVERTER_AVAILABLE, "HDFCConverter not available")
+    @unittest.skipUnless(CONVERTER_AVAILABLE and PANDAS_AVAILABLE and CAMELOT_AVAILABLE,
+                         "pandas and camelot not available")
     def test_full_conversion_workflow(self):
         """Test the complete conversion workflow."""
-        # This would require a real PDF file
-        # For now, we'll test the workflow structure
-        
         temp_dir = tempfile.mkdtemp()
         
         try:
-            # Test with a real PDF if available
+            # Test with a real PDF if available, otherwise a synthetic one
             test_pdf = "hdfc_bank_statement_unprotected.pdf"
+            expected_transactions = None
+            
+            if not os.path.exists(test_pdf):
+                test_pdf = os.path.join(temp_dir, "synthetic_statement.pdf")
+                info = write_statement(test_pdf, pages=2, rows_per_page=15, cover_pages=1)
+                expected_transactions = info['transactions']
             
             if os.path.exists(test_pdf):
                 converter = HDFCConverter(test_pdf, temp_dir)
@@ -154,6 +1097,12 @@ class TestIntegration(unittest.TestCase):
                 transactions, page_stats = converter.extract_transactions()
                 self.assertIsInstance(transactions, list)
                 self.assertIsInstance(page_stats, list)
+                if expected_transactions is not None:
+                    self.assertEqual(len(transactions), expected_transactions)
+                    if PDF_READER_AVAILABLE:
+                        # Cover and summary pages are skipped before camelot
+                        self.assertEqual(converter.skipped_pages, [1, info['pages']])
+                        self.assertEqual(page_stats[0]['Status'], 'skipped')
                 
                 if transactions:
                     # Test categorization
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the SQLite ledger
+"""
+
+import unittest
+import tempfile
+import subprocess
+import csv
+import io
+import os
+import shutil
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+import sys
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from hdfc_ledger import LedgerStore, main, to_iso_date
+
+
+def make_transactions(count, month=4):
+    """Build converter-shaped transactions, alternating withdrawals and deposits."""
+    categories = ['UPI Payments', 'Card Payments', 'Salary & Employment']
+    narrations = ['UPI-SWIGGY-swiggy@ybl-SBIN0001234', 'POS 416021XXXXXX4821 DMART', 'SALARY-ACME TECHNOLOGIES']
+    transactions = []
+    for i in range(count):
+        transactions.append({
+            'Date': f"{i % 28 + 1:02d}/{month:02d}/23",
+            'Narration': f"{narrations[i % 3]} {i}",
+            'Reference_Number': f"{i:016d}",
+            'Value_Date': f"{i % 28 + 1:02d}/{month:02d}/23",
+            'Withdrawal_Amount': '0.00' if i % 3 == 2 else f"{(i + 1) * 10:,.2f}",
+            'Deposit_Amount': f"{85000:,.2f}" if i % 3 == 2 else '0.00',
+            'Closing_Balance': f"{100000 + i:,.2f}",
+            'Page_Number': i // 20 + 1,
+            'Category': categories[i % 3],
+        })
+    return transactions
+
+
+class TestLedgerStore(unittest.TestCase):
+    """Test cases for LedgerStore."""
+
+    def setUp(self):
+        self.ledger = LedgerStore(':memory:')
+
+    def tearDown(self):
+        self.ledger.close()
+
+    def test_export_and_reexport(self):
+        """Test bulk export, and that re-exporting a source replaces its rows."""
+        self.assertEqual(self.ledger.export(make_transactions(2500), 'april.pdf'), 2500)
+        self.assertEqual(self.ledger.export(make_transactions(30), 'april.pdf'), 30)
+        self.ledger.export(make_transactions(10, month=5), 'may.pdf')
+        sources = {row['source']: row for row in self.ledger.sources()}
+        self.assertEqual(sources['april.pdf']['transactions'], 30)
+        self.assertEqual(sources['may.pdf']['first'], '2023-05-01')
+
+    def test_monthly_spend(self):
+        """Test spend per month and category, with filters."""
+        self.ledger.export(make_transactions(6), 'april.pdf')
+        self.ledger.export(make_transactions(3, month=5), 'may.pdf')
+        rows = self.ledger.monthly_spend()
+        self.assertEqual(rows[0], {'month': '2023-04', 'category': 'Card Payments', 'spend': 70.0, 'transactions': 2})
+        self.assertNotIn('Salary & Employment', [row['category'] for row in rows])
+
+        rows = self.ledger.monthly_spend(category='UPI Payments', until='2023-04')
+        self.assertEqual(rows, [{'month': '2023-04', 'category': 'UPI Payments', 'spend': 50.0, 'transactions': 2}])
+        self.assertEqual([row['month'] for row in self.ledger.monthly_spend(since='2023-05')], ['2023-05', '2023-05'])
+
+    def test_rollups_updated_incrementally(self):
+        """Test that exporting a statement only recomputes the months it touches."""
+        self.ledger.export(make_transactions(6), 'april.pdf')
+        refreshed = []
+        refresh = self.ledger._refresh_rollups
+        self.ledger._refresh_rollups = lambda months: refreshed.append(sorted(months)) or refresh(months)
+
+        self.ledger.export(make_transactions(3, month=5), 'may.pdf')
+        self.ledger.export(make_transactions(2, month=5), 'may.pdf')
+        self.assertEqual(refreshed, [['2023-05'], ['2023-05']])
+
+        months = {row['month']: row for row in self.ledger.monthly_summary()}
+        self.assertEqual(months['2023-04']['transactions'], 6)
+        self.assertEqual(months['2023-05']['transactions'], 2)
+        self.assertEqual(months['2023-05']['debit'], 30.0)
+        self.assertEqual(months['2023-04']['opening_balance'], 100010.0)
+        self.assertEqual(months['2023-04']['closing_balance'], 100005.0)
+
+    def test_rollups_built_for_existing_ledger(self):
+        """Test that a ledger without rollups gets them on open."""
+        path = os.path.join(tempfile.mkdtemp(), 'ledger.db')
+        try:
+            with LedgerStore(path) as ledger:
+                ledger.export(make_transactions(6), 'april.pdf')
+                with ledger.conn:
+                    ledger.conn.execute("DELETE FROM monthly_rollups")
+            with LedgerStore(path) as ledger:
+                self.assertEqual(ledger.monthly_summary()[0]['transactions'], 6)
+        finally:
+            shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+
+    def test_search(self):
+        """Test narration search, including punctuation in the query."""
+        self.ledger.export(make_transactions(9), 'april.pdf')
+        rows = self.ledger.search('swiggy')
+        self.assertEqual(len(rows), 3)
+        self.assertEqual([row['date'] for row in rows], sorted((row['date'] for row in rows), reverse=True))
+        self.assertEqual(len(self.ledger.search('swiggy@ybl-SBIN0001234')), 3)
+        self.assertEqual(self.ledger.search('swiggy dmart'), [])
+        with self.assertRaises(ValueError):
+            self.ledger.search('')
+
+    def test_filters_use_index(self):
+        """Test that date and category filters are served by indexes."""
+        plan = ' '.join(row[3] for row in self.ledger.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM transactions WHERE category = ? AND date >= ?",
+            ('UPI Payments', '2023-04-01')))
+        self.assertIn('idx_transactions_category', plan)
+
+    def test_to_iso_date(self):
+        """Test statement date normalisation."""
+        self.assertEqual(to_iso_date('05/04/23'), '2023-04-05')
+        self.assertEqual(to_iso_date('05/04/2023'), '2023-04-05')
+        self.assertEqual(to_iso_date('2023-04-05'), '2023-04-05')
+        self.assertIsNone(to_iso_date('Opening Balance'))
+        self.assertIsNone(to_iso_date(None))
+
+
+class TestLedgerCommands(unittest.TestCase):
+    """Test cases for the export and query subcommands."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db = os.path.join(self.temp_dir, 'ledger.db')
+        self.csv_file = os.path.join(self.temp_dir, 'hdfc_transactions_20230430_000000.csv')
+        transactions = make_transactions(12)
+        with open(self.csv_file, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=list(transactions[0]))
+            writer.writeheader()
+            writer.writerows(transactions)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def run_main(self, *argv):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            status = main(list(argv))
+        return status, output.getvalue()
+
+    def test_export_csv_and_query(self):
+        """Test exporting a converter CSV and querying it."""
+        # Through the converter's entry point, in a subprocess since export sets up logging
+        converter = Path(__file__).parent.parent / 'src' / 'hdfc_converter.py'
+        result = subprocess.run([sys.executable, str(converter), 'export', '--sqlite', self.db, self.csv_file],
+                                cwd=self.temp_dir, capture_output=True, text=True, timeout=60)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn('Exported 12 transactions', result.stdout)
+
+        status, output = self.run_main('query', self.db, 'monthly', '--category', 'Card Payments')
+        self.assertEqual(status, 0)
+        self.assertIn('2023-04', output)
+        self.assertIn('Card Payments', output)
+
+        status, output = self.run_main('query', self.db, 'search', 'dmart')
+        self.assertEqual(output.count('DMART'), 4)
+
+        with redirect_stderr(io.StringIO()) as errors:
+            status, _ = self.run_main('query', self.db, 'search', '  ')
+        self.assertEqual(status, 1)
+        self.assertIn('Search text is empty', errors.getvalue())
+
+    def test_query_missing_ledger(self):
+        """Test that querying a missing ledger fails cleanly."""
+        status, _ = self.run_main('query', os.path.join(self.temp_dir, 'missing.db'), 'sources')
+        self.assertEqual(status, 1)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
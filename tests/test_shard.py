@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Unit tests for page-range sharding over the shared-directory job queue
+"""
+
+import unittest
+import tempfile
+import subprocess
+import csv
+import os
+import shutil
+import time
+from importlib.util import find_spec
+from pathlib import Path
+import sys
+
+# Add src and benchmarks to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'benchmarks'))
+
+from hdfc_shard import ShardQueue, run_worker
+from synthetic_statement import write_statement
+
+CAMELOT_AVAILABLE = find_spec('camelot') is not None
+PDF_READER_AVAILABLE = find_spec('pypdf') is not None or find_spec('PyPDF2') is not None
+
+
+@unittest.skipUnless(PDF_READER_AVAILABLE, "pypdf/PyPDF2 not available")
+class TestShardQueue(unittest.TestCase):
+    """Test cases for ShardQueue."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.pdf = os.path.join(self.temp_dir, 'statement.pdf')
+        self.info = write_statement(self.pdf, pages=4, rows_per_page=10)
+        self.queue = ShardQueue(os.path.join(self.temp_dir, 'queue'))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_submit_splits_into_page_ranges(self):
+        """Test that a statement is published as consecutive page-range shards."""
+        job = self.queue.submit(self.pdf, shard_pages=2)
+        status = self.queue.status(job)
+        self.assertEqual(status['pending'], status['total'])
+        pages = []
+        while True:
+            claimed = self.queue.claim()
+            if claimed is None:
+                break
+            pages.append(claimed[1]['pages'])
+        self.assertEqual(sum(pages, []), list(range(1, self.info['pages'] + 1)))
+        self.assertTrue(all(len(shard) <= 2 for shard in pages))
+        self.assertEqual(self.queue.status(job)['claimed'], len(pages))
+
+    def test_claims_are_exclusive(self):
+        """Test that each shard is claimed by exactly one of several queue handles."""
+        job = self.queue.submit(self.pdf, shard_pages=1)
+        other = ShardQueue(self.queue.directory)
+        names = []
+        while True:
+            claimed = self.queue.claim() or other.claim()
+            if claimed is None:
+                break
+            names.append(ShardQueue.shard_name(claimed[0]))
+        self.assertEqual(len(names), len(set(names)))
+        self.assertEqual(len(names), self.queue.status(job)['total'])
+
+    def test_stale_claims_requeued_and_failures_reported(self):
+        """Test that lost shards are handed out again and failed shards fail the merge."""
+        job = self.queue.submit(self.pdf, shard_pages=100)
+        name, _ = self.queue.claim()
+        self.assertEqual(self.queue.requeue_stale(stale_after=60), [])
+        past = time.time() - 120
+        os.utime(self.queue.directory / 'claimed' / name, (past, past))
+        self.assertEqual(self.queue.requeue_stale(stale_after=60), [ShardQueue.shard_name(name)])
+
+        name, _ = self.queue.claim()
+        self.queue.fail(name, 'RuntimeError: camelot failed')
+        with self.assertRaisesRegex(RuntimeError, 'camelot failed'):
+            self.queue.results(job)
+        self.queue.discard(job)
+        self.assertEqual(os.listdir(self.queue.directory / 'pdfs'), [])
+        # Cleaning up a job that is already gone is harmless
+        self.queue.discard(job)
+
+    def test_claim_time_is_fresh(self):
+        """Test that a shard that waited long in pending/ is not requeued as soon as it is claimed."""
+        self.queue.submit(self.pdf, shard_pages=100)
+        past = time.time() - 120
+        for path in (self.queue.directory / 'pending').glob('*.json'):
+            os.utime(path, (past, past))
+        self.queue.claim()
+        self.assertEqual(self.queue.requeue_stale(stale_after=60), [])
+
+    def test_requeued_claim_not_completed(self):
+        """Test that a worker whose claim was requeued neither finishes nor disturbs the new claim."""
+        job = self.queue.submit(self.pdf, shard_pages=100)
+        lost, _ = self.queue.claim()
+        past = time.time() - 120
+        os.utime(self.queue.directory / 'claimed' / lost, (past, past))
+        self.queue.requeue_stale(stale_after=60)
+        claim, _ = self.queue.claim()
+
+        self.assertFalse(self.queue.complete(lost, {'transactions': ['stale'], 'page_stats': [], 'skipped_pages': []}))
+        self.assertFalse(self.queue.fail(lost, 'RuntimeError: too late'))
+        self.assertEqual(self.queue.status(job)['claimed'], 1)
+        self.assertEqual(self.queue.status(job)['done'], 0)
+
+        self.assertTrue(self.queue.complete(claim, {'transactions': ['fresh'], 'page_stats': [], 'skipped_pages': []}))
+        self.assertEqual(self.queue.results(job)[0], ['fresh'])
+        self.assertEqual(self.queue.status(job)['claimed'], 0)
+        self.assertEqual(os.listdir(self.queue.directory / 'claimed'), [])
+
+
+@unittest.skipUnless(PDF_READER_AVAILABLE and CAMELOT_AVAILABLE, "pypdf/PyPDF2 and camelot not available")
+class TestShardedConversion(unittest.TestCase):
+    """Test cases for converting statements across worker processes."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.pdf = os.path.join(self.temp_dir, 'statement.pdf')
+        self.info = write_statement(self.pdf, pages=3, rows_per_page=10, cover_pages=1)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_worker_results_merge_in_page_order(self):
+        """Test that shards converted out of order are merged in page order."""
+        queue = ShardQueue(os.path.join(self.temp_dir, 'queue'))
+        job = queue.submit(self.pdf, shard_pages=1)
+        # Claim the shards back to front, as a slow first worker would leave them
+        for path in sorted((queue.directory / 'pending').glob('*.json'))[:-1]:
+            os.rename(path, path.with_suffix('.hold'))
+        self.assertEqual(run_worker(queue.directory, exit_when_idle=True), 1)
+        for path in (queue.directory / 'pending').glob('*.hold'):
+            os.rename(path, path.with_suffix('.json'))
+        run_worker(queue.directory, exit_when_idle=True)
+
+        transactions, page_stats, skipped = queue.results(job)
+        self.assertEqual(len(transactions), self.info['transactions'])
+        pages = [transaction['Page_Number'] for transaction in transactions]
+        self.assertEqual(pages, sorted(pages))
+        self.assertTrue(all(transaction['Category'] for transaction in transactions))
+        self.assertEqual(skipped, [1, self.info['pages']])
+
+    def test_coordinator_with_local_workers(self):
+        """Test the coordinate command end to end with two local worker processes."""
+        converter = Path(__file__).parent.parent / 'src' / 'hdfc_converter.py'
+        queue = os.path.join(self.temp_dir, 'queue')
+        result = subprocess.run(
+            [sys.executable, str(converter), 'coordinate', '--queue', queue, '--local-workers', '2',
+             '--shard-pages', '1', '--poll-interval', '0.2', '-o', 'results', self.pdf],
+            cwd=self.temp_dir, capture_output=True, text=True, timeout=300)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+        csv_files = list(Path(self.temp_dir, 'results').glob('hdfc_transactions_*.csv'))
+        self.assertEqual(len(csv_files), 1)
+        with open(csv_files[0], encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(len(rows), self.info['transactions'])
+        self.assertEqual([row['Page_Number'] for row in rows], sorted(row['Page_Number'] for row in rows))
+        # Every shard and the queued PDF are cleaned up
+        self.assertEqual([path for path in Path(queue).rglob('*') if path.is_file()], [])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
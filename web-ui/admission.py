@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Admission control for the HDFC PDF Converter Web UI
+Bounded pools of conversion workers: each job class (short statements,
+long ones) gets its own workers and queue, and a full queue turns new jobs
+away instead of letting a burst of uploads exhaust CPU and memory.
+"""
+
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import QUEUE_DEPTH, ADMISSION_REJECTIONS
+
+# Bounds of the Retry-After estimate, in seconds
+MIN_RETRY_AFTER = 1
+MAX_RETRY_AFTER = 600
+
+# Weight of the latest job in the moving average of job durations
+DURATION_SMOOTHING = 0.2
+
+
+class Saturated(Exception):
+    """A pool's workers and queue are full; retry_after is a suggested wait in seconds."""
+
+    def __init__(self, pool, retry_after):
+        super().__init__(f'The {pool} conversion queue is full; retry in {retry_after}s')
+        self.pool = pool
+        self.retry_after = retry_after
+
+
+class Reservation:
+    """
+    A job's place in a JobPool.
+
+    Entering it waits for a free worker slot; leaving it (or release(),
+    which is safe to call more than once) gives the place back.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+        self._started = None
+        self._released = False
+
+    def __enter__(self):
+        self.pool._slots.acquire()
+        self._started = time.monotonic()
+        self.pool._update(running=1)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+    def submit(self, fn, *args, **kwargs):
+        """Run the job on the pool's threads; returns a Future."""
+        def run():
+            with self:
+                return fn(*args, **kwargs)
+
+        try:
+            future = self.pool._executor.submit(run)
+        except BaseException:
+            self.release()
+            raise
+        # A job cancelled before it started never enters its reservation
+        future.add_done_callback(lambda _: self.release())
+        return future
+
+    def release(self):
+        with self.pool._lock:
+            if self._released:
+                return
+            self._released = True
+        if self._started is None:
+            self.pool._update(admitted=-1)
+        else:
+            self.pool._slots.release()
+            self.pool._update(admitted=-1, running=-1, seconds=time.monotonic() - self._started)
+
+
+class JobPool:
+    """
+    Conversion workers for one class of job, behind a bounded queue.
+
+    submit() runs a job on the pool's own threads; reserve() admits a job
+    that runs on the caller's thread, such as a streamed response. Both
+    raise Saturated rather than hold more than max_queued waiting jobs.
+    """
+
+    def __init__(self, name, workers, max_queued, job_seconds=30.0):
+        self.name = name
+        self.workers = workers
+        self.max_queued = max_queued
+        self.job_seconds = job_seconds
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f'conversion-{name}')
+        self._slots = threading.Semaphore(workers)
+        self._lock = threading.Lock()
+        self._admitted = 0
+        self._running = 0
+        QUEUE_DEPTH.set(0, pool=name)
+
+    @property
+    def queued(self):
+        with self._lock:
+            return self._admitted - self._running
+
+    def retry_after(self):
+        """Seconds until the queue is likely to have room, from the average job duration."""
+        with self._lock:
+            waves = (self._admitted - self._running + 1) / self.workers
+            seconds = math.ceil(waves * self.job_seconds)
+        return min(max(seconds, MIN_RETRY_AFTER), MAX_RETRY_AFTER)
+
+    def reserve(self):
+        """Admit a job, or raise Saturated; the caller runs it inside the returned Reservation."""
+        with self._lock:
+            admitted = self._admitted < self.workers + self.max_queued
+            if admitted:
+                self._admitted += 1
+        if not admitted:
+            ADMISSION_REJECTIONS.inc(pool=self.name)
+            raise Saturated(self.name, self.retry_after())
+        self._update()
+        return Reservation(self)
+
+    def submit(self, fn, *args, **kwargs):
+        """Admit a job and run it on the pool; returns a Future, or raises Saturated."""
+        return self.reserve().submit(fn, *args, **kwargs)
+
+    def _update(self, admitted=0, running=0, seconds=None):
+        with self._lock:
+            self._admitted += admitted
+            self._running += running
+            if seconds is not None:
+                self.job_seconds += DURATION_SMOOTHING * (seconds - self.job_seconds)
+            depth = self._admitted - self._running
+        QUEUE_DEPTH.set(depth, pool=self.name)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
@@ -10,8 +10,9 @@ import sys
 try:
     # Add the src directory to the path so we can import our converter
     sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
-    from backend import app
+    from backend import app, configure_logging
     print("Using full backend with PDF processing")
+    configure_logging()
 except ImportError as e:
     print(f"Full backend not available: {e}")
     print("Using simple backend for Railway deployment")
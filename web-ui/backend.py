@@ -6,26 +6,44 @@ Handles actual PDF processing and CSV generation
 
 import os
 import sys
+import io
 import json
+import zlib
+import zipfile
+import uuid
 import tempfile
 import subprocess
-from flask import Flask, request, jsonify, send_file
-from werkzeug.utils import secure_filename
-import pandas as pd
+import time
+import threading
 from datetime import datetime
+from collections import OrderedDict
+from concurrent.futures import as_completed
+from flask import Flask, request, jsonify, send_file, Response, stream_with_context
+from werkzeug.utils import secure_filename
 
 # Add the src directory to the path so we can import our converter
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 try:
-    from hdfc_converter import HDFCConverter
+    from hdfc_converter import (HDFCConverter, ARTIFACT_FILES, merge_summaries, parse_size, preflight,
+                                serialize_artifacts, setup_logging)
     print("Successfully imported HDFCConverter")
 except ImportError as e:
     print(f"Warning: Could not import HDFCConverter: {e}")
     HDFCConverter = None
+    ARTIFACT_FILES = {}
+    preflight = None
+    setup_logging = None
 except Exception as e:
     print(f"Error importing HDFCConverter: {e}")
     HDFCConverter = None
+    ARTIFACT_FILES = {}
+    preflight = None
+    setup_logging = None
+
+from result_store import ResultStore, TransactionStore, merge_transactions, parse_date, SORT_COLUMNS
+from admission import JobPool, Saturated
+import metrics
 
 # Fallback to simple converter
 try:
@@ -44,9 +62,386 @@ app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50MB max file size
 # Allowed file extensions
 ALLOWED_EXTENSIONS = {'pdf'}
 
+# Archives of statements accepted by /upload, and limits on what they expand to
+ARCHIVE_EXTENSIONS = {'zip'}
+MAX_BATCH_FILES = int(os.environ.get('MAX_BATCH_FILES', 36))
+MAX_ARCHIVE_BYTES = 200 * 1024 * 1024
+
+# Conversions run on one of two bounded pools, chosen by page count after a
+# pre-flight check, so short statements are never stuck behind long ones.
+# Each pool turns jobs away (429) once MAX_QUEUED_CONVERSIONS are waiting
+SMALL_JOB_PAGES = int(os.environ.get('SMALL_JOB_PAGES', 20))
+CONVERSION_WORKERS = int(os.environ.get('CONVERSION_WORKERS', min(4, os.cpu_count() or 1)))
+LARGE_CONVERSION_WORKERS = int(os.environ.get('LARGE_CONVERSION_WORKERS', max(1, CONVERSION_WORKERS // 2)))
+MAX_QUEUED_CONVERSIONS = int(os.environ.get('MAX_QUEUED_CONVERSIONS', MAX_BATCH_FILES))
+SMALL_JOBS = JobPool('small', CONVERSION_WORKERS, MAX_QUEUED_CONVERSIONS, job_seconds=5.0)
+LARGE_JOBS = JobPool('large', LARGE_CONVERSION_WORKERS, MAX_QUEUED_CONVERSIONS, job_seconds=60.0)
+
+# Pages assumed per this many bytes when no PDF reader is installed to count them
+BYTES_PER_PAGE = 50 * 1024
+
+# Downloadable artifacts: file type -> (filename matcher, mime type, gzip-able)
+ARTIFACTS = {
+    'csv': (lambda name: name.endswith('.csv') and 'transactions' in name.lower(), 'text/csv', True),
+    'excel': (lambda name: name.endswith('.xlsx'),
+              'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', False),
+    'summary': (lambda name: name.endswith('.md'), 'text/markdown', True),
+}
+
+# Download file type -> converter artifact format
+ARTIFACT_FORMATS = {'csv': 'csv', 'excel': 'excel', 'summary': 'report'}
+
+# Chunk size used when streaming artifacts to the client
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Converted transactions per session, kept in memory for the transactions API
+RESULT_STORE = ResultStore(max_sessions=int(os.environ.get('MAX_STORED_SESSIONS', 32)))
+
+# Transaction pages converted before /preview answers; the rest continue in the background
+PREVIEW_PAGES = int(os.environ.get('PREVIEW_PAGES', 2))
+# Seconds /preview may spend before answering with the pages converted so far
+PREVIEW_DEADLINE_SECONDS = float(os.environ.get('PREVIEW_DEADLINE_SECONDS', 20))
+PREVIEW_ROWS = 20
+
+# Status of conversions continuing in the background, by session id
+BACKGROUND_JOBS = OrderedDict()
+BACKGROUND_JOBS_LOCK = threading.Lock()
+
+# Memory budget (e.g. 512M) for the whole process, all running conversions together, sized to the container
+MAX_CONVERSION_MEMORY = os.environ.get('CONVERTER_MAX_MEMORY')
+if MAX_CONVERSION_MEMORY and HDFCConverter is not None:
+    MAX_CONVERSION_MEMORY = parse_size(MAX_CONVERSION_MEMORY)
+else:
+    MAX_CONVERSION_MEMORY = None
+
+# Page size limits for the transactions API
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Prefix of the temp directories used by file-based (fallback) sessions
+SESSION_DIR_PREFIX = 'hdfc_'
+
+def session_temp_bytes():
+    """Total size of the session directories left in the temp directory."""
+    total = 0
+    for entry in os.scandir(tempfile.gettempdir()):
+        if not entry.name.startswith(SESSION_DIR_PREFIX) or not entry.is_dir(follow_symlinks=False):
+            continue
+        for root, _, files in os.walk(entry.path):
+            for file in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, file))
+                except OSError:
+                    pass
+    return total
+
+metrics.STORED_SESSIONS.set_function(lambda: len(RESULT_STORE))
+metrics.TEMP_SESSION_BYTES.set_function(session_temp_bytes)
+
+def observe_conversion(engine, convert):
+    """Run convert() as an active worker and record its outcome, latency and page count."""
+    start = time.perf_counter()
+    outcome = 'error'
+    with metrics.ACTIVE_WORKERS.track_inprogress():
+        try:
+            result = convert()
+            outcome = 'success' if result.get('success') else 'failure'
+            return result
+        finally:
+            metrics.CONVERSIONS.inc(engine=engine, outcome=outcome)
+            metrics.CONVERSION_SECONDS.observe(time.perf_counter() - start, engine=engine)
+            if outcome == 'success':
+                pages = result.get('pages_processed', 0)
+                metrics.PAGES_CONVERTED.inc(pages)
+                metrics.CONVERSION_PAGES.observe(pages)
+
+def describe_result(result):
+    """The outcome of a converter result for logging: counts and coverage, never the transactions or summary tables."""
+    description = {key: result[key] for key in ('success', 'error', 'partial', 'pages_processed')
+                   if key in result}
+    if 'transactions' in result:
+        description['transactions'] = len(result['transactions'])
+    for key in ('pages_skipped', 'pages_remaining'):
+        if result.get(key):
+            description[key] = len(result[key])
+    if 'summary' in result:
+        description['date_range'] = result['summary'].get('date_range')
+    return description
+
+def parse_amount(value):
+    try:
+        return float(str(value).replace(',', ''))
+    except ValueError:
+        return 0.0
+
+def iter_conversion_records(converter):
+    """
+    Yield a record for each transaction as soon as its page is parsed, then a summary record.
+
+    The summary is built from running totals, so no more than one page's
+    transactions are held at a time. A conversion that fails part-way ends
+    with an error record instead, since the records before it may already
+    have been sent.
+    """
+    start = time.perf_counter()
+    outcome = 'error'
+    count = 0
+    withdrawals = deposits = 0.0
+    categories = {}
+    first = last = None
+    with metrics.ACTIVE_WORKERS.track_inprogress():
+        try:
+            for transactions in converter.iter_transactions():
+                for transaction in converter.categorize_transactions(transactions):
+                    count += 1
+                    withdrawals += parse_amount(transaction['Withdrawal_Amount'])
+                    deposits += parse_amount(transaction['Deposit_Amount'])
+                    categories[transaction['Category']] = categories.get(transaction['Category'], 0) + 1
+                    date = parse_date(transaction['Date'])
+                    if date is not None:
+                        if first is None or date < first[0]:
+                            first = (date, transaction['Date'])
+                        if last is None or date > last[0]:
+                            last = (date, transaction['Date'])
+                    yield {'type': 'transaction', **transaction}
+            outcome = 'success'
+        except Exception as e:
+            print(f"Streaming conversion failed: {type(e).__name__}: {e}")
+            yield {'type': 'error', 'error': f'PDF processing failed: {e}'}
+            return
+        finally:
+            metrics.CONVERSIONS.inc(engine='stream', outcome=outcome)
+            metrics.CONVERSION_SECONDS.observe(time.perf_counter() - start, engine='stream')
+    pages = len({stats['Page'] for stats in converter.page_stats if stats['Status'] == 'extracted'})
+    metrics.PAGES_CONVERTED.inc(pages)
+    metrics.CONVERSION_PAGES.observe(pages)
+    yield {
+        'type': 'summary',
+        'transaction_count': count,
+        'category_count': len(categories),
+        'categories': categories,
+        'date_range': {'start': first[1], 'end': last[1]} if first else {'start': 'N/A', 'end': 'N/A'},
+        'total_withdrawals': round(withdrawals, 2),
+        'total_deposits': round(deposits, 2),
+        'page_count': pages,
+        'pages_skipped': converter.skipped_pages,
+    }
+
+def plan_conversion(filename, pdf_bytes):
+    """
+    Pre-flight a statement and pick its pool by page count; returns (pool, pages).
+
+    Raises ValueError when the PDF cannot be read, needs a password, or is
+    not an HDFC Bank statement.
+    """
+    info = preflight(pdf_bytes) if preflight is not None else None
+    if info is None:
+        pages = max(1, len(pdf_bytes) // BYTES_PER_PAGE)
+    elif info['encrypted']:
+        raise ValueError(f'{filename} is password protected; upload an unprotected copy')
+    elif info['hdfc'] is False:
+        raise ValueError(f'{filename} does not look like an HDFC Bank statement')
+    else:
+        pages = info['pages']
+    return (SMALL_JOBS if pages <= SMALL_JOB_PAGES else LARGE_JOBS), pages
+
+def saturated_response(error):
+    """429 response for a job turned away by a full pool."""
+    response = jsonify({'error': 'The server is busy converting other statements; please retry shortly',
+                        'retry_after': error.retry_after})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+def set_background_job(session_id, **state):
+    """Record the status of a background conversion, forgetting the oldest beyond MAX_STORED_SESSIONS."""
+    with BACKGROUND_JOBS_LOCK:
+        BACKGROUND_JOBS[session_id] = state
+        BACKGROUND_JOBS.move_to_end(session_id)
+        while len(BACKGROUND_JOBS) > RESULT_STORE.max_sessions:
+            BACKGROUND_JOBS.popitem(last=False)
+
+def rollups_of(summary):
+    """The monthly rollups in a full converter's summary."""
+    return summary['monthly_breakdown'], summary['monthly_totals']
+
+def store_result(session_id, converter, result):
+    """Keep a full converter's in-memory result for the transactions API and downloads; returns its stats."""
+    # Artifacts are serialised from the in-memory result when first downloaded
+    artifacts = lambda fmt: converter.serialize_results(
+        result['transactions'], result['page_stats'], result['summary'], [fmt]
+    )[fmt]
+    stats = RESULT_STORE.put(session_id, result['transactions'], artifacts, rollups_of(result['summary'])).stats()
+    stats['page_count'] = result.get('pages_processed', 0)
+    return stats
+
+def finish_conversion(session_id, converter):
+    """Convert the pages a preview left, then store the whole statement under the session."""
+    try:
+        result = observe_conversion('full', converter.convert_to_memory)
+    except Exception as e:
+        result = {'success': False, 'error': f'{type(e).__name__}: {e}'}
+    if result.get('success'):
+        set_background_job(session_id, status='ready', stats=store_result(session_id, converter, result))
+    else:
+        print(f"Background conversion {session_id} failed: {result.get('error')}")
+        set_background_job(session_id, status='failed', error=result.get('error', 'PDF processing failed'))
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def is_archive(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ARCHIVE_EXTENSIONS
+
+def read_archive(upload):
+    """Return (filename, bytes) for every PDF in an uploaded zip archive."""
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(upload.read()))
+    except zipfile.BadZipFile:
+        raise ValueError(f'{upload.filename} is not a valid zip archive')
+    with archive:
+        members = [info for info in archive.infolist()
+                   if not info.is_dir() and allowed_file(info.filename)
+                   and not os.path.basename(info.filename).startswith('.')
+                   and not info.filename.startswith('__MACOSX/')]
+        if sum(info.file_size for info in members) > MAX_ARCHIVE_BYTES:
+            raise ValueError(f'{upload.filename} expands to more than {MAX_ARCHIVE_BYTES // 2 ** 20}MB')
+        return [(secure_filename(os.path.basename(info.filename)), archive.read(info)) for info in members]
+
+def collect_pdfs(uploads):
+    """
+    Return (filename, bytes) for every uploaded PDF, expanding zip archives.
+
+    Filenames are made unique so each statement can be told apart in the
+    merged ledger. Raises ValueError for anything that is not a PDF or a
+    readable archive, or when the upload holds no PDFs or too many.
+    """
+    pdfs = []
+    for upload in uploads:
+        filename = secure_filename(upload.filename)
+        if allowed_file(filename):
+            pdfs.append((filename, upload.read()))
+        elif is_archive(filename):
+            pdfs.extend(read_archive(upload))
+        else:
+            raise ValueError(f'{upload.filename}: only PDF files and zip archives are allowed')
+    if not pdfs:
+        raise ValueError('No PDF files found in the upload')
+    if len(pdfs) > MAX_BATCH_FILES:
+        raise ValueError(f'At most {MAX_BATCH_FILES} statements can be uploaded together')
+
+    seen = {}
+    unique = []
+    for filename, data in pdfs:
+        count = seen[filename] = seen.get(filename, 0) + 1
+        if count > 1:
+            stem, ext = os.path.splitext(filename)
+            filename = f'{stem}-{count}{ext}'
+        unique.append((filename, data))
+    return unique
+
+def convert_statement(filename, pdf_bytes):
+    """Convert one statement in memory with the full converter; returns (converter, result)."""
+    converter = HDFCConverter.from_bytes(pdf_bytes, name=filename, max_memory=MAX_CONVERSION_MEMORY)
+    return converter, observe_conversion('full', converter.convert_to_memory)
+
+def find_artifact(temp_dir, file_type):
+    """Return the filename of the artifact of the given type in temp_dir, or None."""
+    if file_type not in ARTIFACTS:
+        return None
+    matches = ARTIFACTS[file_type][0]
+    for file in sorted(os.listdir(temp_dir)):
+        if matches(file):
+            return file
+    return None
+
+def accepts_gzip():
+    """Check whether the client accepts a gzip Content-Encoding."""
+    return request.accept_encodings['gzip'] > 0
+
+def cleanup_temp_dir(temp_dir, reason):
+    try:
+        import shutil
+        shutil.rmtree(temp_dir)
+        print(f"Cleaned up temporary files after {reason}")
+    except:
+        pass
+
+def iter_file(file_path):
+    """Yield a file's contents in STREAM_CHUNK_SIZE pieces."""
+    with open(file_path, 'rb') as f:
+        while True:
+            chunk = f.read(STREAM_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+def iter_gzip(chunks):
+    """Gzip-compress an iterable of byte chunks on the fly."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+class _ZipStream(io.RawIOBase):
+    """Write-only, unseekable sink that lets zipfile emit an archive incrementally."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def iter_zip(members):
+    """
+    Stream a zip archive of (arcname, chunks) pairs without staging it on disk.
+
+    Since the sink is not seekable, zipfile writes sizes and CRCs in data
+    descriptors after each member, so every chunk can be sent as soon as it
+    is compressed.
+    """
+    sink = _ZipStream()
+    with zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for arcname, chunks in members:
+            with archive.open(arcname, mode='w') as member:
+                for chunk in chunks:
+                    member.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            yield sink.drain()
+    yield sink.drain()
+
+def iter_memory_members(store):
+    """Yield (filename, chunks) for every in-memory artifact, serialising each on demand."""
+    for fmt in ARTIFACT_FILES:
+        filename, data = store.artifact(fmt)
+        yield filename, [data]
+
+def run_simple_converter(filename, pdf_bytes):
+    """Run the file-based SimpleHDFCConverter fallback; returns (result, temp_dir)."""
+    temp_dir = tempfile.mkdtemp(prefix=SESSION_DIR_PREFIX)
+    temp_pdf_path = os.path.join(temp_dir, filename)
+    with open(temp_pdf_path, 'wb') as f:
+        f.write(pdf_bytes)
+    converter = SimpleHDFCConverter(temp_pdf_path, temp_dir)
+    result = observe_conversion('simple', converter.convert)
+    print(f"Simple converter result: {describe_result(result)}")
+    if not result['success']:
+        cleanup_temp_dir(temp_dir, 'processing failure')
+    return result, temp_dir
+
 def process_with_timeout(func, timeout_seconds=120):
     """Process a function with a timeout using threading."""
     import threading
@@ -75,6 +470,12 @@ def process_with_timeout(func, timeout_seconds=120):
     
     return result[0]
 
+@app.after_request
+def count_request(response):
+    endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    metrics.HTTP_REQUESTS.inc(endpoint=endpoint, method=request.method, status=response.status_code)
+    return response
+
 @app.route('/')
 def index():
     return send_file('index.html')
@@ -87,159 +488,423 @@ def styles():
 def script():
     return send_file('script.js')
 
+def submit_batch(pdfs):
+    """
+    Reserve a pool place for every PDF, then submit them all for conversion.
+
+    Returns (futures, refused): each submitted Future mapped to its
+    filename, and the status of the files refused at pre-flight. Raises
+    Saturated, holding no place and having started nothing, if any file
+    cannot queue.
+    """
+    reservations = []
+    refused = []
+    try:
+        for filename, data in pdfs:
+            try:
+                pool, _ = plan_conversion(filename, data)
+            except ValueError as e:
+                refused.append({'filename': filename, 'status': 'failed', 'error': str(e)})
+                continue
+            reservations.append((pool.reserve(), filename, data))
+    except Saturated:
+        for reservation, _, _ in reservations:
+            reservation.release()
+        raise
+    futures = {reservation.submit(convert_statement, filename, data): filename
+               for reservation, filename, data in reservations}
+    return futures, refused
+
+def upload_batch(uploads):
+    """
+    Convert several statements concurrently and merge them into one session.
+
+    Each PDF (zip archives are expanded) is pre-flighted and converted on
+    the pool for its size. Every file's place is reserved before any starts
+    converting, so a batch that cannot all queue is turned away with 429
+    having converted nothing. The response lists every file's status in the
+    order they completed, and the session holds all converted transactions
+    in date order.
+    """
+    if HDFCConverter is None:
+        return jsonify({'error': 'Multi-file upload is not available; upload one PDF at a time'}), 500
+    # The uploaded bytes are only held by the conversions from here on
+    try:
+        futures, files = submit_batch(collect_pdfs(uploads))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Saturated as e:
+        return saturated_response(e)
+    total = len(futures) + len(files)
+    converted = {}
+    for future in as_completed(futures):
+        filename = futures[future]
+        try:
+            _, result = future.result()
+        except Exception as e:
+            result = {'success': False, 'error': f'{type(e).__name__}: {e}'}
+        if result.get('success'):
+            converted[filename] = result
+            status = {'filename': filename, 'status': 'converted',
+                      'transactions': len(result['transactions']),
+                      'pages_processed': result.get('pages_processed', 0)}
+        else:
+            status = {'filename': filename, 'status': 'failed',
+                      'error': result.get('error', 'PDF processing failed')}
+        print(f"Batch upload: {filename} {status['status']} ({len(files) + 1}/{total})")
+        files.append(status)
+
+    if not converted:
+        return jsonify({'error': 'None of the uploaded statements could be converted', 'files': files}), 500
+
+    # One ledger and summary for every statement, in date order
+    sources = sorted(converted)
+    ledger = merge_transactions([(filename, converted[filename]['transactions']) for filename in sources])
+    page_stats = [dict(stats, File=filename) for filename in sources
+                  for stats in converted[filename]['page_stats']]
+    # Each statement was summarised with its conversion; combine those rather than regroup the ledger
+    summaries = sorted((result['summary'] for result in converted.values()),
+                       key=lambda summary: parse_date(summary['date_range']['start']) or datetime.max)
+    summary = merge_summaries(summaries, ledger)
+
+    session_id = uuid.uuid4().hex
+    # Serialised under all the sources' names
+    artifacts = lambda fmt: serialize_artifacts(ledger, page_stats, summary, [fmt], source=', '.join(sources))[fmt]
+    store = RESULT_STORE.put(session_id, ledger, artifacts, rollups_of(summary))
+    stats = store.stats()
+    stats['page_count'] = sum(result.get('pages_processed', 0) for result in converted.values())
+    stats['file_count'] = len(converted)
+
+    return jsonify({
+        'success': True,
+        'message': f'{len(converted)} of {len(files)} statements processed successfully',
+        'stats': stats,
+        'session_id': session_id,
+        'files': files
+    })
+
 @app.route('/upload', methods=['POST'])
 def upload_file():
     if 'file' not in request.files:
         return jsonify({'error': 'No file uploaded'}), 400
     
-    file = request.files['file']
-    if file.filename == '':
+    uploads = [upload for upload in request.files.getlist('file') if upload.filename != '']
+    if not uploads:
         return jsonify({'error': 'No file selected'}), 400
+    if len(uploads) > 1 or is_archive(uploads[0].filename):
+        return upload_batch(uploads)
     
+    file = uploads[0]
     if not allowed_file(file.filename):
-        return jsonify({'error': 'Only PDF files are allowed'}), 400
+        return jsonify({'error': 'Only PDF files and zip archives are allowed'}), 400
     
     try:
-        # Save uploaded file temporarily
+        # Keep the upload in memory; the full converter never touches disk for outputs
         filename = secure_filename(file.filename)
-        temp_dir = tempfile.mkdtemp()
-        temp_pdf_path = os.path.join(temp_dir, filename)
-        file.save(temp_pdf_path)
+        pdf_bytes = file.read()
+        temp_dir = None
+        converter = None
+        # Doubles as the converter's job id, so log lines can be matched to the session
+        session_id = uuid.uuid4().hex
         
-        # Process the PDF using our converter
-        print(f"HDFCConverter available: {HDFCConverter is not None}")
-        print(f"SimpleHDFCConverter available: {SimpleHDFCConverter is not None}")
+        # Refuse what cannot be converted, and queue by size, before any real work
+        try:
+            pool, _ = plan_conversion(filename, pdf_bytes)
+            reservation = pool.reserve()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Saturated as e:
+            return saturated_response(e)
         
-        if HDFCConverter is not None:
-            # Use full converter if available
-            print("Using full HDFCConverter for PDF processing")
-            try:
-                print("Creating HDFCConverter instance...")
-                converter = HDFCConverter(temp_pdf_path, temp_dir)
-                print("HDFCConverter instance created successfully")
-                print("Starting conversion...")
-                result = converter.convert()
-                print(f"Full converter result: {result}")
-                if result.get('success'):
-                    print("Full converter processing completed successfully")
-                else:
-                    print(f"Full converter failed: {result.get('error', 'Unknown error')}")
-            except Exception as e:
-                print(f"Full converter failed with exception: {type(e).__name__}: {str(e)}")
-                # Fall back to simple converter
-                if SimpleHDFCConverter is not None:
-                    print("Falling back to SimpleHDFCConverter")
-                    converter = SimpleHDFCConverter(temp_pdf_path, temp_dir)
-                    result = converter.convert()
-                    print(f"Simple converter result: {result}")
-                else:
-                    return jsonify({'error': f'PDF processing failed: {str(e)}'}), 500
-        elif SimpleHDFCConverter is not None:
-            # Use simple converter as fallback
-            print("Using SimpleHDFCConverter fallback for PDF processing")
-            converter = SimpleHDFCConverter(temp_pdf_path, temp_dir)
-            result = converter.convert()
-            print(f"Simple converter result: {result}")
-        else:
-            return jsonify({'error': 'PDF processing not available. Please use the command line version.'}), 500
+        # Waits here for one of the pool's workers
+        with reservation:
+            # Process the PDF using our converter
+            print(f"HDFCConverter available: {HDFCConverter is not None}")
+            print(f"SimpleHDFCConverter available: {SimpleHDFCConverter is not None}")
+            
+            if HDFCConverter is not None:
+                # Use full converter if available
+                print("Using full HDFCConverter for in-memory PDF processing")
+                try:
+                    print("Creating HDFCConverter instance...")
+                    converter = HDFCConverter.from_bytes(pdf_bytes, name=filename, max_memory=MAX_CONVERSION_MEMORY,
+                                                         job_id=session_id)
+                    print("HDFCConverter instance created successfully")
+                    print("Starting conversion...")
+                    result = observe_conversion('full', converter.convert_to_memory)
+                    print(f"Full converter result: {describe_result(result)}")
+                    if result.get('success'):
+                        print("Full converter processing completed successfully")
+                    else:
+                        print(f"Full converter failed: {result.get('error', 'Unknown error')}")
+                except Exception as e:
+                    print(f"Full converter failed with exception: {type(e).__name__}: {str(e)}")
+                    # Fall back to simple converter
+                    if SimpleHDFCConverter is not None:
+                        print("Falling back to SimpleHDFCConverter")
+                        converter = None
+                        result, temp_dir = run_simple_converter(filename, pdf_bytes)
+                    else:
+                        return jsonify({'error': f'PDF processing failed: {str(e)}'}), 500
+            elif SimpleHDFCConverter is not None:
+                # Use simple converter as fallback
+                print("Using SimpleHDFCConverter fallback for PDF processing")
+                result, temp_dir = run_simple_converter(filename, pdf_bytes)
+            else:
+                return jsonify({'error': 'PDF processing not available. Please use the command line version.'}), 500
         
         if result['success']:
-            # Read the generated CSV to get transaction count
-            csv_path = result['csv_file']
-            df = pd.read_csv(csv_path)
-            
-            # Get summary statistics
-            stats = {
-                'transaction_count': len(df),
-                'page_count': result.get('pages_processed', 0),
-                'category_count': df['Category'].nunique() if 'Category' in df.columns else 0,
-                'date_range': {
-                    'start': df['Date'].min() if 'Date' in df.columns else 'N/A',
-                    'end': df['Date'].max() if 'Date' in df.columns else 'N/A'
-                },
-                'total_withdrawals': df['Withdrawal_Amount'].sum() if 'Withdrawal_Amount' in df.columns else 0,
-                'total_deposits': df['Deposit_Amount'].sum() if 'Deposit_Amount' in df.columns else 0
-            }
-            
-            # Store file paths for download
-            session_data = {
-                'csv_file': csv_path,
-                'excel_file': result.get('excel_file'),
-                'summary_file': result.get('summary_file'),
-                'stats': stats,
-                'temp_dir': temp_dir
-            }
+            # Keep the converted transactions in memory instead of re-reading the CSV
+            if temp_dir is None:
+                stats = store_result(session_id, converter, result)
+            else:
+                session_id = os.path.basename(temp_dir)  # Use temp dir name as session ID
+                stats = RESULT_STORE.put(session_id, result.get('transactions', [])).stats()
+                stats['page_count'] = result.get('pages_processed', 0)
             
             return jsonify({
                 'success': True,
                 'message': 'PDF processed successfully',
                 'stats': stats,
-                'session_id': os.path.basename(temp_dir)  # Use temp dir name as session ID
+                'session_id': session_id
             })
         else:
-            # Clean up temp files on failure
-            try:
-                import shutil
-                shutil.rmtree(temp_dir)
-                print("Cleaned up temporary files after processing failure")
-            except:
-                pass
             return jsonify({'error': result.get('error', 'PDF processing failed')}), 500
             
     except Exception as e:
         return jsonify({'error': f'Processing error: {str(e)}'}), 500
 
+@app.route('/preview', methods=['POST'])
+def preview_file():
+    """
+    Convert the first PREVIEW_PAGES transaction pages of one PDF and answer straight away.
+
+    The preview stops early, at a page boundary, once the request has taken
+    PREVIEW_DEADLINE_SECONDS including the wait for a worker. The response
+    has the first transactions and stats extrapolated from the pages read
+    ('approximate': true); the rest of the statement converts in
+    the background, resuming after the previewed pages, and
+    /api/sessions/<id>/status reports when the session is ready. The
+    continuation's place in its pool is taken before the preview runs, so a
+    preview is never answered for a statement that cannot be finished.
+    """
+    if HDFCConverter is None:
+        return jsonify({'error': 'Preview is not available; use /upload'}), 501
+    file = request.files.get('file')
+    if file is None or file.filename == '':
+        return jsonify({'error': 'No file uploaded'}), 400
+    if not allowed_file(file.filename):
+        return jsonify({'error': 'Only PDF files are allowed'}), 400
+    
+    started = time.monotonic()
+    filename = secure_filename(file.filename)
+    pdf_bytes = file.read()
+    session_id = uuid.uuid4().hex
+    try:
+        pool, _ = plan_conversion(filename, pdf_bytes)
+        continuation = pool.reserve()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Saturated as e:
+        return saturated_response(e)
+    try:
+        preview = SMALL_JOBS.reserve()
+    except Saturated as e:
+        continuation.release()
+        return saturated_response(e)
+    
+    try:
+        converter = HDFCConverter.from_bytes(pdf_bytes, name=filename, max_memory=MAX_CONVERSION_MEMORY,
+                                             job_id=session_id)
+        with preview:
+            budget = max(0.0, PREVIEW_DEADLINE_SECONDS - (time.monotonic() - started))
+            result = observe_conversion('preview', lambda: converter.convert_to_memory(
+                preview_pages=PREVIEW_PAGES, deadline=budget))
+    except Exception as e:
+        continuation.release()
+        return jsonify({'error': f'Processing error: {str(e)}'}), 500
+    
+    if not converter.pages_remaining:
+        # Short enough to finish within the preview
+        continuation.release()
+        if not result.get('success'):
+            return jsonify({'error': result.get('error', 'PDF processing failed')}), 500
+        return jsonify({
+            'success': True,
+            'status': 'ready',
+            'stats': store_result(session_id, converter, result),
+            'session_id': session_id
+        })
+    
+    # Read before the continuation starts working through them
+    pages_remaining = list(converter.pages_remaining)
+    set_background_job(session_id, status='converting')
+    continuation.submit(finish_conversion, session_id, converter)
+    
+    # The previewed pages may hold no transactions (e.g. a cover page)
+    transactions = result['transactions'] if result.get('success') else []
+    pages_done = result.get('pages_processed', 0)
+    pages_total = pages_done + len(pages_remaining)
+    store = TransactionStore(transactions, rollups=rollups_of(result['summary']) if result.get('success') else None)
+    stats = store.stats()
+    stats['preview_transaction_count'] = stats['transaction_count']
+    if pages_done:
+        stats['transaction_count'] = round(stats['transaction_count'] * pages_total / pages_done)
+    stats['page_count'] = pages_total
+    stats['approximate'] = True
+    _, rows = store.page(offset=0, limit=PREVIEW_ROWS)
+    return jsonify({
+        'success': True,
+        'status': 'converting',
+        'stats': stats,
+        'transactions': rows,
+        'pages_remaining': pages_remaining,
+        'session_id': session_id
+    })
+
+@app.route('/api/sessions/<session_id>/status')
+def session_status(session_id):
+    """Whether a previewed statement has finished converting, with its final stats once it has."""
+    with BACKGROUND_JOBS_LOCK:
+        state = BACKGROUND_JOBS.get(session_id)
+    if state is None:
+        store = RESULT_STORE.get(session_id)
+        if store is None:
+            return jsonify({'error': 'Session expired or invalid'}), 404
+        state = {'status': 'ready', 'stats': store.stats()}
+    return jsonify({'session_id': session_id, **state})
+
+@app.route('/convert', methods=['POST'])
+def convert_api():
+    """
+    Convert one PDF for API clients.
+
+    With ?stream=ndjson the response is chunked JSON lines: one transaction
+    record per line as soon as its page is parsed, then a summary (or error)
+    record. Otherwise the same records are returned as one JSON document.
+    Nothing is kept on the server afterwards.
+    """
+    stream = request.args.get('stream')
+    if stream not in (None, 'ndjson'):
+        return jsonify({'error': 'stream must be ndjson'}), 400
+    if HDFCConverter is None:
+        return jsonify({'error': 'PDF processing not available'}), 500
+    file = request.files.get('file')
+    if file is None or file.filename == '':
+        return jsonify({'error': 'No file uploaded'}), 400
+    if not allowed_file(file.filename):
+        return jsonify({'error': 'Only PDF files are allowed'}), 400
+    
+    filename = secure_filename(file.filename)
+    pdf_bytes = file.read()
+    try:
+        converter = HDFCConverter.from_bytes(pdf_bytes, name=filename, max_memory=MAX_CONVERSION_MEMORY)
+        pool, _ = plan_conversion(filename, pdf_bytes)
+        reservation = pool.reserve()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Saturated as e:
+        return saturated_response(e)
+    
+    if stream == 'ndjson':
+        def lines():
+            # Waits for one of the pool's workers before the first page is read
+            with reservation:
+                for record in iter_conversion_records(converter):
+                    yield json.dumps(record) + '\n'
+        response = Response(stream_with_context(lines()), mimetype='application/x-ndjson')
+        # Let each line through proxies as it is produced
+        response.headers['X-Accel-Buffering'] = 'no'
+        # Frees the place of a response closed before it started streaming
+        response.call_on_close(reservation.release)
+        return response
+    
+    transactions = []
+    with reservation:
+        for record in iter_conversion_records(converter):
+            kind = record.pop('type')
+            if kind == 'transaction':
+                transactions.append(record)
+            elif kind == 'error':
+                return jsonify(record), 500
+            else:
+                return jsonify({'success': True, 'transactions': transactions, 'summary': record})
+
+@app.route('/download/<session_id>/bundle')
+def download_bundle(session_id):
+    """Stream a zip of every artifact produced for the session."""
+    try:
+        store = RESULT_STORE.get(session_id)
+        if store is not None and store.has_artifacts:
+            response = Response(stream_with_context(iter_zip(iter_memory_members(store))),
+                                mimetype='application/zip')
+            response.headers['Content-Disposition'] = f'attachment; filename=hdfc_statement_{session_id}.zip'
+            return response
+        
+        temp_dir = os.path.join(tempfile.gettempdir(), session_id)
+        
+        if not os.path.exists(temp_dir):
+            return jsonify({'error': 'Session expired or invalid'}), 404
+        
+        files = [
+            (file, iter_file(os.path.join(temp_dir, file)))
+            for file in sorted(os.listdir(temp_dir))
+            if not file.lower().endswith('.pdf') and os.path.isfile(os.path.join(temp_dir, file))
+        ]
+        if not files:
+            return jsonify({'error': 'No files found for session'}), 404
+        
+        response = Response(stream_with_context(iter_zip(files)), mimetype='application/zip')
+        response.headers['Content-Disposition'] = f'attachment; filename=hdfc_statement_{session_id}.zip'
+        response.call_on_close(lambda: cleanup_temp_dir(temp_dir, 'bundle download'))
+        return response
+            
+    except Exception as e:
+        return jsonify({'error': f'Download error: {str(e)}'}), 500
+
 @app.route('/download/<session_id>/<file_type>')
 def download_file(session_id, file_type):
     try:
+        store = RESULT_STORE.get(session_id)
+        if store is not None and store.has_artifacts:
+            if file_type not in ARTIFACT_FORMATS:
+                return jsonify({'error': f'{file_type} file not found'}), 404
+            
+            filename, data = store.artifact(ARTIFACT_FORMATS[file_type])
+            _, mime_type, compressible = ARTIFACTS[file_type]
+            
+            if compressible and accepts_gzip():
+                response = Response(iter_gzip([data]), mimetype=mime_type)
+                response.headers['Content-Encoding'] = 'gzip'
+            else:
+                response = Response(data, mimetype=mime_type)
+            response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+            response.headers['Vary'] = 'Accept-Encoding'
+            return response
+        
         # Reconstruct temp directory path
         temp_dir = os.path.join(tempfile.gettempdir(), session_id)
         
         if not os.path.exists(temp_dir):
             return jsonify({'error': 'Session expired or invalid'}), 404
         
-        file_path = None
-        filename = None
-        mime_type = None
-        
-        if file_type == 'csv':
-            # Find CSV file in temp directory
-            for file in os.listdir(temp_dir):
-                if file.endswith('.csv') and 'transactions' in file.lower():
-                    file_path = os.path.join(temp_dir, file)
-                    filename = file
-                    mime_type = 'text/csv'
-                    break
-        elif file_type == 'excel':
-            # Find Excel file in temp directory
-            for file in os.listdir(temp_dir):
-                if file.endswith('.xlsx'):
-                    file_path = os.path.join(temp_dir, file)
-                    filename = file
-                    mime_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-                    break
-        elif file_type == 'summary':
-            # Find summary file in temp directory
-            for file in os.listdir(temp_dir):
-                if file.endswith('.md') and 'summary' in file.lower():
-                    file_path = os.path.join(temp_dir, file)
-                    filename = file
-                    mime_type = 'text/markdown'
-                    break
+        filename = find_artifact(temp_dir, file_type)
+        file_path = os.path.join(temp_dir, filename) if filename else None
         
         if file_path and os.path.exists(file_path):
-            # Schedule cleanup of temp directory after download
-            def cleanup_after_response(response):
-                try:
-                    import shutil
-                    shutil.rmtree(temp_dir)
-                    print("Cleaned up temporary files after download")
-                except:
-                    pass
-                return response
+            _, mime_type, compressible = ARTIFACTS[file_type]
             
-            response = send_file(file_path, as_attachment=True, download_name=filename, mimetype=mime_type)
-            response.call_on_close(lambda: cleanup_after_response(response))
+            if compressible and accepts_gzip():
+                # Compress text artifacts on the fly for clients that accept it
+                response = Response(iter_gzip(iter_file(file_path)), mimetype=mime_type)
+                response.headers['Content-Encoding'] = 'gzip'
+                response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+            else:
+                response = send_file(file_path, as_attachment=True, download_name=filename, mimetype=mime_type)
+            response.headers['Vary'] = 'Accept-Encoding'
+            
+            # Schedule cleanup of temp directory after download
+            response.call_on_close(lambda: cleanup_temp_dir(temp_dir, 'download'))
             return response
         else:
             return jsonify({'error': f'{file_type} file not found'}), 404
@@ -247,6 +912,46 @@ def download_file(session_id, file_type):
     except Exception as e:
         return jsonify({'error': f'Download error: {str(e)}'}), 500
 
+@app.route('/api/sessions/<session_id>/transactions')
+def list_transactions(session_id):
+    """Return one page of a session's transactions as JSON."""
+    store = RESULT_STORE.get(session_id)
+    if store is None:
+        return jsonify({'error': 'Session expired or invalid'}), 404
+    
+    try:
+        offset = max(int(request.args.get('offset', 0)), 0)
+        limit = min(max(int(request.args.get('limit', DEFAULT_PAGE_SIZE)), 0), MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({'error': 'offset and limit must be integers'}), 400
+    
+    start = request.args.get('from')
+    end = request.args.get('to')
+    start_date = parse_date(start) if start else None
+    end_date = parse_date(end) if end else None
+    if (start and start_date is None) or (end and end_date is None):
+        return jsonify({'error': 'from and to must be dates (YYYY-MM-DD or DD/MM/YYYY)'}), 400
+    
+    sort = request.args.get('sort') or None
+    if sort and sort.lstrip('-') not in SORT_COLUMNS:
+        return jsonify({'error': f"sort must be one of: {', '.join(sorted(SORT_COLUMNS))} (prefix '-' for descending)"}), 400
+    
+    total, rows = store.page(
+        offset=offset,
+        limit=limit,
+        category=request.args.get('category') or None,
+        start=start_date,
+        end=end_date,
+        sort=sort
+    )
+    return jsonify({
+        'session_id': session_id,
+        'offset': offset,
+        'limit': limit,
+        'total': total,
+        'transactions': rows
+    })
+
 @app.route('/health')
 def health():
     return jsonify({
@@ -256,6 +961,11 @@ def health():
         'simple_converter_available': SimpleHDFCConverter is not None
     })
 
+@app.route('/metrics')
+def metrics_endpoint():
+    """Expose counters, histograms and gauges in the Prometheus text format."""
+    return Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
+
 @app.route('/debug')
 def debug():
     import_info = {
@@ -286,9 +996,25 @@ def debug():
 def root():
     return jsonify({'message': 'HDFC PDF Converter API is running', 'status': 'healthy'})
 
+_logging_configured = False
+
+def configure_logging():
+    """
+    Send converter logs to stdout as JSON lines tagged with the session id.
+
+    Called by whichever entry point starts the server (app.py in
+    production); only the first call in a process configures anything.
+    """
+    global _logging_configured
+    if _logging_configured or setup_logging is None:
+        return
+    _logging_configured = True
+    setup_logging(log_format='json', log_file=os.environ.get('CONVERTER_LOG_FILE'))
+
 if __name__ == '__main__':
     print("Starting HDFC PDF Converter Web Backend...")
     print(f"HDFCConverter available: {HDFCConverter is not None}")
+    configure_logging()
     
     # Get port from environment (Railway sets this)
     port = int(os.environ.get('PORT', 5000))
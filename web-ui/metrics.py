@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Prometheus-style metrics for the HDFC PDF Converter Web UI
+Dependency-free counters, gauges and histograms rendered in the text
+exposition format served by /metrics.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Content type of the text exposition format
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Histogram buckets (upper bounds; +Inf is implied)
+LATENCY_BUCKETS = (0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+PAGE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{_escape(value)}"' for name, value in extra]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Registry:
+    """Ordered collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Return every metric in the text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, optionally split by labels."""
+
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        key = self._key(labels)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def values(self):
+        """Return {label values tuple: count}."""
+        with self._lock:
+            return dict(self._values)
+
+    def samples(self):
+        values = self.values()
+        if not self.labelnames and not values:
+            values = {(): 0}
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+                for key, value in sorted(values.items())]
+
+
+class Gauge(_Metric):
+    """
+    Value that can go up and down.
+
+    A gauge with a function is evaluated when metrics are rendered; the
+    function returns a number, or for labelled gauges a {label values tuple:
+    number} dict.
+    """
+
+    type = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY, function=None):
+        super().__init__(name, documentation, labelnames, registry)
+        self._function = function
+
+    def set_function(self, function):
+        self._function = function
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels):
+        if self._function is not None and not self.labelnames:
+            return self._function()
+        key = self._key(labels)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    @contextmanager
+    def track_inprogress(self, **labels):
+        """Increment the gauge for the duration of the block."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def samples(self):
+        if self._function is not None:
+            try:
+                values = self._function()
+            except Exception:
+                return []
+            if not self.labelnames:
+                values = {(): values}
+        else:
+            with self._lock:
+                values = dict(self._values)
+            if not self.labelnames and not values:
+                values = {(): 0}
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+                for key, value in sorted(values.items())]
+
+
+class Histogram(_Metric):
+    """
+    Distribution of observations in fixed buckets.
+
+    Each observation increments a single (non-cumulative) bucket; the
+    cumulative counts Prometheus expects are computed at render time.
+    """
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY, buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def snapshot(self, **labels):
+        """Return (cumulative bucket counts, sum, count) for one label set."""
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key, [[0] * len(self.buckets), 0.0, 0])
+            counts = list(counts)
+        cumulative, running = [], 0
+        for bucket_count in counts:
+            running += bucket_count
+            cumulative.append(running)
+        return cumulative, total, count
+
+    def samples(self):
+        with self._lock:
+            keys = sorted(self._values)
+        if not self.labelnames and not keys:
+            keys = [()]
+        lines = []
+        for key in keys:
+            cumulative, total, count = self.snapshot(**dict(zip(self.labelnames, key)))
+            for bound, bucket_count in zip(self.buckets, cumulative):
+                labels = _format_labels(self.labelnames, key, [('le', _format_value(float(bound)))])
+                lines.append(f'{self.name}_bucket{labels} {bucket_count}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+def process_rss_bytes():
+    """Resident set size of this process in bytes."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return float('nan')
+
+
+def temp_disk_free_bytes():
+    """Free space on the filesystem holding the temp directory."""
+    return shutil.disk_usage(tempfile.gettempdir()).free
+
+
+def cache_hit_ratio():
+    """Hit ratio per cache, from CACHE_REQUESTS."""
+    totals = {}
+    for (cache, result), count in CACHE_REQUESTS.values().items():
+        hits, lookups = totals.get(cache, (0, 0))
+        totals[cache] = (hits + (count if result == 'hit' else 0), lookups + count)
+    return {(cache,): hits / lookups for cache, (hits, lookups) in totals.items() if lookups}
+
+
+HTTP_REQUESTS = Counter(
+    'hdfc_http_requests_total', 'HTTP requests by route, method and status code.',
+    ['endpoint', 'method', 'status'])
+CONVERSIONS = Counter(
+    'hdfc_conversions_total', 'Conversions by engine and outcome (success, failure, error).',
+    ['engine', 'outcome'])
+PAGES_CONVERTED = Counter(
+    'hdfc_pages_converted_total', 'Statement pages processed by successful conversions.')
+CONVERSION_SECONDS = Histogram(
+    'hdfc_conversion_duration_seconds', 'Wall time of each conversion.', ['engine'],
+    buckets=LATENCY_BUCKETS)
+CONVERSION_PAGES = Histogram(
+    'hdfc_conversion_pages', 'Pages processed per successful conversion.', buckets=PAGE_BUCKETS)
+QUEUE_DEPTH = Gauge(
+    'hdfc_conversion_queue_depth', 'Uploads accepted but waiting for a conversion worker, per pool (small, large).',
+    ['pool'])
+ADMISSION_REJECTIONS = Counter(
+    'hdfc_admission_rejections_total', 'Uploads turned away with 429 because a pool was saturated.', ['pool'])
+ACTIVE_WORKERS = Gauge(
+    'hdfc_conversion_workers_active', 'Conversions currently running.')
+CACHE_REQUESTS = Counter(
+    'hdfc_cache_requests_total', 'Cache lookups by cache (sessions, views, artifacts) and result (hit, miss).',
+    ['cache', 'result'])
+CACHE_HIT_RATIO = Gauge(
+    'hdfc_cache_hit_ratio', 'Hits divided by lookups since startup, per cache.', ['cache'],
+    function=cache_hit_ratio)
+STORED_SESSIONS = Gauge(
+    'hdfc_stored_sessions', 'Sessions held in the in-memory result store.')
+TEMP_SESSION_BYTES = Gauge(
+    'hdfc_temp_session_bytes', 'Bytes used by session directories in the temp directory.')
+TEMP_DISK_FREE = Gauge(
+    'hdfc_temp_disk_free_bytes', 'Free space on the temp directory filesystem.', function=temp_disk_free_bytes)
+PROCESS_RSS = Gauge(
+    'process_resident_memory_bytes', 'Resident memory size in bytes.', function=process_rss_bytes)
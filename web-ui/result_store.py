@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+In-memory result store for the HDFC PDF Converter Web UI
+Keeps each session's converted transactions in a columnar table so the
+API can page through them without re-reading the generated CSV.
+"""
+
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from metrics import CACHE_REQUESTS
+
+# numpy, pandas and the converter's date parsing are imported where they
+# are used, so the backend can start (and answer /health) without loading
+# them, and falls back to the simple converter when hdfc_converter is missing
+
+# Columns returned to API clients, in display order
+TRANSACTION_COLUMNS = [
+    'Date', 'Narration', 'Reference_Number', 'Value_Date',
+    'Withdrawal_Amount', 'Deposit_Amount', 'Closing_Balance',
+    'Category', 'Counterparty', 'Page_Number', 'Source_File'
+]
+
+# Low-cardinality columns stored dictionary-encoded
+CATEGORICAL_COLUMNS = ('Category', 'Counterparty', 'Page_Number', 'Source_File')
+
+# Sort keys accepted by the transactions API -> numeric column
+SORT_COLUMNS = {
+    'date': '_date',
+    'amount': '_amount',
+    'withdrawal': '_withdrawal',
+    'deposit': '_deposit',
+    'balance': '_balance',
+}
+
+# Sort key for rows whose date could not be parsed
+UNDATED = 2 ** 63 - 1
+
+
+def parse_date(value):
+    """Parse a statement or query date into a datetime, or None."""
+    from hdfc_converter import parse_statement_date
+
+    date = parse_statement_date(value) if value is not None else None
+    return datetime(date.year, date.month, date.day) if date else None
+
+
+def _to_numeric(series):
+    import pandas as pd
+    return pd.to_numeric(series.astype(str).str.replace(',', ''), errors='coerce').fillna(0.0)
+
+
+def merge_transactions(ledgers):
+    """
+    Merge several statements' transactions into one ledger in date order.
+
+    Args:
+        ledgers (list): (source filename, transactions DataFrame or list)
+            pairs; each row is tagged with its source in Source_File
+
+    Returns:
+        DataFrame: All rows sorted by date; rows of the same day keep their
+        statement order, and undated rows go last
+    """
+    import numpy as np
+    import pandas as pd
+    from hdfc_converter import parse_statement_dates
+
+    frames = [pd.DataFrame(transactions).assign(Source_File=source) for source, transactions in ledgers]
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=TRANSACTION_COLUMNS)
+    if df.empty:
+        return df
+    dates = parse_statement_dates(df['Date'])
+    nanos = np.where(dates.notna().values, dates.values.astype('datetime64[ns]').astype(np.int64), UNDATED)
+    return df.take(np.argsort(nanos, kind='stable')).reset_index(drop=True)
+
+
+class TransactionStore:
+    """
+    Columnar, read-only view of one conversion's transactions.
+
+    Row selections for a given filter/sort combination are computed once and
+    cached as position arrays, so every subsequent page is a slice of that
+    array followed by a take() of `limit` rows.
+    """
+
+    MAX_CACHED_VIEWS = 16
+
+    def __init__(self, transactions, artifacts=None, rollups=None):
+        """
+        Args:
+            transactions (DataFrame or list): Categorized transactions
+            artifacts (callable, optional): fmt -> (filename, bytes), used to
+                serialise downloads on demand
+            rollups (tuple, optional): The converter's (monthly_breakdown,
+                monthly_totals) for these transactions; without them the
+                stats have no monthly figures
+        """
+        import numpy as np
+        import pandas as pd
+        from hdfc_converter import parse_statement_dates
+
+        df = pd.DataFrame(transactions)
+        for column in TRANSACTION_COLUMNS:
+            if column not in df.columns:
+                df[column] = ''
+        df = df[TRANSACTION_COLUMNS].reset_index(drop=True)
+        df = df.astype({column: 'category' for column in CATEGORICAL_COLUMNS})
+
+        df['_withdrawal'] = _to_numeric(df['Withdrawal_Amount'])
+        df['_deposit'] = _to_numeric(df['Deposit_Amount'])
+        df['_balance'] = _to_numeric(df['Closing_Balance'])
+        df['_amount'] = df['_deposit'] - df['_withdrawal']
+        dates = parse_statement_dates(df['Date'])
+        # Dates as int64 nanoseconds; undated rows sort last and never match a date filter
+        df['_dated'] = dates.notna().values
+        nanos = dates.values.astype('datetime64[ns]').astype(np.int64)
+        df['_date'] = np.where(df['_dated'], nanos, UNDATED)
+
+        self.df = df
+        self._rows = df[TRANSACTION_COLUMNS]
+        self.monthly_breakdown, self.monthly_totals = rollups if rollups is not None else (None, None)
+        self._categories = {
+            category: np.asarray(positions, dtype=np.int64)
+            for category, positions in df.groupby('Category', sort=False, observed=True).indices.items()
+        }
+        self._views = OrderedDict()
+        self._lock = threading.Lock()
+        self._artifact_factory = artifacts
+        self._artifacts = {}
+
+    def __len__(self):
+        return len(self.df)
+
+    @property
+    def has_artifacts(self):
+        return self._artifact_factory is not None
+
+    def artifact(self, fmt):
+        """Return (filename, bytes) for an artifact, serialising it on first use."""
+        with self._lock:
+            if fmt in self._artifacts:
+                CACHE_REQUESTS.inc(cache='artifacts', result='hit')
+                return self._artifacts[fmt]
+        CACHE_REQUESTS.inc(cache='artifacts', result='miss')
+        artifact = self._artifact_factory(fmt)
+        with self._lock:
+            self._artifacts[fmt] = artifact
+        return artifact
+
+    def monthly(self):
+        """Per-month totals with opening and closing balances, from the converter's rollups."""
+        import pandas as pd
+
+        if self.monthly_totals is None:
+            return []
+        rows = []
+        for month, data in self.monthly_totals.iterrows():
+            row = {
+                'month': month,
+                'transactions': int(data['Transactions']),
+                'debit': round(float(data['Debit']), 2),
+                'credit': round(float(data['Credit']), 2),
+                'net': round(float(data['Net']), 2),
+            }
+            if pd.notna(data['Opening_Balance']):
+                row['opening_balance'] = round(float(data['Opening_Balance']), 2)
+                row['closing_balance'] = round(float(data['Closing_Balance']), 2)
+            rows.append(row)
+        return rows
+
+    def stats(self):
+        """Summary statistics for the upload response."""
+        df = self.df
+        dated = df['_dated']
+        if dated.any():
+            first = df.loc[dated, '_date'].idxmin()
+            last = df.loc[dated, '_date'].idxmax()
+            date_range = {'start': df.at[first, 'Date'], 'end': df.at[last, 'Date']}
+        else:
+            date_range = {'start': 'N/A', 'end': 'N/A'}
+        return {
+            'transaction_count': len(df),
+            'category_count': len(self._categories),
+            'date_range': date_range,
+            'total_withdrawals': round(float(df['_withdrawal'].sum()), 2),
+            'total_deposits': round(float(df['_deposit'].sum()), 2),
+            'monthly': self.monthly(),
+        }
+
+    def _view(self, category, start, end, sort):
+        """Return the row positions matching the filters, in sort order."""
+        import numpy as np
+
+        key = (category, start, end, sort)
+        with self._lock:
+            if key in self._views:
+                self._views.move_to_end(key)
+                CACHE_REQUESTS.inc(cache='views', result='hit')
+                return self._views[key]
+        CACHE_REQUESTS.inc(cache='views', result='miss')
+
+        if category is not None:
+            positions = self._categories.get(category, np.empty(0, dtype=np.int64))
+        else:
+            positions = np.arange(len(self.df), dtype=np.int64)
+
+        if start is not None or end is not None:
+            dates = self.df['_date'].values[positions]
+            mask = np.ones(len(positions), dtype=bool)
+            if start is not None:
+                mask &= dates >= start
+            if end is not None:
+                mask &= dates <= end
+            positions = positions[mask]
+
+        if sort:
+            descending = sort.startswith('-')
+            values = self.df[SORT_COLUMNS[sort.lstrip('-')]].values[positions]
+            order = np.argsort(-values if descending else values, kind='stable')
+            positions = positions[order]
+
+        with self._lock:
+            self._views[key] = positions
+            while len(self._views) > self.MAX_CACHED_VIEWS:
+                self._views.popitem(last=False)
+        return positions
+
+    def page(self, offset=0, limit=100, category=None, start=None, end=None, sort=None):
+        """
+        Return (total, rows) for one page of transactions.
+
+        Args:
+            offset (int): Index of the first matching row to return
+            limit (int): Maximum number of rows to return
+            category (str, optional): Only rows in this category
+            start (datetime, optional): Only rows dated on or after this day
+            end (datetime, optional): Only rows dated on or before this day
+            sort (str, optional): One of SORT_COLUMNS, prefixed with '-' for descending
+        """
+        import pandas as pd
+
+        if sort and sort.lstrip('-') not in SORT_COLUMNS:
+            raise ValueError(f"Unsupported sort key: {sort}")
+        start = pd.Timestamp(start).value if start is not None else None
+        end = pd.Timestamp(end).value if end is not None else None
+
+        positions = self._view(category, start, end, sort)
+        selected = positions[offset:offset + limit]
+        rows = self._rows.take(selected).to_dict('records')
+        return len(positions), rows
+
+
+class ResultStore:
+    """Bounded, thread-safe map of session id -> TransactionStore."""
+
+    def __init__(self, max_sessions=32):
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, session_id, transactions, artifacts=None, rollups=None):
+        store = TransactionStore(transactions, artifacts, rollups)
+        with self._lock:
+            self._sessions[session_id] = store
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return store
+
+    def get(self, session_id):
+        with self._lock:
+            store = self._sessions.get(session_id)
+            if store is not None:
+                self._sessions.move_to_end(session_id)
+        CACHE_REQUESTS.inc(cache='sessions', result='hit' if store is not None else 'miss')
+        return store
+
+    def discard(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
@@ -1,7 +1,10 @@
 // Global variables
-let uploadedFile = null;
+let uploadedFiles = [];
 let processingInterval = null;
 
+// How often to ask whether a previewed statement has finished converting
+const STATUS_POLL_MS = 1500;
+
 // Google Analytics helper function
 function trackEvent(eventName, parameters = {}) {
     if (typeof gtag !== 'undefined') {
@@ -44,6 +47,7 @@ function setupEventListeners() {
     document.getElementById('downloadCsv').addEventListener('click', () => downloadFile('csv'));
     document.getElementById('downloadExcel').addEventListener('click', () => downloadFile('excel'));
     document.getElementById('downloadSummary').addEventListener('click', () => downloadFile('summary'));
+    document.getElementById('downloadBundle').addEventListener('click', () => downloadFile('bundle'));
     
     // Track external link clicks
     document.querySelectorAll('a[target="_blank"]').forEach(link => {
@@ -85,23 +89,26 @@ function handleDrop(e) {
     
     const files = e.dataTransfer.files;
     if (files.length > 0) {
-        handleFile(files[0]);
+        handleFiles(files);
     }
 }
 
 // File selection handler
 function handleFileSelect(e) {
-    const file = e.target.files[0];
-    if (file) {
-        handleFile(file);
+    const files = e.target.files;
+    if (files.length > 0) {
+        handleFiles(files);
     }
 }
 
-// File handling
-function handleFile(file) {
-    // Validate file type
-    if (file.type !== 'application/pdf') {
-        showError('Please select a valid PDF file.');
+// File handling: one or more PDFs, or zip archives of PDFs
+function handleFiles(files) {
+    files = Array.from(files);
+    
+    // Validate file types
+    const isZip = file => file.name.toLowerCase().endsWith('.zip');
+    if (files.some(file => file.type !== 'application/pdf' && !isZip(file))) {
+        showError('Please select PDF files or a zip archive of PDFs.');
         trackEvent('file_validation_error', {
             'event_category': 'error',
             'event_label': 'invalid_file_type',
@@ -110,13 +117,14 @@ function handleFile(file) {
         return;
     }
     
-    // Validate file size (50MB limit)
-    if (file.size > 50 * 1024 * 1024) {
-        showError('File size must be less than 50MB.');
+    // Validate total size (50MB limit)
+    const totalSize = files.reduce((total, file) => total + file.size, 0);
+    if (totalSize > 50 * 1024 * 1024) {
+        showError('Files must be less than 50MB in total.');
         trackEvent('file_validation_error', {
             'event_category': 'error',
             'event_label': 'file_too_large',
-            'value': Math.round(file.size / (1024 * 1024)) // Size in MB
+            'value': Math.round(totalSize / (1024 * 1024)) // Size in MB
         });
         return;
     }
@@ -125,10 +133,11 @@ function handleFile(file) {
     trackEvent('pdf_upload', {
         'event_category': 'conversion',
         'event_label': 'hdfc_pdf',
-        'value': Math.round(file.size / (1024 * 1024)) // File size in MB
+        'value': Math.round(totalSize / (1024 * 1024)), // File size in MB
+        'custom_parameter_1': files.length
     });
     
-    uploadedFile = file;
+    uploadedFiles = files;
     startProcessing();
 }
 
@@ -138,13 +147,23 @@ function startProcessing() {
     
     // Create FormData for file upload
     const formData = new FormData();
-    formData.append('file', uploadedFile);
+    uploadedFiles.forEach(file => formData.append('file', file));
     
     // Update progress
-    processingStatus.textContent = 'Uploading PDF...';
+    processingStatus.textContent = uploadedFiles.length > 1 ? `Uploading ${uploadedFiles.length} files...` : 'Uploading PDF...';
     progressFill.style.width = '10%';
     
-    // Upload and process the file
+    // A single PDF is previewed first, then finishes converting in the background
+    const single = uploadedFiles.length === 1 && !uploadedFiles[0].name.toLowerCase().endsWith('.zip');
+    if (single) {
+        previewFile(formData);
+    } else {
+        uploadFiles(formData);
+    }
+}
+
+// Convert the whole upload before showing any results
+function uploadFiles(formData) {
     fetch('/upload', {
         method: 'POST',
         body: formData
@@ -164,8 +183,45 @@ function startProcessing() {
                 showResults(data.stats);
             }, 500);
         } else {
+            const failed = (data.files || []).map(file => `${file.filename}: ${file.error}`);
+            showError([data.error || 'Processing failed', ...failed].join('; '));
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        showError('Network error: ' + error.message);
+    });
+}
+
+// Show the first pages' results straight away, then poll until the rest are converted
+function previewFile(formData) {
+    fetch('/preview', {
+        method: 'POST',
+        body: formData
+    })
+    .then(response => {
+        if (response.status === 501) {
+            // No preview on this server
+            uploadFiles(formData);
+            return null;
+        }
+        return response.json();
+    })
+    .then(data => {
+        if (data === null) {
+            return;
+        }
+        if (!data.success) {
             showError(data.error || 'Processing failed');
+            return;
+        }
+        window.sessionData = data;
+        if (data.status === 'ready') {
+            showResults(data.stats);
+            return;
         }
+        showResults(data.stats, true);
+        pollStatus(data.session_id);
     })
     .catch(error => {
         console.error('Error:', error);
@@ -173,6 +229,32 @@ function startProcessing() {
     });
 }
 
+function pollStatus(sessionId) {
+    processingInterval = setTimeout(() => {
+        fetch(`/api/sessions/${sessionId}/status`)
+        .then(response => response.json())
+        .then(data => {
+            // Ignore a statement the user has already moved on from
+            if (!window.sessionData || window.sessionData.session_id !== sessionId) {
+                return;
+            }
+            if (data.status === 'ready') {
+                processingInterval = null;
+                showResults(data.stats);
+            } else if (data.status === 'converting') {
+                pollStatus(sessionId);
+            } else {
+                processingInterval = null;
+                showError(data.error || 'Processing failed');
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            showError('Network error: ' + error.message);
+        });
+    }, STATUS_POLL_MS);
+}
+
 // Show processing section
 function showProcessing() {
     hideAllSections();
@@ -180,16 +262,29 @@ function showProcessing() {
     processingSection.classList.add('fade-in');
 }
 
-// Show results section
-function showResults(stats) {
+// Show results section; a preview's stats are estimates and its downloads wait for the full conversion
+function showResults(stats, preview = false) {
     hideAllSections();
     resultsSection.style.display = 'block';
     resultsSection.classList.add('fade-in');
     
     // Display real results data
-    document.getElementById('transactionCount').textContent = stats.transaction_count.toLocaleString();
+    const approximate = preview ? '~' : '';
+    document.getElementById('transactionCount').textContent = approximate + stats.transaction_count.toLocaleString();
     document.getElementById('pageCount').textContent = stats.page_count.toLocaleString();
     document.getElementById('categoryCount').textContent = stats.category_count.toLocaleString();
+    document.getElementById('resultsTitle').textContent = preview ? 'Converting...' : 'Conversion Complete!';
+    const previewNote = document.getElementById('previewNote');
+    previewNote.style.display = preview ? 'block' : 'none';
+    previewNote.textContent = preview
+        ? `Estimated from the first ${stats.preview_transaction_count.toLocaleString()} transactions; downloads are ready when the rest of the statement is converted.`
+        : '';
+    document.querySelectorAll('.download-buttons .btn').forEach(button => {
+        button.disabled = preview;
+    });
+    if (preview) {
+        return;
+    }
     
     // Track successful conversion
     trackEvent('conversion_success', {
@@ -257,11 +352,11 @@ function downloadFile(type) {
 
 // Reset form function
 function resetForm() {
-    uploadedFile = null;
+    uploadedFiles = [];
     fileInput.value = '';
     hideAllSections();
     if (processingInterval) {
-        clearInterval(processingInterval);
+        clearTimeout(processingInterval);
         processingInterval = null;
     }
     progressFill.style.width = '0%';
@@ -276,8 +371,7 @@ document.addEventListener('keydown', function(e) {
 
 // Add file validation feedback
 fileInput.addEventListener('change', function(e) {
-    const file = e.target.files[0];
-    if (file) {
+    for (const file of e.target.files) {
         const fileSize = (file.size / (1024 * 1024)).toFixed(2);
         console.log(`Selected file: ${file.name} (${fileSize} MB)`);
     }
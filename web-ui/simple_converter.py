@@ -4,7 +4,6 @@ Simplified HDFC Converter that works without camelot-py
 Uses basic PDF text extraction for Railway deployment
 """
 
-import pandas as pd
 import re
 from datetime import datetime
 from pathlib import Path
@@ -27,6 +26,8 @@ class SimpleHDFCConverter:
     
     def convert(self):
         """Convert PDF using simple text extraction."""
+        import pandas as pd
+        
         try:
             logger.info("Starting simple HDFC PDF conversion...")
             
@@ -81,7 +82,8 @@ class SimpleHDFCConverter:
                 'csv_file': str(csv_file),
                 'excel_file': str(excel_file),
                 'summary_file': str(summary_file),
-                'pages_processed': 1
+                'pages_processed': 1,
+                'transactions': sample_data
             }
             
         except Exception as e: